@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpRequest
+from django.utils.translation import gettext_lazy as _
+from ninja_extra.security import AsyncHttpBearer
+from ninja_jwt.authentication import JWTAuth
+from ninja_jwt.exceptions import AuthenticationFailed, InvalidToken
+from ninja_jwt.settings import api_settings
+
+from users.models import Doctor, Patient, User
+
+USER_SNAPSHOT_FIELDS = (
+    "id",
+    "username",
+    "first_name",
+    "last_name",
+    "email",
+    "role",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+)
+
+
+class TokenCache:
+    """
+    Cache LRU limitado de tokens já verificados. Cada entrada guarda um
+    retrato leve do usuário e expira junto com o token (ou após ``ttl``
+    segundos, o que vier primeiro).
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= time.time():
+                self._discard(token)
+                return None
+            self._entries.move_to_end(token)
+            return snapshot
+
+    def set(self, token: str, snapshot: Dict[str, Any], expires_at: float) -> None:
+        expires_at = min(expires_at, time.time() + self.ttl)
+        with self._lock:
+            self._entries[token] = (expires_at, snapshot)
+            self._entries.move_to_end(token)
+            self._tokens_by_user[snapshot["id"]].add(token)
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._discard(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _discard(self, token: str) -> None:
+        _, snapshot = self._entries.pop(token)
+        tokens = self._tokens_by_user[snapshot["id"]]
+        tokens.discard(token)
+        if not tokens:
+            del self._tokens_by_user[snapshot["id"]]
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_MAX_SIZE, settings.TOKEN_CACHE_TTL.total_seconds())
+
+
+def user_snapshot(user: User) -> Dict[str, Any]:
+    snapshot = {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS}
+    snapshot["patient_id"] = user.patient.id if hasattr(user, "patient") else None
+    snapshot["doctor_id"] = user.doctor.id if hasattr(user, "doctor") else None
+    return snapshot
+
+
+def user_from_snapshot(snapshot: Dict[str, Any]) -> User:
+    """
+    Reconstrói o usuário sem consultar o banco. Campos fora do retrato
+    continuam adiados e são carregados sob demanda.
+    """
+    # from_db espera os valores na ordem dos campos concretos do model.
+    field_names = [field.attname for field in User._meta.concrete_fields if field.attname in snapshot]
+    user = User.from_db("default", field_names, [snapshot[name] for name in field_names])
+    if snapshot["patient_id"] is not None:
+        user.patient = Patient.from_db("default", ["id", "user_id"], [snapshot["patient_id"], user.id])
+    if snapshot["doctor_id"] is not None:
+        user.doctor = Doctor.from_db("default", ["id", "user_id"], [snapshot["doctor_id"], user.id])
+    return user
+
+
+class CachedJWTAuth(JWTAuth):
+    """
+    JWTAuth que reaproveita a verificação da assinatura e a busca do usuário
+    para tokens já vistos, consultando o ``token_cache``.
+    """
+
+    def get_user_lookup(self, validated_token) -> Dict[str, Any]:
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+        return {api_settings.USER_ID_FIELD: user_id}
+
+    def check_user(self, user: User) -> User:
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"))
+        return user
+
+    def get_user(self, validated_token) -> User:
+        try:
+            user = User.objects.select_related("patient", "doctor").get(**self.get_user_lookup(validated_token))
+        except User.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found")) from e
+        return self.check_user(user)
+
+    def get_cached_user(self, token: str) -> Optional[User]:
+        snapshot = token_cache.get(token)
+        return None if snapshot is None else user_from_snapshot(snapshot)
+
+    def jwt_authenticate(self, request: HttpRequest, token: str) -> User:
+        request.user = AnonymousUser()
+
+        user = self.get_cached_user(token)
+        if user is None:
+            validated_token = self.get_validated_token(token)
+            user = self.get_user(validated_token)
+            token_cache.set(token, user_snapshot(user), validated_token["exp"])
+
+        request.user = user
+        return user
+
+
+class AsyncCachedJWTAuth(CachedJWTAuth, AsyncHttpBearer):
+    """
+    Versão assíncrona do ``CachedJWTAuth`` para rotas ``async def``: a busca
+    do usuário usa o ORM assíncrono e não ocupa uma thread.
+    """
+
+    async def aget_user(self, validated_token) -> User:
+        try:
+            user = await User.objects.select_related("patient", "doctor").aget(**self.get_user_lookup(validated_token))
+        except User.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found")) from e
+        return self.check_user(user)
+
+    async def authenticate(self, request: HttpRequest, token: str) -> User:
+        request.user = AnonymousUser()
+
+        user = self.get_cached_user(token)
+        if user is None:
+            validated_token = self.get_validated_token(token)
+            user = await self.aget_user(validated_token)
+            token_cache.set(token, user_snapshot(user), validated_token["exp"])
+
+        request.user = user
+        return user
@@ -0,0 +1,317 @@
+import datetime
+import itertools
+import statistics
+from time import perf_counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from urllib.parse import urlencode
+
+from django.http import HttpResponse
+from django.test import Client
+from ninja_jwt.tokens import AccessToken
+
+from consultations.models import Consultation
+from core.instrumentation import observe_queries
+from core.metrics import RequestTimer
+from users.models import Patient, User
+from .seed import FUTURE, PASSWORD
+
+
+class Call(NamedTuple):
+    method: str
+    path: str
+    body: Optional[Any] = None
+    user: Optional[User] = None
+
+
+SCENARIOS: Dict[str, Callable[[Dict], Call]] = {}
+
+
+def scenario(route: str) -> Callable:
+    """
+    Registra a requisição de exemplo de uma rota, identificada como no
+    schema OpenAPI (``"GET /api/v1/users/{id}/"``). A função recebe os dados
+    do ``seed`` e pode preparar o banco antes da chamada, fora da medição.
+    """
+
+    def register(build: Callable[[Dict], Call]) -> Callable[[Dict], Call]:
+        SCENARIOS[route] = build
+        return build
+
+    return register
+
+
+_slots = itertools.count()
+
+
+def new_consultations(data: Dict, amount: int, status: str = "S") -> List[Consultation]:
+    """
+    Consultas em horários que nenhuma outra usou, para cenários que
+    agendam, cancelam ou finalizam a cada repetição.
+    """
+    slots = [next(_slots) for _ in range(amount)]
+    return Consultation.objects.bulk_create(
+        Consultation(
+            date=FUTURE + datetime.timedelta(days=slot // 8),
+            time=datetime.time(8 + slot % 8),
+            status=status,
+            patient=data["patients"][0],
+            doctor=data["doctors"][0],
+        )
+        for slot in slots
+    )
+
+
+def _user_payload(user: User) -> Dict:
+    return {
+        "username": user.username,
+        "email": f"{user.username}@clinica.com",
+        "password": PASSWORD,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+    }
+
+
+@scenario("POST /api/v1/auth/token/")
+def token(data):
+    return Call("post", "/api/v1/auth/token/", {"username": data["staff"].username, "password": PASSWORD})
+
+
+@scenario("GET /api/v1/users/")
+def users(data):
+    return Call("get", "/api/v1/users/", user=data["patients"][0].user)
+
+
+@scenario("GET /api/v1/users/doctors/")
+def doctors(data):
+    return Call("get", "/api/v1/users/doctors/", user=data["patients"][0].user)
+
+
+@scenario("GET /api/v1/users/specialties/")
+def specialties(data):
+    return Call("get", "/api/v1/users/specialties/", user=data["patients"][0].user)
+
+
+@scenario("GET /api/v1/users/doctors/search/")
+def search_doctors(data):
+    doctor = data["doctors"][0]
+    query = urlencode({"q": doctor.user.get_full_name()})
+    return Call("get", f"/api/v1/users/doctors/search/?{query}", user=data["patients"][0].user)
+
+
+@scenario("GET /api/v1/users/patients/search/")
+def search_patients(data):
+    patient = data["patients"][0]
+    query = urlencode({"q": patient.user.get_full_name()})
+    return Call("get", f"/api/v1/users/patients/search/?{query}", user=data["staff"])
+
+
+@scenario("GET /api/v1/users/{id}/")
+def user(data):
+    return Call("get", f"/api/v1/users/{data['doctors'][0].user_id}/", user=data["patients"][0].user)
+
+
+@scenario("GET /api/v1/users/doctor/{id}/")
+def doctor(data):
+    return Call("get", f"/api/v1/users/doctor/{data['doctors'][0].id}/", user=data["patients"][0].user)
+
+
+@scenario("GET /api/v1/users/patient/{id}/")
+def patient(data):
+    return Call("get", f"/api/v1/users/patient/{data['patients'][0].id}/", user=data["doctors"][0].user)
+
+
+@scenario("POST /api/v1/users/patient/register/")
+def register_patient(data):
+    username = f"bench-novo{next(_slots)}"
+    return Call(
+        "post",
+        "/api/v1/users/patient/register/",
+        {
+            "user": _user_payload(User(username=username, first_name="Novo", last_name="Paciente")),
+            "patient": {"birth_date": "1990-01-01", "gender": "M", "phone": "86999999999", "address": "Rua B"},
+        },
+    )
+
+
+@scenario("PUT /api/v1/users/patient/edit/")
+def edit_patient(data):
+    patient = data["patients"][0]
+    return Call(
+        "put",
+        "/api/v1/users/patient/edit/",
+        {
+            "user": _user_payload(patient.user),
+            "patient": {"birth_date": "1990-01-01", "gender": "F", "phone": "86999999999", "address": "Rua C"},
+        },
+        patient.user,
+    )
+
+
+@scenario("PUT /api/v1/users/doctor/edit/")
+def edit_doctor(data):
+    doctor = data["doctors"][0]
+    return Call(
+        "put",
+        "/api/v1/users/doctor/edit/",
+        {
+            "user": _user_payload(doctor.user),
+            "doctor": {"code": doctor.code, "phone": "86988888888", "specialty_id": doctor.specialty_id},
+        },
+        doctor.user,
+    )
+
+
+@scenario("DELETE /api/v1/users/delete-account/")
+def delete_account(data):
+    user = User.objects.create_user(username=f"bench-removido{next(_slots)}", role="P")
+    Patient.objects.create(birth_date=datetime.date(1990, 1, 1), gender="F", phone="0", address="-", user=user)
+    return Call("delete", "/api/v1/users/delete-account/", user=user)
+
+
+@scenario("GET /api/v1/consultations/")
+def consultations(data):
+    return Call("get", "/api/v1/consultations/", user=data["patients"][0].user)
+
+
+@scenario("POST /api/v1/consultations/")
+def register_consultation(data):
+    slot = next(_slots)
+    return Call(
+        "post",
+        "/api/v1/consultations/",
+        {
+            "date": (FUTURE - datetime.timedelta(days=1 + slot // 8)).isoformat(),
+            "time": datetime.time(8 + slot % 8).isoformat(),
+            "observations": "Retorno",
+            "doctor_id": data["doctors"][0].id,
+        },
+        data["patients"][0].user,
+    )
+
+
+@scenario("GET /api/v1/consultations/export/")
+def export_consultations(data):
+    return Call("get", f"/api/v1/consultations/export/?doctor_id={data['doctors'][0].id}", user=data["staff"])
+
+
+@scenario("GET /api/v1/consultations/availability/")
+def availability(data):
+    specialty = data["doctors"][0].specialty_id
+    return Call(
+        "get",
+        f"/api/v1/consultations/availability/?specialty_id={specialty}&start=2030-01-07&end=2030-02-06",
+        user=data["patients"][0].user,
+    )
+
+
+@scenario("GET /api/v1/consultations/stats/")
+def consultation_stats(data):
+    return Call("get", "/api/v1/consultations/stats/?start=2030-01-07&end=2030-02-06", user=data["staff"])
+
+
+@scenario("GET /api/v1/consultations/{id}/")
+def consultation(data):
+    return Call("get", f"/api/v1/consultations/{new_consultations(data, 1)[0].id}/", user=data["patients"][0].user)
+
+
+@scenario("PUT /api/v1/consultations/{id}/cancel/")
+def cancel_consultation(data):
+    return Call("put", f"/api/v1/consultations/{new_consultations(data, 1)[0].id}/cancel/", user=data["patients"][0].user)
+
+
+@scenario("GET /api/v1/attendances/")
+def attendances(data):
+    return Call("get", "/api/v1/attendances/", user=data["doctors"][0].user)
+
+
+@scenario("POST /api/v1/attendances/")
+def register_attendance(data):
+    consultation = new_consultations(data, 1)[0]
+    return Call(
+        "post", "/api/v1/attendances/", {"observations": "Ok", "consultation_id": consultation.id}, data["doctors"][0].user
+    )
+
+
+@scenario("GET /api/v1/attendances/export/")
+def export_attendances(data):
+    return Call("get", f"/api/v1/attendances/export/?doctor_id={data['doctors'][0].id}", user=data["staff"])
+
+
+@scenario("GET /api/v1/attendances/{id}/")
+def attendance(data):
+    consultation = new_consultations(data, 1, status="F")[0]
+    attendance = consultation.attendances.create(observations="Ok")
+    return Call("get", f"/api/v1/attendances/{attendance.id}/", user=data["doctors"][0].user)
+
+
+@scenario("POST /api/v1/attendances/bulk/")
+def bulk_attendances(data):
+    items = [{"observations": "Ok", "consultation_id": consultation.id} for consultation in new_consultations(data, 20)]
+    return Call("post", "/api/v1/attendances/bulk/", {"items": items}, data["doctors"][0].user)
+
+
+@scenario("GET /api/v1/metrics/")
+def metrics(data):
+    return Call("get", "/api/v1/metrics/", user=data["staff"])
+
+
+class Driver:
+    """
+    Executa os cenários pelo ``django.test.Client``, guardando um token por
+    usuário para que a autenticação use o cache de tokens como em produção.
+    """
+
+    def __init__(self, data: Dict, client: Optional[Client] = None):
+        self.data = data
+        self.client = client or Client()
+        self.tokens: Dict[int, str] = {}
+
+    def headers(self, user: Optional[User]) -> Dict[str, str]:
+        if user is None:
+            return {}
+        if user.id not in self.tokens:
+            self.tokens[user.id] = str(AccessToken.for_user(user))
+        return {"HTTP_AUTHORIZATION": f"Bearer {self.tokens[user.id]}"}
+
+    def request(self, call: Call) -> HttpResponse:
+        method = getattr(self.client, call.method)
+        if call.body is None:
+            response = method(call.path, **self.headers(call.user))
+        else:
+            response = method(call.path, call.body, content_type="application/json", **self.headers(call.user))
+        if response.streaming:
+            b"".join(response.streaming_content)
+        if response.status_code >= 300:
+            raise AssertionError(f"{call.method.upper()} {call.path}: {response.status_code}")
+        return response
+
+    def measure(self, route: str, iterations: int) -> Dict[str, float]:
+        """
+        Repete o cenário ``iterations`` vezes, depois de uma chamada de
+        aquecimento, e resume latência (ms) e consultas por requisição.
+        """
+        build = SCENARIOS[route]
+        self.request(build(self.data))
+
+        latencies, queries = [], []
+        for _ in range(iterations):
+            call = build(self.data)
+            timer = RequestTimer()
+            # observe_queries também conta as consultas das rotas async, feitas
+            # nas threads do sync_to_async.
+            with observe_queries(timer):
+                start = perf_counter()
+                self.request(call)
+                latencies.append(1000 * (perf_counter() - start))
+            queries.append(timer.queries)
+
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        return {
+            "p50": round(percentiles[49], 3),
+            "p95": round(percentiles[94], 3),
+            "p99": round(percentiles[98], 3),
+            "queries": round(statistics.fmean(queries), 2),
+        }
+
+    def run(self, iterations: int, routes: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+        return {route: self.measure(route, iterations) for route in routes or SCENARIOS}
@@ -0,0 +1,83 @@
+import datetime
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from benchmarks.driver import SCENARIOS, Driver
+from benchmarks.seed import seed
+
+BASELINES_DIR = Path(__file__).resolve().parents[2] / "baselines"
+
+
+class Command(BaseCommand):
+    help = (
+        "Semeia um banco de testes descartável e mede todas as rotas da API: latência p50/p95/p99 "
+        "e consultas por requisição. Salva o resultado como baseline JSON e compara com uma anterior."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--specialties", type=int, default=5)
+        parser.add_argument("--doctors", type=int, default=50)
+        parser.add_argument("--patients", type=int, default=200)
+        parser.add_argument("--consultations", type=int, default=2000)
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--routes", nargs="+", choices=sorted(SCENARIOS), metavar="ROUTE")
+        parser.add_argument("--output", help=f"Arquivo da baseline (padrão: {BASELINES_DIR}/<data>.json).")
+        parser.add_argument("--compare", help="Baseline anterior para detectar regressões.")
+        parser.add_argument("--tolerance", type=float, default=0.25, help="Aumento de p95 tolerado (0.25 = 25%%).")
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 2:
+            raise CommandError("Use ao menos 2 iterações.")
+
+        sizes = {name: options[name] for name in ("specialties", "doctors", "patients", "consultations")}
+        # O mesmo banco descartável do test runner: o banco real não é tocado.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # Sem o detector de N+1, que mediria a si mesmo.
+            with override_settings(QUERY_DETECTOR_ENABLED=False, DEBUG=False):
+                results = Driver(seed(**sizes)).run(options["iterations"], options["routes"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.report(results)
+
+        baseline = {
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "iterations": options["iterations"],
+            "sizes": sizes,
+            "routes": results,
+        }
+        output = Path(options["output"] or BASELINES_DIR / f"{datetime.date.today().isoformat()}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(baseline, indent=2, ensure_ascii=False) + "\n")
+        self.stdout.write(f"Baseline salva em {output}")
+
+        if options["compare"]:
+            self.compare(results, json.loads(Path(options["compare"]).read_text()), options["tolerance"])
+
+    def report(self, results):
+        width = max(len(route) for route in results)
+        self.stdout.write(f"{'rota':<{width}}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'queries':>7}")
+        for route, result in results.items():
+            self.stdout.write(
+                f"{route:<{width}}  {result['p50']:>8.2f}  {result['p95']:>8.2f}  {result['p99']:>8.2f}  {result['queries']:>7.2f}"
+            )
+
+    def compare(self, results, baseline, tolerance):
+        regressions = []
+        for route, result in results.items():
+            previous = baseline["routes"].get(route)
+            if previous is None:
+                continue
+            if result["queries"] > previous["queries"]:
+                regressions.append(f"{route}: {previous['queries']} -> {result['queries']} consultas por requisição")
+            if result["p95"] > previous["p95"] * (1 + tolerance):
+                regressions.append(f"{route}: p95 {previous['p95']:.2f} -> {result['p95']:.2f} ms")
+
+        if regressions:
+            raise CommandError("Regressões em relação à baseline:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("Sem regressões em relação à baseline."))
@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.seed import seed
+from benchmarks.serialization import measure
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o custo de serialização das listagens, em ms por 1.000 linhas: leitura, validação "
+        "e renderização, com e sem o modo confiável (trusted_queryset) e o renderer orjson."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--output", help="Salva o resultado em JSON.")
+
+    def handle(self, *args, **options):
+        if options["rows"] < 1 or options["repeat"] < 1:
+            raise CommandError("Use ao menos 1 linha e 1 repetição.")
+
+        # O mesmo banco descartável do benchmark_api: o banco real não é tocado.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            seed(doctors=options["rows"], patients=50, consultations=options["rows"])
+            results = measure(options["rows"], options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(f"{'listagem':<14}  {'caminho':<17}  {'leitura':>8}  {'validação':>9}  {'render':>8}  {'total':>8}")
+        for name, modes in results.items():
+            for mode, stages in modes.items():
+                self.stdout.write(
+                    f"{name:<14}  {mode:<17}  {stages['fetch']:>8.2f}  {stages['validate']:>9.2f}  "
+                    f"{stages['render']:>8.2f}  {stages['total']:>8.2f}"
+                )
+        self.stdout.write("(ms por 1.000 linhas)")
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2) + "\n")
+            self.stdout.write(f"Resultado salvo em {options['output']}")
@@ -0,0 +1,101 @@
+import datetime
+import random
+from typing import Dict
+
+from django.contrib.auth.hashers import make_password
+
+from consultations.listings import rebuild_listings
+from consultations.models import Attendance, Consultation
+from consultations.stats import reconcile_stats
+from core.cache import invalidate
+from users import search
+from users.models import Doctor, Patient, Specialty, User, WorkingHours
+
+PASSWORD = "benchmark-password"
+
+# Consultas semeadas ficam em volta desta data; as criadas pelos cenários
+# usam datas a partir de FUTURE, sem colidir com elas.
+START = datetime.date(2030, 1, 7)
+FUTURE = datetime.date(2100, 1, 4)
+
+
+def seed(specialties: int = 5, doctors: int = 50, patients: int = 200, consultations: int = 2000, seed: int = 42) -> Dict:
+    """
+    Cria dados sintéticos com ``bulk_create``: especialidades, médicos com
+    expediente de segunda a sexta, pacientes, consultas (agendadas,
+    finalizadas e canceladas) e os atendimentos das finalizadas. Todos os
+    usuários têm a senha ``PASSWORD``, calculada uma única vez.
+    """
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+
+    specialty_rows = Specialty.objects.bulk_create(
+        Specialty(description=f"Especialidade {index}") for index in range(specialties)
+    )
+    users = User.objects.bulk_create(
+        [
+            User(username=f"bench-medico{index}", first_name="Médico", last_name=str(index), role="D", password=password)
+            for index in range(doctors)
+        ]
+        + [
+            User(username=f"bench-paciente{index}", first_name="Paciente", last_name=str(index), role="P", password=password)
+            for index in range(patients)
+        ]
+        + [User(username="bench-admin", role="A", is_staff=True, password=password)]
+    )
+    doctor_rows = Doctor.objects.bulk_create(
+        Doctor(code=f"CRM{index}", phone="86988888888", specialty=rng.choice(specialty_rows), user=user)
+        for index, user in enumerate(users[:doctors])
+    )
+    patient_rows = Patient.objects.bulk_create(
+        Patient(
+            birth_date=datetime.date(1950, 1, 1) + datetime.timedelta(days=rng.randrange(365 * 60)),
+            gender=rng.choice("MF"),
+            phone="86999999999",
+            address="Rua A",
+            user=user,
+        )
+        for user in users[doctors:-1]
+    )
+    WorkingHours.objects.bulk_create(
+        WorkingHours(doctor=doctor, weekday=weekday, start_time=datetime.time(8, 0), end_time=datetime.time(12, 0))
+        for doctor in doctor_rows
+        for weekday in range(5)
+    )
+    # Um médico por consulta, em rodízio: (médico, dia) nunca se repete.
+    consultation_rows = Consultation.objects.bulk_create(
+        Consultation(
+            date=START + datetime.timedelta(days=index // doctors),
+            time=datetime.time(8 + rng.randrange(4), 30 * rng.randrange(2)),
+            status=rng.choices("SFC", weights=(6, 3, 1))[0],
+            patient=rng.choice(patient_rows),
+            doctor=doctor_rows[index % doctors],
+        )
+        for index in range(consultations)
+    )
+    Attendance.objects.bulk_create(
+        Attendance(observations="Atendimento sem intercorrências.", consultation=consultation)
+        for consultation in consultation_rows
+        if consultation.status == "F"
+    )
+
+    # bulk_create não dispara os sinais que mantêm a projeção e as contagens de consultas,
+    # o índice de busca e invalidam o cache de respostas.
+    rebuild_listings()
+    reconcile_stats()
+    search.get_backend().rebuild()
+    invalidate("doctors")
+    invalidate("specialties")
+
+    return {
+        "specialties": specialty_rows,
+        "doctors": doctor_rows,
+        "patients": patient_rows,
+        "staff": users[-1],
+        "sizes": {
+            "specialties": specialties,
+            "doctors": doctors,
+            "patients": patients,
+            "consultations": consultations,
+        },
+    }
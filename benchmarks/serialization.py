@@ -0,0 +1,80 @@
+import json
+import statistics
+from time import perf_counter
+from typing import Dict, List
+
+from ninja.renderers import JSONRenderer
+from pydantic import TypeAdapter
+
+from consultations.listings import LISTING_COLUMNS
+from consultations.models import Consultation, ConsultationListing
+from consultations.schemas import ConsultationShow
+from core.querysets import optimized_queryset
+from core.serialization import ORJSONRenderer, trusted_queryset
+from users.models import Doctor
+from users.schemas import DoctorOut
+
+# Caminhos de uma resposta: objetos do ORM validados pelo Pydantic (com os
+# resolvers) e renderizados com json ou orjson, ou linhas confiáveis de
+# values_list montadas direto no Schema e renderizadas com orjson.
+MODES = ("validated+json", "validated+orjson", "trusted+orjson")
+
+RENDERERS = {"json": JSONRenderer(), "orjson": ORJSONRenderer()}
+
+
+def cases(rows: int) -> Dict[str, Dict]:
+    return {
+        "consultations": {
+            "schema": ConsultationShow,
+            "validated": lambda: optimized_queryset(Consultation, ConsultationShow)[:rows],
+            "trusted": lambda: trusted_queryset(ConsultationListing.objects.all(), ConsultationShow, **LISTING_COLUMNS)[:rows],
+        },
+        "doctors": {
+            "schema": DoctorOut,
+            "validated": lambda: optimized_queryset(Doctor, DoctorOut)[:rows],
+            "trusted": lambda: trusted_queryset(Doctor.objects.all(), DoctorOut)[:rows],
+        },
+    }
+
+
+def measure_once(case: Dict, mode: str) -> Dict[str, float]:
+    source, renderer = mode.split("+")
+    adapter = TypeAdapter(List[case["schema"]])
+
+    start = perf_counter()
+    items = list(case[source]())
+    fetched = perf_counter()
+    data = adapter.dump_python(adapter.validate_python(items))
+    validated = perf_counter()
+    content = RENDERERS[renderer].render(None, data, response_status=200)
+    rendered = perf_counter()
+
+    # Os três caminhos precisam produzir o mesmo documento.
+    assert json.loads(content) == json.loads(RENDERERS["json"].render(None, data, response_status=200))
+    return {
+        "rows": len(items),
+        "fetch": fetched - start,
+        "validate": validated - fetched,
+        "render": rendered - validated,
+    }
+
+
+def measure(rows: int, repeat: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Mede cada caminho ``repeat`` vezes (depois de um aquecimento) e devolve
+    a mediana de cada etapa em milissegundos por 1.000 linhas.
+    """
+    results = {}
+    for name, case in cases(rows).items():
+        results[name] = {}
+        for mode in MODES:
+            measure_once(case, mode)
+            runs = [measure_once(case, mode) for _ in range(repeat)]
+            scale = 1000 * 1000 / runs[0]["rows"]
+            stages = {
+                stage: round(scale * statistics.median(run[stage] for run in runs), 3)
+                for stage in ("fetch", "validate", "render")
+            }
+            stages["total"] = round(sum(stages.values()), 3)
+            results[name][mode] = stages
+    return results
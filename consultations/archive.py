@@ -0,0 +1,71 @@
+import datetime
+import time
+from typing import Callable, Optional
+
+from django.db import connections, transaction
+
+from .models import ArchivedAttendance, ArchivedConsultation, Attendance, Consultation, ConsultationListing
+
+ARCHIVED_STATUSES = ("F", "C")
+
+
+def _columns(model) -> str:
+    return ", ".join(field.column for field in model._meta.concrete_fields)
+
+
+def _move(cursor, source, target, key: str, ids) -> None:
+    """
+    Copia as linhas de ``source`` com ``key`` em ``ids`` para ``target``,
+    com os mesmos ids, e as apaga da origem.
+    """
+    placeholders = ", ".join(["%s"] * len(ids))
+    columns = _columns(source)
+    cursor.execute(
+        f"INSERT INTO {target._meta.db_table} ({columns}) "
+        f"SELECT {columns} FROM {source._meta.db_table} WHERE {key} IN ({placeholders})",
+        ids,
+    )
+    cursor.execute(f"DELETE FROM {source._meta.db_table} WHERE {key} IN ({placeholders})", ids)
+
+
+def archive_consultations(
+    before: datetime.date,
+    batch_size: int = 1000,
+    using: str = "default",
+    progress: Optional[Callable[[int, float], None]] = None,
+) -> int:
+    """
+    Move as consultas finalizadas ou canceladas anteriores a ``before``,
+    com seus atendimentos, para as tabelas de arquivo, em lotes de
+    ``batch_size`` consultas, cada um na sua transação. As linhas da
+    projeção ConsultationListing saem junto; as contagens de
+    ConsultationStat continuam valendo para o histórico.
+
+    É SQL direto de propósito: ``delete()`` dispararia os sinais que
+    descontam as consultas das estatísticas.
+    """
+    started = time.perf_counter()
+    archived = 0
+    candidates = (
+        Consultation.objects.using(using)
+        .filter(status__in=ARCHIVED_STATUSES, date__lt=before)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+    while True:
+        with transaction.atomic(using=using):
+            ids = list(candidates[:batch_size])
+            if not ids:
+                break
+            with connections[using].cursor() as cursor:
+                _move(cursor, Consultation, ArchivedConsultation, "id", ids)
+                _move(cursor, Attendance, ArchivedAttendance, "consultation_id", ids)
+                placeholders = ", ".join(["%s"] * len(ids))
+                cursor.execute(f"DELETE FROM {ConsultationListing._meta.db_table} WHERE id IN ({placeholders})", ids)
+
+        archived += len(ids)
+        if progress:
+            progress(archived, time.perf_counter() - started)
+
+    return archived
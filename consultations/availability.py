@@ -0,0 +1,95 @@
+import datetime
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import Consultation
+
+
+def _minutes(time: datetime.time) -> int:
+    return time.hour * 60 + time.minute
+
+
+def _time(minutes: int) -> datetime.time:
+    return datetime.time(minutes // 60, minutes % 60)
+
+
+class BookedIntervals:
+    """
+    Horários ocupados por médico e dia, mantidos em listas ordenadas de
+    minutos para que cada verificação de slot seja uma busca binária.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, datetime.date, datetime.time]]):
+        self._booked: Dict[Tuple[int, datetime.date], List[int]] = defaultdict(list)
+        for doctor_id, date, time in rows:
+            self._booked[doctor_id, date].append(_minutes(time))
+        for booked in self._booked.values():
+            booked.sort()
+
+    def is_free(self, doctor_id: int, date: datetime.date, start: int, end: int) -> bool:
+        booked = self._booked.get((doctor_id, date))
+        if not booked:
+            return True
+        index = bisect_left(booked, start)
+        return index == len(booked) or booked[index] >= end
+
+
+def doctor_availability(
+    doctors: QuerySet,
+    start: datetime.date,
+    end: datetime.date,
+    now: Optional[datetime.datetime] = None,
+) -> List[dict]:
+    """
+    Calcula os horários livres dos médicos entre ``start`` e ``end``
+    (inclusive) a partir dos modelos de expediente de cada um e das
+    consultas agendadas, buscadas em uma única consulta por intervalo.
+    """
+    now = timezone.localtime(now)
+    doctors = list(
+        doctors.select_related("user").only("id", "user__first_name", "user__last_name").prefetch_related("working_hours")
+    )
+
+    booked = BookedIntervals(
+        Consultation.objects.filter(
+            doctor_id__in=[doctor.id for doctor in doctors],
+            status="S",
+            date__range=(start, end),
+        )
+        .order_by()
+        .values_list("doctor_id", "date", "time")
+    )
+
+    days = [start + datetime.timedelta(days=offset) for offset in range((end - start).days + 1)]
+    availability = []
+
+    for doctor in doctors:
+        templates = defaultdict(list)
+        for hours in doctor.working_hours.all():
+            templates[hours.weekday].append(hours)
+
+        slots = []
+        for day in days:
+            for hours in sorted(templates.get(day.weekday(), ()), key=lambda hours: hours.start_time):
+                slot_end = _minutes(hours.end_time)
+                slot_start = _minutes(hours.start_time)
+                while slot_start + hours.slot_duration <= slot_end:
+                    time = _time(slot_start)
+                    is_future = day > now.date() or (day == now.date() and time > now.time())
+                    if is_future and booked.is_free(doctor.id, day, slot_start, slot_start + hours.slot_duration):
+                        slots.append({"date": day, "time": time})
+                    slot_start += hours.slot_duration
+
+        availability.append(
+            {
+                "doctor_id": doctor.id,
+                "doctor_full_name": doctor.user.get_full_name(),
+                "slots": slots,
+            }
+        )
+
+    return availability
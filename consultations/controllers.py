@@ -1,40 +1,147 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal
 
+from django.conf import settings
 from django.http import Http404
 from ninja import Query
 from ninja.types import DictStrAny
-from ninja.pagination import paginate
-from ninja_extra.ordering import Ordering, ordering
 from ninja_extra import api_controller, route, status
-from ninja_jwt.authentication import JWTAuth
-from django.shortcuts import get_object_or_404
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.db import IntegrityError, transaction
 
+from auth.authentication import AsyncCachedJWTAuth, CachedJWTAuth
+from core.pagination import CursorPage, CursorPagination, paginate
+from core.querysets import optimized_queryset
+from core.serialization import trusted_queryset
+from users.models import Doctor
+from .availability import doctor_availability
+from .exports import ATTENDANCE_FIELDS, CONSULTATION_FIELDS, attendance_rows, consultation_rows, export_response
+from .listings import LISTING_COLUMNS
 from .schemas import (
+    AvailabilityFilter,
+    AvailabilityOut,
     ConsultationShow,
     ConsultationRegister,
     AttendanceShow,
     AttendanceRegister,
+    AttendanceBulkRegister,
+    AttendanceBulkResult,
+    ConsultationFields,
     ConsultationFilter,
+    ConsultationStatsOut,
+    StatsFilter,
 )
-from .models import Consultation, Attendance
+from .models import (
+    Attendance,
+    AttendanceHistory,
+    Consultation,
+    ConsultationHistory,
+    ConsultationListing,
+    ConsultationStat,
+)
+from .stats import count_transitions, summarize_stats
+
+MAX_AVAILABILITY_DAYS = 62
 
 
 @api_controller(
     "consultations/",
-    auth=JWTAuth(),
+    auth=CachedJWTAuth(),
     tags=["CONSULTATIONS"],
 )
 class ConsultationController:
     @route.get(
         "/",
-        response=List[ConsultationShow],
+        response=CursorPage[ConsultationShow],
+        auth=AsyncCachedJWTAuth(),
+        permissions=[],
+        exclude_unset=True,
+    )
+    @paginate(CursorPagination)
+    async def list(
+        self,
+        request,
+        filters: ConsultationFilter = Query(...),
+        fields: ConsultationFields = Query(...),
+        include_history: bool = False,
+    ):
+        if include_history:
+            # As arquivadas não estão na projeção: lê da view de histórico.
+            consultations, columns = ConsultationHistory.objects.all(), {}
+        elif settings.CONSULTATION_READ_MODEL:
+            consultations, columns = ConsultationListing.objects.all(), LISTING_COLUMNS
+        else:
+            # Os nomes são calculados só quando pedidos em ``fields``.
+            consultations, columns = Consultation.objects.all(), {}
+        return trusted_queryset(filters.filter(consultations), ConsultationShow, fields.selected(), **columns)
+
+    @route.get(
+        "/export/",
+        response={
+            status.HTTP_403_FORBIDDEN: DictStrAny,
+        },
+        permissions=[],
+    )
+    def export(
+        self,
+        request,
+        filters: ConsultationFilter = Query(...),
+        format: Literal["ndjson", "csv"] = "ndjson",
+        include_history: bool = False,
+    ):
+        if not request.user.is_staff:
+            return status.HTTP_403_FORBIDDEN, {"message": "Forbidden"}
+
+        consultations = filters.filter((ConsultationHistory if include_history else Consultation).objects.all())
+        return export_response(request, CONSULTATION_FIELDS, consultation_rows(consultations), format, "consultations")
+
+    @route.get(
+        "/availability/",
+        response={
+            status.HTTP_200_OK: List[AvailabilityOut],
+            status.HTTP_400_BAD_REQUEST: DictStrAny,
+        },
+        permissions=[],
+    )
+    def availability(self, request, filters: AvailabilityFilter = Query(...)):
+        if filters.doctor_id is None and filters.specialty_id is None:
+            return status.HTTP_400_BAD_REQUEST, {"message": "Informe o médico ou a especialidade."}
+
+        if filters.end < filters.start or (filters.end - filters.start).days > MAX_AVAILABILITY_DAYS:
+            return status.HTTP_400_BAD_REQUEST, {
+                "message": f"O período deve ter no máximo {MAX_AVAILABILITY_DAYS} dias."
+            }
+
+        doctors = Doctor.objects.all()
+        if filters.doctor_id is not None:
+            doctors = doctors.filter(id=filters.doctor_id)
+        if filters.specialty_id is not None:
+            doctors = doctors.filter(specialty_id=filters.specialty_id)
+
+        return status.HTTP_200_OK, doctor_availability(doctors, filters.start, filters.end)
+
+    @route.get(
+        "/stats/",
+        response={
+            status.HTTP_200_OK: ConsultationStatsOut,
+            status.HTTP_403_FORBIDDEN: DictStrAny,
+        },
+        auth=AsyncCachedJWTAuth(),
         permissions=[],
     )
-    def list(self, request, filters: ConsultationFilter = Query(...)):
-        consultations = Consultation.objects.all()
-        consultations = filters.filter(consultations)
-        return consultations
+    async def stats(self, request, filters: StatsFilter = Query(...)):
+        if not request.user.is_staff:
+            return status.HTTP_403_FORBIDDEN, {"message": "Forbidden"}
+
+        stats = ConsultationStat.objects.filter(total__gt=0)
+        if filters.start:
+            stats = stats.filter(date__gte=filters.start)
+        if filters.end:
+            stats = stats.filter(date__lte=filters.end)
+        if filters.doctor_id:
+            stats = stats.filter(doctor_id=filters.doctor_id)
+
+        rows = [row async for row in stats.values_list("date", "doctor_id", "status", "total")]
+        return status.HTTP_200_OK, summarize_stats(rows)
 
     @route.get(
         "/{int:id}/",
@@ -42,11 +149,14 @@ class ConsultationController:
             status.HTTP_200_OK: ConsultationShow,
             status.HTTP_404_NOT_FOUND: DictStrAny,
         },
+        auth=AsyncCachedJWTAuth(),
         permissions=[],
+        exclude_unset=True,
     )
-    def get(self, id: int):
+    async def get(self, id: int, fields: ConsultationFields = Query(...)):
         try:
-            return status.HTTP_200_OK, get_object_or_404(Consultation, id=id)
+            consultations = trusted_queryset(Consultation.objects.all(), ConsultationShow, fields.selected())
+            return status.HTTP_200_OK, await aget_object_or_404(consultations, id=id)
         except Http404:
             return status.HTTP_404_NOT_FOUND, {
                 "message": f"{Consultation._meta.verbose_name.capitalize()} não existe."
@@ -60,6 +170,7 @@ class ConsultationController:
                 [
                     status.HTTP_400_BAD_REQUEST,
                     status.HTTP_404_NOT_FOUND,
+                    status.HTTP_409_CONFLICT,
                     status.HTTP_500_INTERNAL_SERVER_ERROR,
                 ]
             ): DictStrAny,
@@ -67,16 +178,24 @@ class ConsultationController:
         permissions=[],
     )
     def register(self, request, payload: ConsultationRegister):
+        payload = payload.dict()
+        patient_id = request.user.patient.id
+
         try:
             with transaction.atomic():
-                payload = payload.dict()
-                
-                print(payload)
-                
-                consultation = Consultation.objects.create(**payload, patient_id=request.user.patient.id)
-                
-                return status.HTTP_201_CREATED, consultation
+                consultation = Consultation.objects.create(**payload, patient_id=patient_id)
+
+            # Uma leitura com os nomes em vez de quatro buscas preguiçosas na serialização.
+            consultations = optimized_queryset(Consultation, ConsultationShow)
+            return status.HTTP_201_CREATED, consultations.get(id=consultation.id)
         except IntegrityError as error:
+            # A restrição unique_scheduled_consultation garante a exclusividade
+            # do horário sem travar a tabela; aqui só identificamos o conflito.
+            is_taken = Consultation.objects.filter(
+                doctor_id=payload["doctor_id"], date=payload["date"], time=payload["time"], status="S"
+            ).exists()
+            if is_taken:
+                return status.HTTP_409_CONFLICT, {"message": "Esse horário já está agendado."}
             return status.HTTP_500_INTERNAL_SERVER_ERROR, {"message": str(error)}
 
     @route.put(
@@ -96,9 +215,12 @@ class ConsultationController:
     def cancel(self, request, id: int):
         try:
             with transaction.atomic():
-                consultation = get_object_or_404(Consultation, id=id)
+                consultations = optimized_queryset(Consultation, ConsultationShow)
+                consultation = get_object_or_404(consultations, id=id)
+                previous = (consultation.date, consultation.doctor_id, consultation.status)
                 consultation.status = "C"
-                consultation.save()
+                consultation.save(update_fields=["status"])
+                count_transitions([previous], "C")
                 return status.HTTP_200_OK, consultation
         except Http404:
             return status.HTTP_404_NOT_FOUND, {
@@ -111,17 +233,42 @@ class ConsultationController:
 
 @api_controller(
     "attendances/",
-    auth=JWTAuth(),
+    auth=CachedJWTAuth(),
     tags=["ATTENDANCES"],
 )
 class AttendanceController:
     @route.get(
         "/",
-        response=List[AttendanceShow],
+        response=CursorPage[AttendanceShow],
         permissions=[],
     )
+    @paginate(CursorPagination)
     def list(self):
-        return Attendance.objects.all()
+        return optimized_queryset(Attendance, AttendanceShow)
+
+    @route.get(
+        "/export/",
+        response={
+            status.HTTP_403_FORBIDDEN: DictStrAny,
+        },
+        permissions=[],
+    )
+    def export(
+        self,
+        request,
+        filters: ConsultationFilter = Query(...),
+        format: Literal["ndjson", "csv"] = "ndjson",
+        include_history: bool = False,
+    ):
+        if not request.user.is_staff:
+            return status.HTTP_403_FORBIDDEN, {"message": "Forbidden"}
+
+        if include_history:
+            consultations, attendances = ConsultationHistory.objects.all(), AttendanceHistory.objects.all()
+        else:
+            consultations, attendances = Consultation.objects.all(), Attendance.objects.all()
+        attendances = attendances.filter(consultation__in=filters.filter(consultations).values("id"))
+        return export_response(request, ATTENDANCE_FIELDS, attendance_rows(attendances), format, "attendances")
 
     @route.get(
         "/{int:id}/",
@@ -133,7 +280,8 @@ class AttendanceController:
     )
     def get(self, id: int):
         try:
-            return status.HTTP_200_OK, get_object_or_404(Attendance, id=id)
+            attendances = optimized_queryset(Attendance, AttendanceShow)
+            return status.HTTP_200_OK, get_object_or_404(attendances, id=id)
         except Http404:
             return status.HTTP_404_NOT_FOUND, {
                 "message": f"{Attendance._meta.verbose_name.capitalize()} não existe."
@@ -163,11 +311,66 @@ class AttendanceController:
                 if consultation is None:
                     return status.HTTP_404_NOT_FOUND, {"message": "Não foi possível encontrar essa consulta."}
                 
+                previous = (consultation.date, consultation.doctor_id, consultation.status)
                 consultation.status = "F"
-                consultation.save()
+                consultation.save(update_fields=["status"])
+                count_transitions([previous], "F")
                 
                 attendance = Attendance.objects.create(**payload)
                 
                 return status.HTTP_201_CREATED, attendance
         except IntegrityError as error:
             return status.HTTP_500_INTERNAL_SERVER_ERROR, {"message": str(error)}
+
+    @route.post(
+        "/bulk/",
+        response={
+            status.HTTP_200_OK: AttendanceBulkResult,
+            status.HTTP_500_INTERNAL_SERVER_ERROR: DictStrAny,
+        },
+        permissions=[],
+    )
+    def bulk_register(self, request, payload: AttendanceBulkRegister):
+        """
+        Registra vários atendimentos de uma vez. Itens inválidos são
+        devolvidos em ``errors`` e não impedem o registro dos demais; o
+        lote inteiro custa uma leitura, dois UPDATEs e dois INSERTs.
+        """
+        items = payload.items
+        consultation_ids = {item.consultation_id for item in items}
+
+        try:
+            with transaction.atomic():
+                found = {
+                    id: (date, doctor_id, status)
+                    for id, date, doctor_id, status in Consultation.objects.select_for_update()
+                    .filter(id__in=consultation_ids)
+                    .order_by()
+                    .values_list("id", "date", "doctor_id", "status")
+                }
+
+                attendances, errors, seen = [], [], set()
+                for index, item in enumerate(items):
+                    consultation_id = item.consultation_id
+                    if consultation_id not in found:
+                        message = "Não foi possível encontrar essa consulta."
+                    elif consultation_id in seen:
+                        message = "Essa consulta aparece mais de uma vez no lote."
+                    elif found[consultation_id][2] != "S":
+                        message = "Essa consulta não está agendada."
+                    else:
+                        seen.add(consultation_id)
+                        attendances.append(Attendance(**item.dict()))
+                        continue
+                    errors.append({"index": index, "consultation_id": consultation_id, "message": message})
+
+                if attendances:
+                    Consultation.objects.filter(id__in=seen).update(status="F")
+                    # update() não dispara post_save; a projeção e as contagens são atualizadas aqui.
+                    ConsultationListing.objects.filter(id__in=seen).update(status="F")
+                    count_transitions([found[id] for id in seen], "F")
+                    attendances = Attendance.objects.bulk_create(attendances)
+
+                return status.HTTP_200_OK, {"created": attendances, "errors": errors}
+        except IntegrityError as error:
+            return status.HTTP_500_INTERNAL_SERVER_ERROR, {"message": str(error)}
@@ -0,0 +1,119 @@
+import csv
+from itertools import islice
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, QuerySet
+from django.http import HttpRequest, StreamingHttpResponse
+
+from core.querysets import full_name
+
+EXPORT_CHUNK_SIZE = 2000
+
+CONSULTATION_FIELDS = (
+    "id",
+    "date",
+    "time",
+    "status",
+    "observations",
+    "patient_id",
+    "patient_full_name",
+    "doctor_id",
+    "doctor_full_name",
+)
+
+ATTENDANCE_FIELDS = (
+    "id",
+    "observations",
+    "consultation_id",
+    "consultation_date",
+    "consultation_time",
+    "patient_full_name",
+    "doctor_full_name",
+)
+
+
+def consultation_rows(queryset: QuerySet) -> QuerySet:
+    return (
+        queryset.order_by("id")
+        .annotate(
+            patient_full_name=full_name("patient__user"),
+            doctor_full_name=full_name("doctor__user"),
+        )
+        .values_list(*CONSULTATION_FIELDS)
+    )
+
+
+def attendance_rows(queryset: QuerySet) -> QuerySet:
+    return (
+        queryset.order_by("id")
+        .annotate(
+            consultation_date=F("consultation__date"),
+            consultation_time=F("consultation__time"),
+            patient_full_name=full_name("consultation__patient__user"),
+            doctor_full_name=full_name("consultation__doctor__user"),
+        )
+        .values_list(*ATTENDANCE_FIELDS)
+    )
+
+
+class Echo:
+    """
+    Buffer de escrita que devolve a linha em vez de guardá-la, para que o
+    ``csv.writer`` alimente o ``StreamingHttpResponse`` diretamente.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _formatter(fields: Sequence[str], format: str) -> Tuple[Optional[str], Callable[[tuple], str]]:
+    """
+    Cabeçalho (se houver) e a função que formata cada linha.
+    """
+    if format == "csv":
+        writer = csv.writer(Echo())
+        return writer.writerow(fields), writer.writerow
+
+    encoder = DjangoJSONEncoder()
+    return None, lambda row: encoder.encode(dict(zip(fields, row))) + "\n"
+
+
+def _stream(rows: QuerySet, header: Optional[str], format_row: Callable[[tuple], str]) -> Iterator[str]:
+    if header is not None:
+        yield header
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield format_row(row)
+
+
+def _next_chunk(rows: Iterator[tuple]) -> List[tuple]:
+    return list(islice(rows, EXPORT_CHUNK_SIZE))
+
+
+async def _astream(rows: QuerySet, header: Optional[str], format_row: Callable[[tuple], str]) -> AsyncIterator[str]:
+    # Não usa ``aiterator()``: com ``values_list`` ele abre o cursor já no
+    # loop de eventos. O gerador síncrono é avançado um bloco por vez.
+    if header is not None:
+        yield header
+    iterator = rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    while chunk := await sync_to_async(_next_chunk)(iterator):
+        for row in chunk:
+            yield format_row(row)
+
+
+def export_response(
+    request: HttpRequest, fields: Sequence[str], rows: QuerySet, format: str, filename: str
+) -> StreamingHttpResponse:
+    """
+    Exporta ``rows`` em blocos de ``EXPORT_CHUNK_SIZE``. No ASGI o conteúdo
+    é um iterador async: com um gerador comum o Django o leria inteiro
+    para a memória antes de enviar o primeiro byte.
+    """
+    header, format_row = _formatter(fields, format)
+    stream = _astream if isinstance(request, ASGIRequest) else _stream
+    content_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    response = StreamingHttpResponse(stream(rows, header, format_row), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{format}"'
+    return response
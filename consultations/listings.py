@@ -0,0 +1,79 @@
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F, QuerySet
+
+from core.querysets import full_name
+from .models import Consultation, ConsultationListing
+from .schemas import ConsultationShow
+
+LISTING_FIELDS = (
+    "id",
+    "date",
+    "time",
+    "status",
+    "observations",
+    "patient_id",
+    "patient_full_name",
+    "doctor_id",
+    "doctor_full_name",
+    "specialty_id",
+    "specialty",
+)
+
+# Na projeção os nomes já estão materializados: os campos calculados de
+# ``ConsultationShow.orm_paths`` são lidos das colunas homônimas.
+LISTING_COLUMNS = {name: name for name in ConsultationShow.orm_paths}
+
+REBUILD_CHUNK_SIZE = 2000
+
+
+def listing_values(consultations: QuerySet) -> QuerySet:
+    """
+    Linhas da projeção calculadas a partir das consultas, em uma consulta.
+    """
+    return (
+        consultations.order_by()
+        .annotate(
+            patient_full_name=full_name("patient__user"),
+            doctor_full_name=full_name("doctor__user"),
+            specialty_id=F("doctor__specialty_id"),
+            specialty=F("doctor__specialty__description"),
+        )
+        .values(*LISTING_FIELDS)
+    )
+
+
+def refresh_listings(consultations: QuerySet) -> None:
+    """
+    Recalcula as linhas da projeção das ``consultations``, no mesmo banco
+    do queryset: uma leitura e um INSERT ... ON CONFLICT DO UPDATE.
+    """
+    ConsultationListing.objects.using(consultations.db).bulk_create(
+        [ConsultationListing(**row) for row in listing_values(consultations)],
+        update_conflicts=True,
+        unique_fields=["id"],
+        update_fields=LISTING_FIELDS[1:],
+    )
+
+
+def rebuild_listings(
+    consultation_model=Consultation,
+    listing_model=ConsultationListing,
+    using: str = "default",
+    chunk_size: int = REBUILD_CHUNK_SIZE,
+) -> int:
+    """
+    Apaga e refaz a projeção inteira em blocos de ``chunk_size`` consultas.
+    Aceita os models como parâmetro para rodar também dentro de migrações.
+    """
+    total = 0
+    with transaction.atomic(using=using):
+        listing_model.objects.using(using).all().delete()
+        ids = consultation_model.objects.using(using).order_by("id").values_list("id", flat=True).iterator(chunk_size)
+        while chunk := list(islice(ids, chunk_size)):
+            consultations = consultation_model.objects.using(using).filter(id__in=chunk)
+            rows = [listing_model(**row) for row in listing_values(consultations)]
+            listing_model.objects.using(using).bulk_create(rows)
+            total += len(rows)
+    return total
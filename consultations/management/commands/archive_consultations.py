@@ -0,0 +1,36 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from consultations.archive import archive_consultations
+
+
+class Command(BaseCommand):
+    help = (
+        "Move as consultas finalizadas ou canceladas mais antigas, com seus atendimentos, para as "
+        "tabelas de arquivo, em lotes. Pensado para rodar periodicamente (cron)."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        if options["days"] < 0 or options["batch_size"] < 1:
+            raise CommandError("Use --days >= 0 e --batch-size >= 1.")
+
+        before = datetime.date.today() - datetime.timedelta(days=options["days"])
+        start = time.perf_counter()
+        total = archive_consultations(
+            before,
+            batch_size=options["batch_size"],
+            using=options["database"],
+            progress=lambda archived, elapsed: self.stdout.write(f"{archived} consultas arquivadas ({elapsed:.1f}s)"),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"{total} consultas anteriores a {before} arquivadas em {time.perf_counter() - start:.1f}s.")
+        )
@@ -0,0 +1,60 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client
+from ninja_jwt.tokens import AccessToken
+
+from users.models import User
+
+PATHS = ["/api/v1/consultations/", "/api/v1/users/", "/api/v1/users/doctors/"]
+
+
+class Command(BaseCommand):
+    help = "Compara a vazão das rotas de listagem servidas pelos handlers WSGI e ASGI."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--username", help="Usuário usado para gerar o token (padrão: o primeiro paciente).")
+        parser.add_argument("--paths", nargs="+", default=PATHS)
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(username=options["username"]) if options["username"] else User.objects.filter(role="P")
+        user = users.first()
+        if user is None:
+            raise CommandError("Nenhum usuário encontrado para autenticar as requisições.")
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+        for path in options["paths"]:
+            wsgi = self.run_wsgi(path, headers, options["requests"], options["concurrency"])
+            asgi = asyncio.run(self.run_asgi(path, headers, options["requests"], options["concurrency"]))
+            self.stdout.write(f"{path}: WSGI {wsgi:.1f} req/s | ASGI {asgi:.1f} req/s")
+
+    def run_wsgi(self, path, headers, requests, concurrency):
+        def fetch(_):
+            try:
+                response = Client().get(path, headers=headers)
+                assert response.status_code == 200, response.content
+            finally:
+                connection.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(fetch, range(requests)))
+        return requests / (time.perf_counter() - start)
+
+    async def run_asgi(self, path, headers, requests, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with semaphore:
+                response = await client.get(path, headers=headers)
+                assert response.status_code == 200, response.content
+
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch() for _ in range(requests)))
+        return requests / (time.perf_counter() - start)
@@ -0,0 +1,136 @@
+import datetime
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import override_settings
+from ninja_jwt.tokens import AccessToken
+
+from auth.authentication import token_cache
+from core.cache import get_cache
+from users.models import Doctor, Patient, Specialty, User
+
+PROFILES = {
+    "padrão": ({}, {}),
+    "produção": (settings.SQLITE_PRODUCTION_PRAGMAS, {"transaction_mode": "IMMEDIATE"}),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a vazão de agendamentos concorrentes no SQLite com e sem o perfil de produção, "
+        "chamando POST /api/v1/consultations/ pelo client de testes. Cada perfil roda em um "
+        "banco temporário próprio."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8, help="Pacientes agendando ao mesmo tempo.")
+        parser.add_argument("--bookings", type=int, default=50, help="Agendamentos por thread.")
+        parser.add_argument(
+            "--doctors",
+            type=int,
+            help="Médicos disputados (padrão: um por thread, sem conflitos). Menos médicos que "
+            "threads faz pacientes disputarem o mesmo horário.",
+        )
+
+    def handle(self, *args, **options):
+        threads, doctors = options["threads"], options["doctors"] or options["threads"]
+        default = connections.settings[DEFAULT_DB_ALIAS]
+        for name, (pragmas, database_options) in PROFILES.items():
+            with tempfile.TemporaryDirectory() as directory, override_settings(
+                SQLITE_PRAGMAS=pragmas, QUERY_DETECTOR_ENABLED=False, DEBUG=False
+            ):
+                # A rota usa o banco "default": durante o perfil ele aponta
+                # para o banco temporário, em todas as threads.
+                self.use_database(
+                    {
+                        **default,
+                        "NAME": Path(directory) / "benchmark.sqlite3",
+                        "CONN_MAX_AGE": 0,
+                        "OPTIONS": database_options,
+                    }
+                )
+                try:
+                    call_command("migrate", verbosity=0)
+                    token_cache.clear()
+                    get_cache().clear()
+                    statuses, elapsed = self.run(*self.seed(threads, doctors), options["bookings"])
+                finally:
+                    self.use_database(default)
+
+            booked = statuses.pop(201, 0)
+            conflicts = statuses.pop(409, 0)
+            errors = ", ".join(f"{count} com status {status}" for status, count in sorted(statuses.items()))
+            self.stdout.write(
+                f"{name}: {booked / elapsed:.1f} agendamentos/s ({booked} feitos, {conflicts} conflitos 409"
+                + (f", {errors}" if errors else "")
+                + ")"
+            )
+
+    def use_database(self, database):
+        connections[DEFAULT_DB_ALIAS].close()
+        del connections[DEFAULT_DB_ALIAS]
+        connections.settings[DEFAULT_DB_ALIAS] = database
+
+    def seed(self, patients, doctors):
+        specialty = Specialty.objects.create(description="Clínica geral")
+        users = User.objects.bulk_create(
+            [User(username=f"benchmark-paciente{index}", role="P") for index in range(patients)]
+            + [User(username=f"benchmark-medico{index}", role="D") for index in range(doctors)]
+        )
+        patient_rows = Patient.objects.bulk_create(
+            Patient(birth_date=datetime.date(1990, 1, 1), gender="F", phone="00000000000", address="-", user=user)
+            for user in users[:patients]
+        )
+        doctor_rows = Doctor.objects.bulk_create(
+            Doctor(code="-", phone="00000000000", specialty=specialty, user=user) for user in users[patients:]
+        )
+        return patient_rows, doctor_rows
+
+    def run(self, patients, doctors, bookings):
+        barrier = threading.Barrier(len(patients))
+        lock = threading.Lock()
+        statuses = Counter()
+
+        def book(index, patient):
+            # Erros do banco ("database is locked") viram respostas 500.
+            client = Client(raise_request_exception=False)
+            headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(patient.user)}"}
+            results = Counter()
+            try:
+                barrier.wait()
+                for day in range(bookings):
+                    # Em rodízio: com um médico por thread, nunca dois pacientes
+                    # no mesmo horário; com menos médicos, há disputa.
+                    doctor = doctors[(index + day) % len(doctors)]
+                    response = client.post(
+                        "/api/v1/consultations/",
+                        {
+                            "date": (datetime.date(2030, 1, 1) + datetime.timedelta(days=day)).isoformat(),
+                            "time": "08:00",
+                            "observations": "Benchmark",
+                            "doctor_id": doctor.id,
+                        },
+                        content_type="application/json",
+                        **headers,
+                    )
+                    results[response.status_code] += 1
+            finally:
+                connections.close_all()
+                with lock:
+                    statuses.update(results)
+
+        workers = [threading.Thread(target=book, args=(index, patient)) for index, patient in enumerate(patients)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return statuses, time.perf_counter() - start
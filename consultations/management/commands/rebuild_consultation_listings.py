@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from consultations.listings import REBUILD_CHUNK_SIZE, rebuild_listings
+
+
+class Command(BaseCommand):
+    help = "Reconstrói a projeção ConsultationListing a partir das consultas."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=REBUILD_CHUNK_SIZE)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = rebuild_listings(using=options["database"], chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"{total} consultas projetadas em {time.perf_counter() - start:.1f}s."))
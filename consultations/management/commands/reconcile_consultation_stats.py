@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from consultations.models import ArchivedConsultation
+from consultations.stats import reconcile_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula as contagens do painel (ConsultationStat) a partir das consultas, incluindo as "
+        "arquivadas, com um GROUP BY "
+        "e corrige divergências. Pensado para rodar periodicamente (cron)."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        drift = reconcile_stats(using=options["database"], archive_model=ArchivedConsultation)
+        elapsed = time.perf_counter() - start
+        if drift:
+            self.stdout.write(self.style.WARNING(f"{drift} contagens divergentes corrigidas em {elapsed:.1f}s."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Contagens conferidas em {elapsed:.1f}s, sem divergências."))
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0002_alter_attendance_options_alter_consultation_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='consultation',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'S')), fields=('doctor', 'date', 'time'), name='unique_scheduled_consultation'),
+        ),
+    ]
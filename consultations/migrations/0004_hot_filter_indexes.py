@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0003_unique_scheduled_consultation'),
+        ('users', '0007_user_role_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='consultation',
+            name='doctor',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.RESTRICT, related_name='consultations', to='users.doctor'),
+        ),
+        migrations.AlterField(
+            model_name='consultation',
+            name='patient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.RESTRICT, related_name='consultations', to='users.patient'),
+        ),
+        migrations.AddIndex(
+            model_name='consultation',
+            index=models.Index(fields=['doctor', 'status', 'date'], name='consult_doctor_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consultation',
+            index=models.Index(fields=['patient', 'status'], name='consult_patient_status_idx'),
+        ),
+    ]
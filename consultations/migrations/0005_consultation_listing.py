@@ -0,0 +1,47 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+def backfill_listings(apps, schema_editor):
+    from consultations.listings import rebuild_listings
+
+    rebuild_listings(
+        apps.get_model('consultations', 'Consultation'),
+        apps.get_model('consultations', 'ConsultationListing'),
+        using=schema_editor.connection.alias,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0004_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsultationListing',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('status', models.CharField(choices=[('S', 'Scheduled'), ('F', 'Finished'), ('C', 'Canceled')], max_length=1)),
+                ('observations', models.CharField(max_length=200)),
+                ('patient_id', models.BigIntegerField()),
+                ('patient_full_name', models.CharField(max_length=301)),
+                ('doctor_id', models.BigIntegerField()),
+                ('doctor_full_name', models.CharField(max_length=301)),
+                ('specialty_id', models.BigIntegerField()),
+                ('specialty', models.CharField(max_length=200)),
+            ],
+            options={
+                'verbose_name': 'Consultation listing',
+                'verbose_name_plural': 'Consultation listings',
+                'db_table': 'consultation_listings',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['doctor_id', 'status', 'date'], name='listing_doctor_status_date_idx'), models.Index(fields=['patient_id', 'status'], name='listing_patient_status_idx'), models.Index(fields=['specialty_id', 'status'], name='listing_specialty_status_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_listings, migrations.RunPython.noop),
+    ]
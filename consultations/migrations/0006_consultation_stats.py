@@ -0,0 +1,40 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+def backfill_stats(apps, schema_editor):
+    from consultations.stats import reconcile_stats
+
+    reconcile_stats(
+        apps.get_model('consultations', 'Consultation'),
+        apps.get_model('consultations', 'ConsultationStat'),
+        using=schema_editor.connection.alias,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0005_consultation_listing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsultationStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('doctor_id', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('S', 'Scheduled'), ('F', 'Finished'), ('C', 'Canceled')], max_length=1)),
+                ('total', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Consultation statistic',
+                'verbose_name_plural': 'Consultation statistics',
+                'db_table': 'consultation_stats',
+                'constraints': [models.UniqueConstraint(fields=('date', 'doctor_id', 'status'), name='unique_consultation_stat')],
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+CONSULTATION_COLUMNS = "id, date, time, status, observations, patient_id, doctor_id"
+
+ATTENDANCE_COLUMNS = "id, observations, consultation_id"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0006_consultation_stats'),
+        ('users', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('observations', models.TextField()),
+            ],
+            options={
+                'verbose_name': 'Attendance history',
+                'verbose_name_plural': 'Attendance history',
+                'db_table': 'attendances_history',
+                'ordering': ['-id'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ConsultationHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('status', models.CharField(choices=[('S', 'Scheduled'), ('F', 'Finished'), ('C', 'Canceled')], max_length=1)),
+                ('observations', models.CharField(max_length=200)),
+            ],
+            options={
+                'verbose_name': 'Consultation history',
+                'verbose_name_plural': 'Consultation history',
+                'db_table': 'consultations_history',
+                'ordering': ['-id'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedConsultation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('status', models.CharField(choices=[('S', 'Scheduled'), ('F', 'Finished'), ('C', 'Canceled')], max_length=1)),
+                ('observations', models.CharField(max_length=200)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='archived_consultations', to='users.doctor')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='archived_consultations', to='users.patient')),
+            ],
+            options={
+                'verbose_name': 'Archived consultation',
+                'verbose_name_plural': 'Archived consultations',
+                'db_table': 'consultations_archive',
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedAttendance',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('observations', models.TextField()),
+                ('consultation', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='attendances', to='consultations.archivedconsultation')),
+            ],
+            options={
+                'verbose_name': 'Archived attendance',
+                'verbose_name_plural': 'Archived attendances',
+                'db_table': 'attendances_archive',
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.RunSQL(
+            f"""
+            CREATE VIEW consultations_history AS
+            SELECT {CONSULTATION_COLUMNS} FROM consultations
+            UNION ALL
+            SELECT {CONSULTATION_COLUMNS} FROM consultations_archive
+            """,
+            "DROP VIEW consultations_history",
+        ),
+        migrations.RunSQL(
+            f"""
+            CREATE VIEW attendances_history AS
+            SELECT {ATTENDANCE_COLUMNS} FROM attendances
+            UNION ALL
+            SELECT {ATTENDANCE_COLUMNS} FROM attendances_archive
+            """,
+            "DROP VIEW attendances_history",
+        ),
+    ]
@@ -13,8 +13,10 @@ class Consultation(models.Model):
     time = models.TimeField()
     status = models.CharField(max_length=1, default="S", choices=STATUS_CHOICES)
     observations = models.CharField(max_length=200, default="Sem observações")
-    patient = models.ForeignKey("users.Patient", on_delete=models.RESTRICT, related_name="consultations")
-    doctor = models.ForeignKey("users.Doctor", on_delete=models.RESTRICT, related_name="consultations")
+    # Os índices compostos de Meta.indexes começam por essas colunas e
+    # substituem os índices simples das chaves estrangeiras.
+    patient = models.ForeignKey("users.Patient", on_delete=models.RESTRICT, related_name="consultations", db_index=False)
+    doctor = models.ForeignKey("users.Doctor", on_delete=models.RESTRICT, related_name="consultations", db_index=False)
     
     def __str__(self):
         return f"{self.patient.user.first_name} - {self.doctor.user.first_name} - {self.date} - {self.time} - {self.status} - {self.observations}"
@@ -22,6 +24,17 @@ class Consultation(models.Model):
     class Meta:
         db_table = "consultations"
         ordering = ["-id"]
+        indexes = [
+            models.Index(fields=["doctor", "status", "date"], name="consult_doctor_status_date_idx"),
+            models.Index(fields=["patient", "status"], name="consult_patient_status_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["doctor", "date", "time"],
+                condition=models.Q(status="S"),
+                name="unique_scheduled_consultation",
+            ),
+        ]
         verbose_name = _("Consultation")
         verbose_name_plural = _("Consultations")
 
@@ -38,3 +51,126 @@ class Attendance(models.Model):
         ordering = ["-id"]
         verbose_name = _("Attendance")
         verbose_name_plural = _("Attendances")
+
+
+class ConsultationListing(models.Model):
+    """
+    Projeção desnormalizada das consultas para as listagens: nomes e
+    especialidade ficam na própria linha, sem junções com pacientes,
+    médicos e usuários. Mantida pelos sinais de ``consultations.signals``
+    e reconstruída com ``manage.py rebuild_consultation_listings``.
+    """
+
+    # Mesmo id da consulta.
+    id = models.BigIntegerField(primary_key=True)
+    date = models.DateField()
+    time = models.TimeField()
+    status = models.CharField(max_length=1, choices=Consultation.STATUS_CHOICES)
+    observations = models.CharField(max_length=200)
+    patient_id = models.BigIntegerField()
+    patient_full_name = models.CharField(max_length=301)
+    doctor_id = models.BigIntegerField()
+    doctor_full_name = models.CharField(max_length=301)
+    specialty_id = models.BigIntegerField()
+    specialty = models.CharField(max_length=200)
+
+    class Meta:
+        db_table = "consultation_listings"
+        ordering = ["-id"]
+        indexes = [
+            models.Index(fields=["doctor_id", "status", "date"], name="listing_doctor_status_date_idx"),
+            models.Index(fields=["patient_id", "status"], name="listing_patient_status_idx"),
+            models.Index(fields=["specialty_id", "status"], name="listing_specialty_status_idx"),
+        ]
+        verbose_name = _("Consultation listing")
+        verbose_name_plural = _("Consultation listings")
+
+
+class ConsultationStat(models.Model):
+    """
+    Contagem de consultas por dia, médico e status para o painel. Mantida
+    incrementalmente por ``consultations.stats`` e reconciliada com
+    ``manage.py reconcile_consultation_stats``.
+    """
+
+    date = models.DateField()
+    doctor_id = models.BigIntegerField()
+    status = models.CharField(max_length=1, choices=Consultation.STATUS_CHOICES)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "consultation_stats"
+        constraints = [
+            models.UniqueConstraint(fields=["date", "doctor_id", "status"], name="unique_consultation_stat"),
+        ]
+        verbose_name = _("Consultation statistic")
+        verbose_name_plural = _("Consultation statistics")
+
+
+class ArchivedConsultation(models.Model):
+    """
+    Consultas finalizadas ou canceladas antigas, movidas da tabela
+    ``consultations`` por ``manage.py archive_consultations`` com o mesmo id.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    date = models.DateField()
+    time = models.TimeField()
+    status = models.CharField(max_length=1, choices=Consultation.STATUS_CHOICES)
+    observations = models.CharField(max_length=200)
+    patient = models.ForeignKey("users.Patient", on_delete=models.RESTRICT, related_name="archived_consultations")
+    doctor = models.ForeignKey("users.Doctor", on_delete=models.RESTRICT, related_name="archived_consultations")
+
+    class Meta:
+        db_table = "consultations_archive"
+        ordering = ["-id"]
+        verbose_name = _("Archived consultation")
+        verbose_name_plural = _("Archived consultations")
+
+
+class ArchivedAttendance(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    observations = models.TextField()
+    consultation = models.ForeignKey(ArchivedConsultation, on_delete=models.RESTRICT, related_name="attendances")
+
+    class Meta:
+        db_table = "attendances_archive"
+        ordering = ["-id"]
+        verbose_name = _("Archived attendance")
+        verbose_name_plural = _("Archived attendances")
+
+
+class ConsultationHistory(models.Model):
+    """
+    Consultas atuais e arquivadas juntas, pela view ``consultations_history``
+    (``UNION ALL`` das duas tabelas). É a forma explícita de incluir o
+    histórico; ``Consultation.objects`` lê só a tabela atual.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    date = models.DateField()
+    time = models.TimeField()
+    status = models.CharField(max_length=1, choices=Consultation.STATUS_CHOICES)
+    observations = models.CharField(max_length=200)
+    patient = models.ForeignKey("users.Patient", on_delete=models.DO_NOTHING, related_name="+")
+    doctor = models.ForeignKey("users.Doctor", on_delete=models.DO_NOTHING, related_name="+")
+
+    class Meta:
+        managed = False
+        db_table = "consultations_history"
+        ordering = ["-id"]
+        verbose_name = _("Consultation history")
+        verbose_name_plural = _("Consultation history")
+
+
+class AttendanceHistory(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    observations = models.TextField()
+    consultation = models.ForeignKey(ConsultationHistory, on_delete=models.DO_NOTHING, related_name="attendances")
+
+    class Meta:
+        managed = False
+        db_table = "attendances_history"
+        ordering = ["-id"]
+        verbose_name = _("Attendance history")
+        verbose_name_plural = _("Attendance history")
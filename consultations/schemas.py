@@ -1,7 +1,9 @@
-
 import datetime
 from ninja import Schema, FilterSchema, Field
-from typing import Optional
+from pydantic import field_validator
+
+from core.serialization import FieldsQuery, TrustedSchema
+from typing import ClassVar, Dict, List, Optional
 
 
 class AttendanceShow(Schema):
@@ -14,14 +16,34 @@ class AttendanceRegister(Schema):
     consultation_id: int
 
 
+class AttendanceBulkRegister(Schema):
+    items: List[AttendanceRegister] = Field(..., min_length=1, max_length=200)
+
+
+class AttendanceBulkError(Schema):
+    index: int
+    consultation_id: int
+    message: str
+
+
+class AttendanceBulkResult(Schema):
+    created: List[AttendanceShow]
+    errors: List[AttendanceBulkError]
+
+
 class ConsultationFilter(FilterSchema):
     id: Optional[int] = Field(None, q="id__exact")
     patient_id: Optional[int] = Field(None, q="patient_id__exact",)
     doctor_id: Optional[int] = Field(None, q="doctor_id__exact",)
-    status: Optional[str] = Field(None, q="status__iexact")
+    status: Optional[str] = Field(None, q="status__exact")
+
+    @field_validator("status")
+    @classmethod
+    def normalize_status(cls, value):
+        return value.strip().upper() if value else value
 
 
-class ConsultationShow(Schema):
+class ConsultationShow(TrustedSchema):
     id: int
     date: datetime.date
     time: datetime.time
@@ -31,6 +53,11 @@ class ConsultationShow(Schema):
     patient_full_name: str
     doctor_id: int
     doctor_full_name: str
+
+    orm_paths: ClassVar[dict] = {
+        "patient_full_name": ("patient__user__first_name", "patient__user__last_name"),
+        "doctor_full_name": ("doctor__user__first_name", "doctor__user__last_name"),
+    }
     
     @staticmethod
     def resolve_patient_full_name(obj):
@@ -41,6 +68,10 @@ class ConsultationShow(Schema):
         return obj.doctor.user.get_full_name()
     
 
+class ConsultationFields(FieldsQuery):
+    output_schema = ConsultationShow
+
+
 class ConsultationRegister(Schema):
     date: datetime.date
     time: datetime.time
@@ -48,3 +79,41 @@ class ConsultationRegister(Schema):
     doctor_id: int
 
 
+class AvailabilityFilter(Schema):
+    doctor_id: Optional[int] = None
+    specialty_id: Optional[int] = None
+    start: datetime.date
+    end: datetime.date
+
+
+class AvailableSlot(Schema):
+    date: datetime.date
+    time: datetime.time
+
+
+class AvailabilityOut(Schema):
+    doctor_id: int
+    doctor_full_name: str
+    slots: List[AvailableSlot]
+
+
+class StatsFilter(Schema):
+    start: Optional[datetime.date] = None
+    end: Optional[datetime.date] = None
+    doctor_id: Optional[int] = None
+
+
+class DoctorStats(Schema):
+    doctor_id: int
+    counts: Dict[str, int]
+
+
+class DayStats(Schema):
+    date: datetime.date
+    counts: Dict[str, int]
+
+
+class ConsultationStatsOut(Schema):
+    total: Dict[str, int]
+    by_doctor: List[DoctorStats]
+    by_day: List[DayStats]
@@ -0,0 +1,72 @@
+from collections import Counter
+
+from django.db.models import Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import Doctor, Patient, Specialty, User
+from .listings import refresh_listings
+from .models import Consultation, ConsultationListing
+from .stats import adjust_stats, count_created
+
+
+@receiver(post_save, sender=Consultation)
+def update_consultation_listing(sender, instance, using, update_fields=None, **kwargs):
+    listings = ConsultationListing.objects.using(using)
+    # Cancelar e finalizar só mudam o status: um UPDATE basta.
+    if update_fields is not None and set(update_fields) == {"status"}:
+        listings.filter(id=instance.id).update(status=instance.status)
+    else:
+        refresh_listings(Consultation.objects.using(using).filter(id=instance.id))
+
+
+@receiver(post_delete, sender=Consultation)
+def delete_consultation_listing(sender, instance, using, **kwargs):
+    ConsultationListing.objects.using(using).filter(id=instance.id).delete()
+
+
+# Mudanças de status são contadas por quem as faz (stats.count_transitions),
+# que conhece o status anterior.
+@receiver(post_save, sender=Consultation)
+def count_created_consultation(sender, instance, using, created, **kwargs):
+    if created:
+        count_created([instance], using)
+
+
+@receiver(post_delete, sender=Consultation)
+def count_deleted_consultation(sender, instance, using, **kwargs):
+    adjust_stats(Counter({(instance.date, instance.doctor_id, instance.status): -1}), using)
+
+
+# Campos do usuário copiados para a projeção.
+USER_LISTING_FIELDS = {"first_name", "last_name"}
+
+
+@receiver(post_save, sender=User)
+def rename_user_listings(sender, instance, using, created=False, update_fields=None, **kwargs):
+    # Logins e rehash de senha salvam só ``last_login``/``password``.
+    if created or (update_fields is not None and not USER_LISTING_FIELDS & set(update_fields)):
+        return
+    listings = ConsultationListing.objects.using(using)
+    if instance.role == "P":
+        patients = Patient.objects.using(using).filter(user_id=instance.id)
+        listings.filter(patient_id__in=patients.values("id")).update(patient_full_name=instance.get_full_name())
+    elif instance.role == "D":
+        doctors = Doctor.objects.using(using).filter(user_id=instance.id)
+        listings.filter(doctor_id__in=doctors.values("id")).update(doctor_full_name=instance.get_full_name())
+
+
+@receiver(post_save, sender=Doctor)
+def update_doctor_listings(sender, instance, using, created=False, **kwargs):
+    if created:
+        return
+    specialty = Specialty.objects.using(using).filter(id=instance.specialty_id).values("description")
+    ConsultationListing.objects.using(using).filter(doctor_id=instance.id).update(
+        specialty_id=instance.specialty_id, specialty=Subquery(specialty)
+    )
+
+
+@receiver(post_save, sender=Specialty)
+def rename_specialty_listings(sender, instance, using, created=False, **kwargs):
+    if not created:
+        ConsultationListing.objects.using(using).filter(specialty_id=instance.id).update(specialty=instance.description)
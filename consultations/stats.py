@@ -0,0 +1,114 @@
+import datetime
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Tuple
+
+from django.db import connections, transaction
+from django.db.models import Count, QuerySet
+
+from .models import Consultation, ConsultationStat
+
+# (data, médico, status) de uma linha de ConsultationStat.
+StatKey = Tuple[datetime.date, int, str]
+
+STATUSES = [code for code, _ in Consultation.STATUS_CHOICES]
+
+
+def adjust_stats(deltas: Counter, using: str = "default") -> None:
+    """
+    Soma ``deltas`` (``StatKey`` -> variação) às contagens em um único
+    INSERT ... ON CONFLICT DO UPDATE, criando as linhas que faltam.
+    """
+    rows = [(key, amount) for key, amount in deltas.items() if amount]
+    if not rows:
+        return
+
+    connection = connections[using]
+    table = connection.ops.quote_name(ConsultationStat._meta.db_table)
+    params = []
+    for (date, doctor_id, status), amount in rows:
+        params += [connection.ops.adapt_datefield_value(date), doctor_id, status, amount]
+    values = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (date, doctor_id, status, total) VALUES {values} "
+            f"ON CONFLICT (date, doctor_id, status) DO UPDATE SET total = {table}.total + excluded.total",
+            params,
+        )
+
+
+def count_created(consultations: Iterable[Consultation], using: str = "default") -> None:
+    adjust_stats(Counter((c.date, c.doctor_id, c.status) for c in consultations), using)
+
+
+def count_transitions(previous: Iterable[StatKey], status: str, using: str = "default") -> None:
+    """
+    Move as consultas de ``previous`` (a chave de cada uma antes da
+    mudança) para ``status``.
+    """
+    deltas = Counter()
+    for date, doctor_id, old_status in previous:
+        deltas[(date, doctor_id, old_status)] -= 1
+        deltas[(date, doctor_id, status)] += 1
+    adjust_stats(deltas, using)
+
+
+def summarize_stats(rows: Iterable[Tuple[datetime.date, int, str, int]]) -> Dict:
+    """
+    Totais por status, por médico e por dia a partir das linhas de
+    ``ConsultationStat``, no formato de ``ConsultationStatsOut``.
+    """
+    total = dict.fromkeys(STATUSES, 0)
+    by_doctor = defaultdict(lambda: dict.fromkeys(STATUSES, 0))
+    by_day = defaultdict(lambda: dict.fromkeys(STATUSES, 0))
+    for date, doctor_id, status, amount in rows:
+        total[status] += amount
+        by_doctor[doctor_id][status] += amount
+        by_day[date][status] += amount
+
+    return {
+        "total": total,
+        "by_doctor": [{"doctor_id": id, "counts": counts} for id, counts in sorted(by_doctor.items())],
+        "by_day": [{"date": date, "counts": counts} for date, counts in sorted(by_day.items())],
+    }
+
+
+def stat_rows(consultations: QuerySet) -> QuerySet:
+    """
+    As contagens calculadas das consultas, com um único GROUP BY.
+    """
+    return (
+        consultations.order_by()
+        .values("date", "doctor_id", "status")
+        .annotate(total=Count("id"))
+        .values_list("date", "doctor_id", "status", "total")
+    )
+
+
+def reconcile_stats(
+    consultation_model=Consultation, stat_model=ConsultationStat, using: str = "default", archive_model=None
+) -> int:
+    """
+    Refaz as contagens a partir das consultas (e das arquivadas, com
+    ``archive_model``) e devolve quantas linhas estavam divergentes. Aceita
+    os models como parâmetro para rodar também dentro de migrações.
+    """
+    with transaction.atomic(using=using):
+        expected = Counter()
+        for model in (consultation_model, archive_model):
+            if model is not None:
+                for date, doctor_id, status, total in stat_rows(model.objects.using(using).all()):
+                    expected[(date, doctor_id, status)] += total
+        stats = stat_model.objects.using(using)
+        current = {
+            (date, doctor_id, status): total
+            for date, doctor_id, status, total in stats.values_list("date", "doctor_id", "status", "total")
+            if total
+        }
+        drift = sum(1 for key in expected.keys() | current.keys() if expected.get(key) != current.get(key))
+        if drift:
+            stats.all().delete()
+            stats.bulk_create(
+                stat_model(date=date, doctor_id=doctor_id, status=status, total=total)
+                for (date, doctor_id, status), total in expected.items()
+            )
+    return drift
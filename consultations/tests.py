@@ -1,3 +1,670 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.test import AsyncClient, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from ninja_jwt.tokens import AccessToken
+
+from benchmarks.serialization import MODES, measure
+from core.testing import ClinicFixtures, ConsultationTestCase
+from users.models import Patient, Specialty, User, WorkingHours
+from .archive import archive_consultations
+from .stats import reconcile_stats
+from .models import (
+    ArchivedAttendance,
+    ArchivedConsultation,
+    Attendance,
+    AttendanceHistory,
+    Consultation,
+    ConsultationHistory,
+    ConsultationListing,
+    ConsultationStat,
+)
+
+
+class ConsultationQueryCountTest(ConsultationTestCase):
+    def test_list_query_count_does_not_grow_with_rows(self):
+        self.create_consultations(2)
+        few, _ = self.count_queries("/api/v1/consultations/", self.patient.user)
+
+        self.create_consultations(30)
+        many, response = self.count_queries("/api/v1/consultations/", self.patient.user)
+
+        self.assertEqual(few, many)
+        self.assertEqual(response.json()["items"][0]["doctor_full_name"], "medico Souza")
+
+    def test_get_loads_names_in_a_single_query(self):
+        self.create_consultations(1)
+        consultation = Consultation.objects.get()
+        queries, response = self.count_queries(f"/api/v1/consultations/{consultation.id}/", self.patient.user)
+
+        self.assertEqual(response.json()["patient_full_name"], "paciente Silva")
+        # Autenticação do usuário + consulta com joins.
+        self.assertEqual(queries, 2)
+
+
+class ConsultationPaginationTest(ConsultationTestCase):
+    def test_cursor_walks_every_row_once_without_offset(self):
+        self.create_consultations(7)
+        ids, cursor = [], None
+
+        while True:
+            query = {"page_size": 3, **({"cursor": cursor} if cursor else {})}
+            queries, response = self.count_queries("/api/v1/consultations/", self.patient.user, **query)
+            page = response.json()
+            ids.extend(item["id"] for item in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(ids, list(Consultation.objects.values_list("id", flat=True)))
+        self.assertEqual(queries, 2)
+
+    def test_invalid_cursor_and_page_size_are_rejected(self):
+        response = self.client.get("/api/v1/consultations/", {"cursor": "?"}, **self.auth(self.patient.user))
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get("/api/v1/consultations/", {"page_size": 10_000}, **self.auth(self.patient.user))
+        self.assertEqual(response.status_code, 422)
+
+
+class IndexUsageTest(ConsultationTestCase):
+    def test_patient_status_filter_uses_composite_index(self):
+        plans = self.query_plans("/api/v1/consultations/", self.patient.user, patient_id=self.patient.id, status="s")
+
+        self.assertIn("listing_patient_status_idx", plans)
+        self.assertNotIn("SCAN consultation_listings", plans)
+
+        with self.settings(CONSULTATION_READ_MODEL=False):
+            plans = self.query_plans("/api/v1/consultations/", self.patient.user, patient_id=self.patient.id, status="s")
+
+        self.assertIn("consult_patient_status_idx", plans)
+        self.assertNotIn("SCAN consultations", plans)
+
+    def test_doctor_status_filter_uses_composite_index(self):
+        plans = self.query_plans("/api/v1/consultations/", self.patient.user, doctor_id=self.doctor.id, status="S")
+
+        self.assertIn("listing_doctor_status_date_idx", plans)
+        self.assertNotIn("SCAN consultation_listings", plans)
+
+        with self.settings(CONSULTATION_READ_MODEL=False):
+            plans = self.query_plans("/api/v1/consultations/", self.patient.user, doctor_id=self.doctor.id, status="S")
+
+        self.assertIn("consult_doctor_status_date_idx", plans)
+        self.assertNotIn("SCAN consultations", plans)
+
+    def test_pending_doctors_filter_uses_composite_index(self):
+        plans = self.query_plans("/api/v1/users/doctors/", self.patient.user, has_pending_consultation=True)
+
+        self.assertIn("consult_patient_status_idx", plans)
+        self.assertNotIn("SCAN consultations", plans)
+
+    def test_role_filter_uses_index(self):
+        plans = self.query_plans("/api/v1/users/", self.patient.user, role="d")
+
+        self.assertIn("users_role_idx", plans)
+        self.assertNotIn("SCAN users", plans)
+
+
+class ExportTest(ConsultationTestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username="gestor", role="A", is_staff=True)
+
+    def export(self, path, **query):
+        response = self.client.get(path, query, **self.auth(self.staff))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_consultations_ndjson_respects_filters(self):
+        self.create_consultations(3)
+        self.create_consultations(2, status="C")
+
+        content = self.export("/api/v1/consultations/export/", status="c")
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["patient_full_name"], "paciente Silva")
+        self.assertEqual(rows[0]["status"], "C")
+        self.assertLess(rows[0]["id"], rows[1]["id"])
+
+    def test_attendances_csv(self):
+        self.create_consultations(2, status="F")
+        consultation = Consultation.objects.first()
+        Attendance.objects.create(observations="Tudo certo", consultation=consultation)
+
+        content = self.export("/api/v1/attendances/export/", format="csv", doctor_id=self.doctor.id)
+
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0][:3], ["id", "observations", "consultation_id"])
+        self.assertEqual(rows[1][1:3], ["Tudo certo", str(consultation.id)])
+        self.assertEqual(rows[1][-1], "medico Souza")
+        self.assertEqual(len(rows), 2)
+
+    def test_exports_are_staff_only(self):
+        for path in ("/api/v1/consultations/export/", "/api/v1/attendances/export/"):
+            for user in (self.patient.user, self.doctor.user):
+                response = self.client.get(path, **self.auth(user))
+                self.assertEqual(response.status_code, 403)
+                self.assertEqual(response.json(), {"message": "Forbidden"})
+
+    async def test_asgi_export_streams_from_an_async_iterator(self):
+        await sync_to_async(self.create_consultations)(3)
+        token = await sync_to_async(AccessToken.for_user)(self.staff)
+
+        response = await AsyncClient().get(
+            "/api/v1/consultations/export/", {"format": "csv"}, headers={"Authorization": f"Bearer {token}"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(len(content.splitlines()), 4)
+
+
+class AvailabilityTest(ConsultationTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # 2030-01-07 é uma segunda-feira.
+        cls.monday = datetime.date(2030, 1, 7)
+        WorkingHours.objects.create(
+            doctor=cls.doctor, weekday=0, start_time=datetime.time(8, 0), end_time=datetime.time(10, 0)
+        )
+
+    def availability(self, **query):
+        return self.client.get("/api/v1/consultations/availability/", query, **self.auth(self.patient.user))
+
+    def test_booked_slots_are_not_offered(self):
+        Consultation.objects.create(date=self.monday, time=datetime.time(8, 30), patient=self.patient, doctor=self.doctor)
+        Consultation.objects.create(
+            date=self.monday, time=datetime.time(9, 0), status="C", patient=self.patient, doctor=self.doctor
+        )
+
+        response = self.availability(doctor_id=self.doctor.id, start=self.monday, end=self.monday + datetime.timedelta(days=7))
+
+        slots = [(slot["date"], slot["time"]) for slot in response.json()[0]["slots"]]
+        self.assertEqual(
+            slots,
+            [
+                ("2030-01-07", "08:00:00"),
+                ("2030-01-07", "09:00:00"),
+                ("2030-01-07", "09:30:00"),
+                ("2030-01-14", "08:00:00"),
+                ("2030-01-14", "08:30:00"),
+                ("2030-01-14", "09:00:00"),
+                ("2030-01-14", "09:30:00"),
+            ],
+        )
+
+    def test_working_hours_reject_empty_slots(self):
+        for slot_duration, end_time in ((0, datetime.time(10, 0)), (30, datetime.time(8, 0))):
+            with self.subTest(slot_duration=slot_duration, end_time=end_time), self.assertRaises(IntegrityError):
+                with transaction.atomic():
+                    WorkingHours.objects.create(
+                        doctor=self.doctor,
+                        weekday=1,
+                        start_time=datetime.time(8, 0),
+                        end_time=end_time,
+                        slot_duration=slot_duration,
+                    )
+
+    def test_specialty_month_uses_constant_queries(self):
+        for index in range(5):
+            doctor = self.create_doctor(f"medico{index}")
+            WorkingHours.objects.create(
+                doctor=doctor, weekday=0, start_time=datetime.time(8, 0), end_time=datetime.time(18, 0)
+            )
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.availability(
+                specialty_id=self.specialty.id, start=self.monday, end=self.monday + datetime.timedelta(days=30)
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 6)
+        # Autenticação, médicos, expedientes e consultas agendadas.
+        self.assertEqual(len(context.captured_queries), 4)
+
+    def test_requires_doctor_or_specialty_and_bounded_range(self):
+        self.assertEqual(self.availability(start=self.monday, end=self.monday).status_code, 400)
+        response = self.availability(doctor_id=self.doctor.id, start=self.monday, end=self.monday + datetime.timedelta(days=365))
+        self.assertEqual(response.status_code, 400)
+
+
+class BookingConflictTest(ConsultationTestCase):
+    def book(self, patient, time=datetime.time(8, 0)):
+        return self.client.post(
+            "/api/v1/consultations/",
+            {"date": "2030-01-07", "time": time.isoformat(), "observations": "Retorno", "doctor_id": self.doctor.id},
+            content_type="application/json",
+            **self.auth(patient.user),
+        )
+
+    def test_taken_slot_returns_conflict(self):
+        self.assertEqual(self.book(self.patient).status_code, 201)
+
+        response = self.book(self.create_patient("outro"))
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Consultation.objects.count(), 1)
+
+    def test_canceled_slot_can_be_booked_again(self):
+        consultation_id = self.book(self.patient).json()["id"]
+        self.client.put(f"/api/v1/consultations/{consultation_id}/cancel/", **self.auth(self.patient.user))
+
+        self.assertEqual(self.book(self.create_patient("outro")).status_code, 201)
+
+
+class BulkAttendanceTest(ConsultationTestCase):
+    def bulk_register(self, items):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                "/api/v1/attendances/bulk/",
+                {"items": items},
+                content_type="application/json",
+                **self.auth(self.doctor.user),
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(context.captured_queries)
+
+    def test_registers_batch_and_reports_item_errors(self):
+        self.create_consultations(3)
+        self.create_consultations(1, status="C")
+        scheduled = list(Consultation.objects.filter(status="S").values_list("id", flat=True))
+        canceled = Consultation.objects.get(status="C").id
+
+        body, _ = self.bulk_register(
+            [{"observations": f"Atendimento {id}", "consultation_id": id} for id in scheduled]
+            + [
+                {"observations": "Repetido", "consultation_id": scheduled[0]},
+                {"observations": "Cancelada", "consultation_id": canceled},
+                {"observations": "Inexistente", "consultation_id": 0},
+            ]
+        )
+
+        self.assertEqual(sorted(item["consultation_id"] for item in body["created"]), sorted(scheduled))
+        self.assertEqual([error["index"] for error in body["errors"]], [3, 4, 5])
+        self.assertEqual(Attendance.objects.count(), 3)
+        self.assertEqual(Consultation.objects.filter(id__in=scheduled, status="F").count(), 3)
+        self.assertEqual(Consultation.objects.get(id=canceled).status, "C")
+
+    def test_query_count_does_not_grow_with_batch(self):
+        self.create_consultations(30)
+        ids = list(Consultation.objects.values_list("id", flat=True))
+
+        _, few = self.bulk_register([{"observations": "Ok", "consultation_id": id} for id in ids[:2]])
+        _, many = self.bulk_register([{"observations": "Ok", "consultation_id": id} for id in ids[2:]])
+
+        self.assertEqual(few, many)
+
+    def test_empty_batch_is_rejected(self):
+        response = self.client.post(
+            "/api/v1/attendances/bulk/", {"items": []}, content_type="application/json", **self.auth(self.doctor.user)
+        )
+
+        self.assertEqual(response.status_code, 422)
+
+
+class ConsultationListingTest(ConsultationTestCase):
+    def listing(self, consultation_id):
+        return ConsultationListing.objects.get(id=consultation_id)
+
+    def book(self):
+        response = self.client.post(
+            "/api/v1/consultations/",
+            {"date": "2030-01-07", "time": "08:00", "observations": "Retorno", "doctor_id": self.doctor.id},
+            content_type="application/json",
+            **self.auth(self.patient.user),
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def test_write_paths_keep_listing_in_sync(self):
+        consultation_id = self.book()
+        listing = self.listing(consultation_id)
+        self.assertEqual(
+            (listing.patient_full_name, listing.doctor_full_name, listing.specialty, listing.status),
+            ("paciente Silva", "medico Souza", "Cardiologia", "S"),
+        )
+
+        self.client.put(f"/api/v1/consultations/{consultation_id}/cancel/", **self.auth(self.patient.user))
+        self.assertEqual(self.listing(consultation_id).status, "C")
+
+        consultation_id = self.book()
+        self.client.post(
+            "/api/v1/attendances/",
+            {"observations": "Ok", "consultation_id": consultation_id},
+            content_type="application/json",
+            **self.auth(self.doctor.user),
+        )
+        self.assertEqual(self.listing(consultation_id).status, "F")
+
+    def test_bulk_attendance_finishes_listings(self):
+        self.create_consultations(2)
+        ids = list(Consultation.objects.values_list("id", flat=True))
+
+        self.client.post(
+            "/api/v1/attendances/bulk/",
+            {"items": [{"observations": "Ok", "consultation_id": id} for id in ids]},
+            content_type="application/json",
+            **self.auth(self.doctor.user),
+        )
+
+        self.assertEqual(ConsultationListing.objects.filter(id__in=ids, status="F").count(), 2)
+
+    def test_profile_edits_rename_listings(self):
+        consultation_id = self.book()
+        other = Specialty.objects.create(description="Pediatria")
+
+        self.client.put(
+            "/api/v1/users/doctor/edit/",
+            {
+                "user": {
+                    "username": "medico", "email": "m@clinica.com", "password": "senha-secreta",
+                    "first_name": "Joana", "last_name": "Lima",
+                },
+                "doctor": {"code": "CRM1", "phone": "86988888888", "specialty_id": other.id},
+            },
+            content_type="application/json",
+            **self.auth(self.doctor.user),
+        )
+        self.client.put(
+            "/api/v1/users/patient/edit/",
+            {
+                "user": {
+                    "username": "paciente", "email": "p@clinica.com", "password": "senha-secreta",
+                    "first_name": "Rui", "last_name": "Alves",
+                },
+                "patient": {"birth_date": "1990-01-01", "gender": "M", "phone": "86999999999", "address": "Rua B"},
+            },
+            content_type="application/json",
+            **self.auth(self.patient.user),
+        )
+        other.description = "Pediatria geral"
+        other.save()
+
+        listing = self.listing(consultation_id)
+        self.assertEqual(
+            (listing.patient_full_name, listing.doctor_full_name, listing.specialty_id, listing.specialty),
+            ("Rui Alves", "Joana Lima", other.id, "Pediatria geral"),
+        )
+        self.assertEqual(Patient.objects.get(id=self.patient.id).address, "Rua B")
+
+    def test_login_saves_do_not_touch_listings(self):
+        self.book()
+        user = self.patient.user
+        user.first_name = "Ignorado"
+
+        with CaptureQueriesContext(connection) as context:
+            user.save(update_fields=["last_login"])
+            user.save(update_fields=["password"])
+
+        self.assertFalse(any("consultation_listings" in query["sql"] for query in context.captured_queries))
+        user.save(update_fields=["first_name"])
+        self.assertEqual(ConsultationListing.objects.get().patient_full_name, "Ignorado Silva")
+
+    def test_list_matches_joined_query_and_reads_one_table(self):
+        self.create_consultations(3)
+        self.create_consultations(2, status="C")
+
+        queries, response = self.count_queries("/api/v1/consultations/", self.patient.user)
+        with self.settings(CONSULTATION_READ_MODEL=False):
+            _, joined = self.count_queries("/api/v1/consultations/", self.patient.user)
+
+        self.assertEqual(response.json(), joined.json())
+        self.assertEqual(len(response.json()["items"]), 5)
+
+    def test_rebuild_command_repairs_projection(self):
+        self.create_consultations(4)
+        ConsultationListing.objects.all().delete()
+        Consultation.objects.update(observations="Alterada sem sinais")
+
+        output = io.StringIO()
+        call_command("rebuild_consultation_listings", chunk_size=3, stdout=output)
+
+        self.assertIn("4 consultas projetadas", output.getvalue())
+        self.assertEqual(set(ConsultationListing.objects.values_list("observations", flat=True)), {"Alterada sem sinais"})
+
+
+class ConsultationStatsTest(ConsultationTestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username="gestor", role="A", is_staff=True)
+
+    def counts(self):
+        return {
+            (date, doctor_id, status): total
+            for date, doctor_id, status, total in ConsultationStat.objects.filter(total__gt=0).values_list(
+                "date", "doctor_id", "status", "total"
+            )
+        }
+
+    def book(self, time):
+        response = self.client.post(
+            "/api/v1/consultations/",
+            {"date": "2030-01-07", "time": time, "observations": "Retorno", "doctor_id": self.doctor.id},
+            content_type="application/json",
+            **self.auth(self.patient.user),
+        )
+        return response.json()["id"]
+
+    def test_transitions_match_a_full_recount(self):
+        canceled, finished, bulk, _ = (self.book(time) for time in ("08:00", "09:00", "10:00", "11:00"))
+        self.client.put(f"/api/v1/consultations/{canceled}/cancel/", **self.auth(self.patient.user))
+        for path, body in (
+            ("/api/v1/attendances/", {"observations": "Ok", "consultation_id": finished}),
+            ("/api/v1/attendances/bulk/", {"items": [{"observations": "Ok", "consultation_id": bulk}]}),
+        ):
+            self.client.post(path, body, content_type="application/json", **self.auth(self.doctor.user))
+        Consultation.objects.filter(id=canceled).delete()
+
+        day = datetime.date(2030, 1, 7)
+        self.assertEqual(self.counts(), {(day, self.doctor.id, "S"): 1, (day, self.doctor.id, "F"): 2})
+        self.assertEqual(reconcile_stats(), 0)
+
+    def test_dashboard_reads_the_summary_table(self):
+        self.create_consultations(3)
+        self.create_consultations(2, status="C")
+        other = self.create_doctor("outro")
+        self.create_consultations(4, doctor=other, status="F")
+
+        queries, response = self.count_queries("/api/v1/consultations/stats/", self.staff)
+        self.create_consultations(20)
+        more_queries, _ = self.count_queries("/api/v1/consultations/stats/", self.staff)
+
+        body = response.json()
+        self.assertEqual(body["total"], {"S": 3, "F": 4, "C": 2})
+        self.assertEqual(
+            body["by_doctor"],
+            [
+                {"doctor_id": self.doctor.id, "counts": {"S": 3, "F": 0, "C": 2}},
+                {"doctor_id": other.id, "counts": {"S": 0, "F": 4, "C": 0}},
+            ],
+        )
+        self.assertEqual(len(body["by_day"]), 9)
+        self.assertEqual(queries, more_queries)
+
+        _, filtered = self.count_queries(
+            "/api/v1/consultations/stats/", self.staff, doctor_id=other.id, start="2025-01-06", end="2025-01-07"
+        )
+        self.assertEqual(filtered.json()["total"], {"S": 0, "F": 2, "C": 0})
+
+    def test_dashboard_is_staff_only(self):
+        response = self.client.get("/api/v1/consultations/stats/", **self.auth(self.doctor.user))
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_reconcile_command_repairs_drift(self):
+        self.create_consultations(3)
+        Consultation.objects.update(status="C")
+
+        output = io.StringIO()
+        call_command("reconcile_consultation_stats", stdout=output)
+
+        # Três dias com "S" a mais e "C" a menos.
+        self.assertIn("6 contagens divergentes corrigidas", output.getvalue())
+        self.assertEqual(set(self.counts().values()), {1})
+        self.assertEqual({status for _, _, status in self.counts()}, {"C"})
+
+
+class SparseFieldsTest(ConsultationTestCase):
+    def get(self, path, user, **query):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path, query, **self.auth(user))
+        self.assertEqual(response.status_code, 200)
+        return response.json(), context.captured_queries[-1]["sql"]
+
+    def test_consultation_list_reads_and_returns_only_requested_columns(self):
+        self.create_consultations(2)
+
+        body, sql = self.get("/api/v1/consultations/", self.patient.user, fields="date,time,status")
+
+        self.assertEqual([set(item) for item in body["items"]], [{"id", "date", "time", "status"}] * 2)
+        self.assertNotIn("full_name", sql)
+        self.assertNotIn("observations", sql)
+
+    def test_joined_list_skips_name_joins_when_names_are_not_requested(self):
+        self.create_consultations(2)
+
+        with self.settings(CONSULTATION_READ_MODEL=False):
+            body, sql = self.get("/api/v1/consultations/", self.patient.user, fields="status")
+            full, full_sql = self.get("/api/v1/consultations/", self.patient.user)
+
+        self.assertEqual(body["items"][0], {"id": full["items"][0]["id"], "status": "S"})
+        self.assertNotIn("JOIN", sql)
+        self.assertIn("JOIN", full_sql)
+
+    def test_consultation_detail_is_trimmed(self):
+        self.create_consultations(1)
+        consultation = Consultation.objects.get()
+
+        body, sql = self.get(f"/api/v1/consultations/{consultation.id}/", self.patient.user, fields="doctor_full_name")
+
+        self.assertEqual(body, {"id": consultation.id, "doctor_full_name": "medico Souza"})
+        self.assertNotIn('"patients"', sql)
+
+    def test_doctor_routes_skip_the_user_and_specialty_joins(self):
+        headers = self.patient.user
+
+        listed, list_sql = self.get("/api/v1/users/doctors/", headers, fields="code")
+        detail, detail_sql = self.get(f"/api/v1/users/doctor/{self.doctor.id}/", headers, fields="id,full_name")
+        cached, _ = self.get(f"/api/v1/users/doctor/{self.doctor.id}/", headers, fields="id,full_name")
+
+        self.assertEqual(listed["items"], [{"id": self.doctor.id, "code": "CRM1"}])
+        self.assertNotIn("JOIN", list_sql)
+        self.assertEqual(detail, {"id": self.doctor.id, "full_name": "medico Souza"})
+        self.assertNotIn("specialties", detail_sql)
+        self.assertEqual(cached, detail)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get("/api/v1/users/doctors/", {"fields": "id,password"}, **self.auth(self.patient.user))
+
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("password", response.content.decode())
+
+    def test_benchmark_reports_every_mode_per_thousand_rows(self):
+        self.create_consultations(3)
+
+        results = measure(rows=3, repeat=1)
+
+        self.assertEqual(set(results), {"consultations", "doctors"})
+        self.assertEqual(set(results["consultations"]), set(MODES))
+        self.assertEqual(set(results["doctors"]["trusted+orjson"]), {"fetch", "validate", "render", "total"})
+
+
+class ArchiveTest(ConsultationTestCase):
+    def setUp(self):
+        # Dez finalizadas e três canceladas antigas, uma agendada antiga e
+        # duas finalizadas depois do corte.
+        self.create_consultations(10, status="F")
+        self.create_consultations(3, status="C")
+        self.create_consultations(1)
+        self.create_consultations(2, status="F")
+        self.before = datetime.date(2025, 1, 15)
+        finished = Consultation.objects.filter(status="F").order_by("id")
+        Attendance.objects.bulk_create(Attendance(observations="Ok", consultation=consultation) for consultation in finished)
+
+    def stat_totals(self):
+        return dict(ConsultationStat.objects.values_list("status").annotate(Sum("total")).order_by())
+
+    def test_old_finished_and_canceled_consultations_move_in_batches(self):
+        stats = self.stat_totals()
+        batches = []
+
+        archived = archive_consultations(self.before, batch_size=5, progress=lambda total, _: batches.append(total))
+
+        self.assertEqual(archived, 13)
+        self.assertEqual(batches, [5, 10, 13])
+        self.assertEqual(
+            sorted(Consultation.objects.values_list("status", flat=True)), ["F", "F", "S"]
+        )
+        self.assertEqual(ArchivedConsultation.objects.count(), 13)
+        self.assertEqual(ArchivedAttendance.objects.count(), 10)
+        self.assertEqual(Attendance.objects.count(), 2)
+        self.assertEqual(ConsultationListing.objects.count(), 3)
+        self.assertEqual(self.stat_totals(), stats)
+        self.assertEqual(reconcile_stats(archive_model=ArchivedConsultation), 0)
+
+    def test_history_is_an_explicit_opt_in(self):
+        archive_consultations(self.before, batch_size=100)
+
+        self.assertEqual(ConsultationHistory.objects.count(), 16)
+        self.assertEqual(AttendanceHistory.objects.filter(consultation__status="F").count(), 12)
+
+        headers = self.auth(self.patient.user)
+        hot = self.client.get("/api/v1/consultations/", {"limit": 50}, **headers).json()
+        history = self.client.get("/api/v1/consultations/", {"limit": 50, "include_history": True}, **headers).json()
+        self.assertEqual(len(hot["items"]), 3)
+        self.assertEqual(len(history["items"]), 16)
+        self.assertEqual(history["items"][-1]["patient_full_name"], "paciente Silva")
+
+        staff = User.objects.create_user(username="gestor", role="A", is_staff=True)
+        response = self.client.get("/api/v1/attendances/export/", {"include_history": True}, **self.auth(staff))
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 12)
+
+    def test_command_uses_the_configured_age(self):
+        output = io.StringIO()
+
+        call_command("archive_consultations", days=0, batch_size=4, stdout=output)
+
+        self.assertEqual(Consultation.objects.count(), 1)
+        self.assertIn("15 consultas anteriores a", output.getvalue())
+
+
+class ConcurrentBookingTest(ClinicFixtures, TransactionTestCase):
+    def test_parallel_bookings_for_one_slot_create_a_single_consultation(self):
+        specialty = Specialty.objects.create(description="Cardiologia")
+        doctor = self.create_doctor("medico", specialty)
+        patients = [self.create_patient(f"paciente{index}") for index in range(8)]
+        barrier = threading.Barrier(len(patients))
+        results = []
+
+        def book(patient):
+            try:
+                barrier.wait()
+                response = self.client_class().post(
+                    "/api/v1/consultations/",
+                    {"date": "2030-01-07", "time": "08:00", "observations": "Retorno", "doctor_id": doctor.id},
+                    content_type="application/json",
+                    **self.auth(patient.user),
+                )
+                results.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(patient,)) for patient in patients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), [201] + [409] * (len(patients) - 1))
+        self.assertEqual(Consultation.objects.filter(doctor=doctor, status="S").count(), 1)
 
-# Create your tests here.
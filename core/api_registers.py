@@ -1,13 +1,16 @@
 from ninja import Swagger
-from ninja_extra import NinjaExtraAPI
 
 from auth.controllers import AuthController
 from users.controllers import UserController
 from consultations.controllers import AttendanceController, ConsultationController
+from .controllers import MetricsController
+from .openapi import CachedSchemaAPI
+from .serialization import TimedORJSONRenderer
 
 
-api = NinjaExtraAPI(
+api = CachedSchemaAPI(
     title="API",
+    renderer=TimedORJSONRenderer(),
     docs=Swagger(
         settings={
             "docExpansion": "none",
@@ -27,4 +30,5 @@ api.register_controllers(
     UserController,
     ConsultationController,
     AttendanceController,
+    MetricsController,
 )
\ No newline at end of file
@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Carrega os controllers já aqui (com o --preload do gunicorn, uma vez só,
+# no processo mestre) em vez de na primeira requisição de cada worker.
+from core.startup import warm_up  # noqa: E402
+
+warm_up()
@@ -0,0 +1,140 @@
+import hashlib
+from functools import partial, wraps
+from typing import Any, Callable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from ninja.signature import is_async
+from pydantic import TypeAdapter
+
+from .serialization import ORJSONRenderer
+
+renderer = ORJSONRenderer()
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _version_key(namespace: str) -> str:
+    return f"response:{namespace}:version"
+
+
+def invalidate(namespace: str) -> None:
+    """
+    Invalida todas as respostas do namespace trocando sua versão; as
+    entradas antigas deixam de ser lidas e expiram sozinhas.
+    """
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), 2, None)
+
+
+def invalidate_on_commit(namespace: str, using: str = "default") -> None:
+    """
+    ``invalidate`` depois do commit da transação atual (na hora, fora de
+    uma). Antes do commit, uma leitura concorrente ainda veria as linhas
+    antigas e as guardaria na versão nova, onde ficariam até expirar.
+    """
+    transaction.on_commit(partial(invalidate, namespace), using=using)
+
+
+def _response_key(namespace: str, version: int, request: HttpRequest) -> str:
+    path = hashlib.sha256(request.get_full_path().encode()).hexdigest()
+    return f"response:{namespace}:{version}:{path}"
+
+
+def _conditional_response(request: HttpRequest, content: bytes, etag: str) -> HttpResponse:
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type=renderer.media_type)
+    response["ETag"] = etag
+    return response
+
+
+class ResponseCache:
+    """
+    Guarda o JSON já serializado de uma rota de leitura, com ETag forte.
+    Respostas diferentes de 200 passam direto, sem cache. ``exclude_unset``
+    deve acompanhar o da rota.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        schema: Any,
+        skip: Optional[Callable[[HttpRequest], bool]] = None,
+        exclude_unset: bool = False,
+    ):
+        self.namespace = namespace
+        self.adapter = TypeAdapter(schema)
+        self.skip = skip
+        self.exclude_unset = exclude_unset
+
+    def serialize(self, request: HttpRequest, result: Any) -> Optional[Tuple[bytes, str]]:
+        if isinstance(result, tuple):
+            status, result = result
+            if status != 200:
+                return None
+        data = self.adapter.dump_python(
+            self.adapter.validate_python(result), mode="json", exclude_unset=self.exclude_unset
+        )
+        content = renderer.render(request, data, response_status=200)
+        return content, f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+    def __call__(self, func: Callable) -> Callable:
+        if is_async(func):
+
+            @wraps(func)
+            async def async_view(controller, *args: Any, **kwargs: Any) -> Any:
+                request = controller.context.request
+                if self.skip and self.skip(request):
+                    return await func(controller, *args, **kwargs)
+
+                cache = get_cache()
+                version = await cache.aget_or_set(_version_key(self.namespace), 1, None)
+                key = _response_key(self.namespace, version, request)
+                cached = await cache.aget(key)
+                if cached is None:
+                    result = await func(controller, *args, **kwargs)
+                    cached = self.serialize(request, result)
+                    if cached is None:
+                        return result
+                    await cache.aset(key, cached, settings.RESPONSE_CACHE_TIMEOUT)
+                return _conditional_response(request, *cached)
+
+            return async_view
+
+        @wraps(func)
+        def view(controller, *args: Any, **kwargs: Any) -> Any:
+            request = controller.context.request
+            if self.skip and self.skip(request):
+                return func(controller, *args, **kwargs)
+
+            cache = get_cache()
+            version = cache.get_or_set(_version_key(self.namespace), 1, None)
+            key = _response_key(self.namespace, version, request)
+            cached = cache.get(key)
+            if cached is None:
+                result = func(controller, *args, **kwargs)
+                cached = self.serialize(request, result)
+                if cached is None:
+                    return result
+                cache.set(key, cached, settings.RESPONSE_CACHE_TIMEOUT)
+            return _conditional_response(request, *cached)
+
+        return view
+
+
+def cached_response(
+    namespace: str,
+    schema: Any,
+    skip: Optional[Callable[[HttpRequest], bool]] = None,
+    exclude_unset: bool = False,
+) -> ResponseCache:
+    return ResponseCache(namespace, schema, skip, exclude_unset)
@@ -0,0 +1,20 @@
+from django.http import HttpResponse
+from ninja_extra import api_controller, route
+from ninja_extra.permissions import IsAdminUser
+
+from auth.authentication import CachedJWTAuth
+from .metrics import registry
+
+
+@api_controller(
+    "metrics/",
+    auth=CachedJWTAuth(),
+    tags=["METRICS"],
+)
+class MetricsController:
+    @route.get(
+        "/",
+        permissions=[IsAdminUser],
+    )
+    def metrics(self):
+        return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
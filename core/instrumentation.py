@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from typing import Callable, Iterator, Tuple
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# ``execute_wrapper``s ativos no contexto atual. Um ContextVar, e não a
+# lista ``execute_wrappers`` de cada conexão, para que valham também dentro
+# do ``sync_to_async`` das views async: o contexto é copiado para a thread
+# que roda o ORM.
+_wrappers: ContextVar[Tuple[Callable, ...]] = ContextVar("query_wrappers", default=())
+
+
+def dispatch(execute, sql, params, many, context):
+    for wrapper in reversed(_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_dispatch(sender, connection, **kwargs):
+    """
+    Coloca ``dispatch`` em toda conexão aberta. Entra no início da lista
+    para não atrapalhar o ``pop()`` de um ``connection.execute_wrapper``
+    aberto antes da conexão.
+    """
+    if dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, dispatch)
+
+
+@contextmanager
+def observe_queries(wrapper: Callable) -> Iterator[None]:
+    """
+    Como ``connection.execute_wrapper``, mas para todas as conexões usadas
+    pelo contexto atual, em qualquer thread para onde ele seja copiado.
+    """
+    token = _wrappers.set((*_wrappers.get(), wrapper))
+    try:
+        yield
+    finally:
+        _wrappers.reset(token)
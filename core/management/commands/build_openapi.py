@@ -0,0 +1,23 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from core.api_registers import api
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera o schema OpenAPI da API uma vez e o grava como artefato versionado "
+        "(openapi-<versão>-<hash do código>.json, .json.gz e .json.br), servido pela API sem regenerar por worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help=f"Arquivo de saída (padrão: {api.openapi_artifact}).")
+
+    def handle(self, *args, **options):
+        artifact = Path(options["output"] or api.openapi_artifact)
+        document = api.render_openapi_document()
+        document.write(artifact)
+
+        sizes = ", ".join(f"{encoding} {len(content)}" for encoding, content in document.variants.items())
+        self.stdout.write(self.style.SUCCESS(f"{artifact} ({len(document.content)} bytes; {sizes}) ETag {document.etag}"))
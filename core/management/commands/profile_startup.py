@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.startup import profile_imports
+
+
+class Command(BaseCommand):
+    help = "Mede quanto custa iniciar um processo: os imports de django.setup() e do URLconf, num processo novo."
+
+    # A medição roda em outro processo; as checagens deste não acrescentam nada.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=15, help="Quantos módulos listar (padrão: 15).")
+
+    def handle(self, *args, **options):
+        self.report(profile_imports(), options["top"])
+
+    def report(self, profile, top):
+        self.stdout.write("Inicialização:")
+        for phase, seconds in profile.phases.items():
+            self.stdout.write(f"  {phase:<14} {1000 * seconds:>8.1f} ms")
+        self.stdout.write(f"  {'total':<14} {1000 * sum(profile.phases.values()):>8.1f} ms")
+
+        self.stdout.write("\nPacotes (tempo próprio):")
+        for package, self_us in list(profile.by_package().items())[:top]:
+            self.stdout.write(f"  {package:<40} {self_us / 1000:>8.1f} ms")
+
+        self.stdout.write("\nMódulos mais lentos (próprio / acumulado):")
+        for entry in profile.slowest(top):
+            self.stdout.write(f"  {entry.module:<40} {entry.self_us / 1000:>8.1f} / {entry.cumulative_us / 1000:.1f} ms")
@@ -0,0 +1,189 @@
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Dict, List, Sequence, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponse
+from ninja.renderers import JSONRenderer
+
+from .instrumentation import observe_queries
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    Histograma de baldes fixos: os contadores são alocados na criação e cada
+    observação é uma busca binária e um incremento.
+    """
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def samples(self) -> List[Tuple[str, float]]:
+        samples, cumulative = [], 0
+        for bound, count in zip((*self.bounds, "+Inf"), self.counts):
+            cumulative += count
+            samples.append((str(bound), cumulative))
+        return samples
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.serialization = Histogram(LATENCY_BUCKETS)
+
+
+METRICS = (
+    ("http_request_duration_seconds", "latency", "Tempo total da requisição por rota."),
+    ("db_duration_seconds", "db_time", "Tempo gasto no banco por requisição."),
+    ("db_queries_per_request", "queries", "Consultas SQL por requisição."),
+    ("serialization_duration_seconds", "serialization", "Tempo de renderização da resposta."),
+)
+
+
+class MetricsRegistry:
+    """
+    Métricas por rota (método e padrão da URL, ex.: ``GET api/v1/users/<int:id>/``),
+    então o número de séries é limitado pelo número de rotas.
+    """
+
+    def __init__(self):
+        self.routes: Dict[str, RouteMetrics] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, latency: float, timer: "RequestTimer") -> None:
+        with self._lock:
+            metrics = self.routes.get(route)
+            if metrics is None:
+                metrics = self.routes[route] = RouteMetrics()
+            metrics.latency.observe(latency)
+            metrics.db_time.observe(timer.db_time)
+            metrics.queries.observe(timer.queries)
+            metrics.serialization.observe(timer.serialization)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.routes.clear()
+
+    def render(self) -> str:
+        """
+        Exporta as métricas no formato de texto do Prometheus.
+        """
+        lines = []
+        with self._lock:
+            for name, attribute, description in METRICS:
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for route, metrics in sorted(self.routes.items()):
+                    histogram = getattr(metrics, attribute)
+                    label = route.replace("\\", "\\\\").replace('"', '\\"')
+                    for bound, count in histogram.samples():
+                        lines.append(f'{name}_bucket{{route="{label}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{route="{label}"}} {histogram.sum}')
+                    lines.append(f'{name}_count{{route="{label}"}} {sum(histogram.counts)}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class RequestTimer:
+    """
+    Acumula o tempo de banco (via ``connection.execute_wrapper``) e de
+    serialização de uma requisição.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialization = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += perf_counter() - start
+
+    def server_timing(self, total: float) -> str:
+        return (
+            f'db;dur={1000 * self.db_time:.2f};desc="{self.queries} queries", '
+            f"ser;dur={1000 * self.serialization:.2f}, "
+            f"total;dur={1000 * total:.2f}"
+        )
+
+
+class TimedRendererMixin:
+    """
+    Soma o tempo de renderização ao ``RequestTimer`` da requisição; vem
+    antes do renderer na herança.
+    """
+
+    def render(self, request: HttpRequest, data, *, response_status: int):
+        start = perf_counter()
+        try:
+            return super().render(request, data, response_status=response_status)
+        finally:
+            timer = getattr(request, "timer", None)
+            if timer is not None:
+                timer.serialization += perf_counter() - start
+
+
+class TimedJSONRenderer(TimedRendererMixin, JSONRenderer):
+    pass
+
+
+class MetricsMiddleware:
+    """
+    Mede cada requisição e registra as métricas na rota resolvida, além de
+    devolver os tempos no cabeçalho ``Server-Timing``.
+
+    As consultas são contadas por ``observe_queries``, que acompanha o
+    contexto da requisição também dentro do ``sync_to_async`` das views
+    async; por isso o middleware atende as duas pilhas sem adaptação.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        request.timer = timer = RequestTimer()
+        start = perf_counter()
+        with observe_queries(timer):
+            response = self.get_response(request)
+        return self.finish(request, response, perf_counter() - start)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        request.timer = timer = RequestTimer()
+        start = perf_counter()
+        with observe_queries(timer):
+            response = await self.get_response(request)
+        return self.finish(request, response, perf_counter() - start)
+
+    def finish(self, request: HttpRequest, response: HttpResponse, total: float) -> HttpResponse:
+        match = request.resolver_match
+        if match is not None:
+            registry.observe(f"{request.method} {match.route}", total, request.timer)
+        response["Server-Timing"] = request.timer.server_timing(total)
+        return response
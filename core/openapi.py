@@ -0,0 +1,192 @@
+import gzip
+import hashlib
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+import brotli
+import ninja
+import pydantic
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.urls import path
+from ninja.openapi.schema import OpenAPISchema
+from ninja.types import DictStrAny
+from ninja_extra import NinjaExtraAPI
+
+from .serialization import ORJSONRenderer
+
+# Content-Encoding e extensão do arquivo de cada variante, em ordem de preferência.
+ENCODINGS = {
+    "br": (".br", partial(brotli.compress, quality=11)),
+    "gzip": (".gz", partial(gzip.compress, compresslevel=9, mtime=0)),
+}
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """
+    Codificações de um ``Accept-Encoding`` com seus pesos ``q`` (1 quando
+    ausente; um peso inválido conta como 0).
+    """
+    accepted = {}
+    for item in header.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        accepted[coding.lower()] = weight
+    return accepted
+
+
+def negotiate_encoding(header: str) -> Optional[str]:
+    """
+    A variante de ``ENCODINGS`` com maior peso no ``Accept-Encoding``, na
+    ordem de preferência em caso de empate, ou None para o conteúdo sem
+    compressão. Codificações com ``q=0`` são recusadas; ``*`` vale para as
+    não citadas.
+    """
+    accepted = accepted_encodings(header)
+    weights = {encoding: accepted.get(encoding, accepted.get("*", 0.0)) for encoding in ENCODINGS}
+    encoding = max(ENCODINGS, key=weights.__getitem__)
+    return encoding if weights[encoding] > 0 else None
+
+
+@lru_cache(maxsize=None)
+def source_fingerprint() -> str:
+    """
+    Hash do código que define a API (os módulos dos apps do projeto, menos
+    testes e migrações) e das versões do ninja e do pydantic, que também
+    mudam o schema gerado.
+    """
+    digest = hashlib.sha256(f"{ninja.__version__}:{pydantic.VERSION}".encode())
+    base_dir = Path(settings.BASE_DIR)
+    for app in apps.get_app_configs():
+        app_path = Path(app.path)
+        if base_dir not in app_path.parents:
+            continue
+        for source in sorted(app_path.rglob("*.py")):
+            relative = source.relative_to(base_dir)
+            if "migrations" in relative.parts or source.name.startswith("test"):
+                continue
+            digest.update(str(relative).encode())
+            digest.update(source.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class OpenAPIDocument(NamedTuple):
+    """
+    O ``openapi.json`` já serializado, com as variantes comprimidas e a
+    ETag derivada do conteúdo. Cada variante tem sua própria ETag, com o
+    sufixo da codificação.
+    """
+
+    content: bytes
+    variants: Dict[str, bytes]
+    etag: str
+
+    @classmethod
+    def from_content(cls, content: bytes, variants: Optional[Dict[str, bytes]] = None) -> "OpenAPIDocument":
+        if variants is None:
+            variants = {encoding: compress(content) for encoding, (_, compress) in ENCODINGS.items()}
+        return cls(content, variants, f'"{hashlib.sha256(content).hexdigest()[:32]}"')
+
+    @classmethod
+    def load(cls, artifact: Path) -> "OpenAPIDocument":
+        content = artifact.read_bytes()
+        variants = {}
+        for encoding, (suffix, compress) in ENCODINGS.items():
+            compressed = artifact.with_name(artifact.name + suffix)
+            variants[encoding] = compressed.read_bytes() if compressed.exists() else compress(content)
+        return cls.from_content(content, variants)
+
+    def write(self, artifact: Path) -> None:
+        artifact.parent.mkdir(parents=True, exist_ok=True)
+        artifact.write_bytes(self.content)
+        for encoding, (suffix, _) in ENCODINGS.items():
+            artifact.with_name(artifact.name + suffix).write_bytes(self.variants[encoding])
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def response(self, request: HttpRequest) -> HttpResponse:
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding", ""))
+        etag = self.etag_for(encoding)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(self.variants[encoding] if encoding else self.content, content_type="application/json")
+            if encoding:
+                response["Content-Encoding"] = encoding
+        response["ETag"] = etag
+        response["Vary"] = "Accept-Encoding"
+        response["Cache-Control"] = "no-cache"
+        return response
+
+
+def openapi_json(request: HttpRequest, api: "CachedSchemaAPI", **kwargs) -> HttpResponse:
+    return api.get_openapi_document().response(request)
+
+
+class CachedSchemaAPI(NinjaExtraAPI):
+    """
+    ``NinjaExtraAPI`` que não gera o schema OpenAPI a cada pedido. Com
+    ``OPENAPI_SERVE_ARTIFACT`` (e sem DEBUG), o ``openapi.json`` vem do
+    artefato de ``manage.py build_openapi`` para o código atual, lido uma
+    vez por processo; senão, é gerado no primeiro pedido. Quem usa ``get_openapi_schema`` não deve
+    alterar o resultado.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._openapi_schemas: Dict[str, OpenAPISchema] = {}
+        self._openapi_document: Optional[OpenAPIDocument] = None
+
+    def get_openapi_schema(
+        self,
+        *,
+        path_prefix: Optional[str] = None,
+        path_params: Optional[DictStrAny] = None,
+    ) -> OpenAPISchema:
+        if path_prefix is None:
+            path_prefix = self.get_root_path(path_params or {})
+        if path_prefix not in self._openapi_schemas:
+            self._openapi_schemas[path_prefix] = super().get_openapi_schema(path_prefix=path_prefix)
+        return self._openapi_schemas[path_prefix]
+
+    @property
+    def openapi_artifact(self) -> Path:
+        return Path(settings.OPENAPI_ARTIFACT_DIR) / f"openapi-{self.version}-{source_fingerprint()}.json"
+
+    def render_openapi_document(self) -> OpenAPIDocument:
+        return OpenAPIDocument.from_content(ORJSONRenderer().render(None, self.get_openapi_schema(), response_status=200))
+
+    def get_openapi_document(self) -> OpenAPIDocument:
+        if self._openapi_document is None:
+            artifact = self.openapi_artifact
+            if settings.OPENAPI_SERVE_ARTIFACT and not settings.DEBUG and artifact.exists():
+                self._openapi_document = OpenAPIDocument.load(artifact)
+            else:
+                self._openapi_document = self.render_openapi_document()
+        return self._openapi_document
+
+    def _get_urls(self):
+        urls = super()._get_urls()
+        if self.openapi_url:
+            view = partial(openapi_json, api=self)
+            if self.docs_decorator:
+                view = self.docs_decorator(view)
+            urls = [
+                path(self.openapi_url.lstrip("/"), view, name="openapi-json")
+                if getattr(url, "name", None) == "openapi-json"
+                else url
+                for url in urls
+            ]
+        return urls
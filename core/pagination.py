@@ -0,0 +1,117 @@
+import base64
+import binascii
+from typing import Any, Callable, Generic, List, Optional, Type, TypeVar
+
+from django.db.models import QuerySet
+from ninja import Field, Schema
+from ninja.conf import settings
+from ninja.errors import HttpError
+from ninja.pagination import PaginationBase
+from ninja.signature import is_async
+from ninja_extra.controllers.route.context import RouteContext
+from ninja_extra.pagination import AsyncPaginatorOperation
+from ninja_extra.pagination import paginate as sync_paginate
+
+T = TypeVar("T")
+
+
+def encode_cursor(id: int) -> str:
+    return base64.urlsafe_b64encode(str(id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(cursor + padding).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HttpError(400, "Cursor inválido.")
+
+
+class CursorPage(Schema, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str]
+
+
+class CursorPagination(PaginationBase):
+    """
+    Paginação por chave (keyset) sobre a ordenação ``-id`` dos models.
+
+    O cursor guarda o último id entregue, então cada página é um
+    ``WHERE id < cursor ORDER BY id DESC LIMIT n`` e custa o mesmo que a
+    primeira, sem OFFSET nem COUNT.
+    """
+
+    class Input(Schema):
+        cursor: Optional[str] = None
+        page_size: int = Field(settings.PAGINATION_PER_PAGE, ge=1, le=settings.PAGINATION_MAX_LIMIT)
+
+    Output = CursorPage
+
+    def page_queryset(self, queryset: QuerySet, pagination: Input) -> QuerySet:
+        queryset = queryset.order_by("-id")
+        if pagination.cursor:
+            queryset = queryset.filter(id__lt=decode_cursor(pagination.cursor))
+        return queryset[: pagination.page_size + 1]
+
+    def page(self, items: List[Any], pagination: Input) -> Any:
+        next_cursor = None
+        if len(items) > pagination.page_size:
+            items = items[: pagination.page_size]
+            next_cursor = encode_cursor(items[-1].id)
+
+        return {"items": items, "next_cursor": next_cursor}
+
+    def paginate_queryset(self, queryset: QuerySet, pagination: Input, **params: Any) -> Any:
+        return self.page(list(self.page_queryset(queryset, pagination)), pagination)
+
+    async def apaginate_queryset(self, queryset: QuerySet, pagination: Input, **params: Any) -> Any:
+        return self.page([item async for item in self.page_queryset(queryset, pagination)], pagination)
+
+
+class NativeAsyncPaginatorOperation(AsyncPaginatorOperation):
+    """
+    Igual ao ``AsyncPaginatorOperation`` do ninja_extra, mas aguarda o
+    ``apaginate_queryset`` do paginador em vez de rodá-lo em uma thread.
+    """
+
+    def get_view_function(self) -> Callable:
+        async def as_view(request_or_controller: Any, *args: Any, **kw: Any) -> Any:
+            func_kwargs = dict(**kw)
+            pagination_params = func_kwargs.pop(self.paginator_kwargs_name)
+            if self.paginator.pass_parameter:
+                func_kwargs[self.paginator.pass_parameter] = pagination_params
+
+            items = await self.view_func(request_or_controller, *args, **func_kwargs)
+
+            if isinstance(items, tuple) and len(items) == 2 and isinstance(items[0], int):
+                return items
+
+            if hasattr(request_or_controller, "context") and isinstance(request_or_controller.context, RouteContext):
+                request = request_or_controller.context.request
+            else:
+                request = request_or_controller
+            params = dict(kw)
+            params["request"] = request
+            return await self.paginator.apaginate_queryset(items, **params)
+
+        return as_view
+
+
+def paginate(pagination_class: Type[PaginationBase] = CursorPagination, **paginator_params: Any) -> Callable:
+    """
+    ``paginate`` do ninja_extra que, para rotas ``async def``, pagina com o
+    ORM assíncrono quando o paginador implementa ``apaginate_queryset``.
+    """
+
+    def wrapper(func: Callable) -> Any:
+        if not is_async(func) or not hasattr(pagination_class, "apaginate_queryset"):
+            return sync_paginate(pagination_class, **paginator_params)(func)
+
+        operation = NativeAsyncPaginatorOperation(
+            paginator=pagination_class(**paginator_params),
+            view_func=func,
+            paginator_kwargs_name="pagination",
+        )
+        return operation.as_view
+
+    return wrapper
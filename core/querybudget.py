@@ -0,0 +1,152 @@
+import logging
+import re
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from functools import wraps
+from typing import Any, Callable, List
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest, HttpResponse
+
+from .instrumentation import observe_queries
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+def query_shape(sql: str) -> str:
+    """
+    Forma da consulta sem os valores: literais viram ``?`` e listas de
+    parâmetros de ``IN`` viram ``(...)``, então as consultas de um N+1
+    têm todas a mesma forma.
+    """
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    sql = _LITERAL.sub("?", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget:
+    """
+    Context manager (ou decorator, de funções sync ou async) que falha com
+    ``QueryBudgetExceeded`` quando o bloco executa mais de ``max_queries``
+    consultas SQL em qualquer banco.
+
+        with query_budget(3):
+            client.get("/api/v1/consultations/")
+    """
+
+    def __init__(self, max_queries: int):
+        self.max_queries = max_queries
+        self.queries: List[str] = []
+
+    def __call__(self, func: Callable) -> Callable:
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with query_budget(self.max_queries):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with query_budget(self.max_queries):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def record(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __enter__(self) -> "query_budget":
+        self.queries = []
+        self._stack = ExitStack()
+        self._stack.enter_context(observe_queries(self.record))
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self._stack.close()
+        if exc_type is None and len(self.queries) > self.max_queries:
+            listing = "\n".join(f"{index}. {sql}" for index, sql in enumerate(self.queries, start=1))
+            raise QueryBudgetExceeded(
+                f"{len(self.queries)} consultas executadas, o limite é {self.max_queries}:\n{listing}"
+            )
+
+
+class RepeatedQueryDetector:
+    """
+    ``execute_wrapper`` que conta as formas das consultas e, quando uma
+    delas se repete ``threshold`` vezes, registra um aviso com a pilha de
+    chamadas do código do projeto que a disparou.
+    """
+
+    def __init__(self, label: str, threshold: int):
+        self.label = label
+        self.threshold = threshold
+        self.shapes: Counter = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = query_shape(sql)
+        self.shapes[shape] += 1
+        if self.shapes[shape] == self.threshold:
+            logger.warning(
+                "Possível N+1 em %s: consulta repetida %d vezes\n%s\nChamada a partir de:\n%s",
+                self.label,
+                self.threshold,
+                shape,
+                self.project_stack(),
+            )
+        return execute(sql, params, many, context)
+
+    def project_stack(self) -> str:
+        base_dir = str(settings.BASE_DIR)
+        frames = [
+            frame
+            for frame in traceback.extract_stack()[:-2]
+            if frame.filename.startswith(base_dir) and "site-packages" not in frame.filename
+        ]
+        return "".join(traceback.format_list(frames))
+
+
+class RepeatedQueryMiddleware:
+    """
+    Detector de N+1 para o servidor de desenvolvimento, ligado por
+    ``QUERY_DETECTOR_ENABLED``. Como o ``MetricsMiddleware``, observa as
+    consultas com ``observe_queries`` e atende as pilhas sync e async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_DETECTOR_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def detector(self, request: HttpRequest) -> RepeatedQueryDetector:
+        return RepeatedQueryDetector(f"{request.method} {request.path}", settings.QUERY_DETECTOR_THRESHOLD)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with observe_queries(self.detector(request)):
+            return self.get_response(request)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        with observe_queries(self.detector(request)):
+            return await self.get_response(request)
@@ -0,0 +1,114 @@
+from typing import Any, Iterable, List, Optional, Set, Tuple, Type, Union, get_args
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Model, QuerySet, Value
+from django.db.models.functions import Concat, Trim
+from ninja import Schema
+
+
+def full_name(prefix: str) -> Trim:
+    """
+    Equivalente no banco ao ``User.get_full_name`` da relação ``prefix``.
+    """
+    return Trim(Concat(f"{prefix}__first_name", Value(" "), f"{prefix}__last_name"))
+
+
+def _nested_schema(annotation: Any) -> Optional[Type[Schema]]:
+    """
+    Retorna o Schema aninhado de uma anotação (``Schema`` ou ``Schema | None``).
+    """
+    candidates = (annotation, *get_args(annotation))
+    for candidate in candidates:
+        if isinstance(candidate, type) and issubclass(candidate, Schema):
+            return candidate
+    return None
+
+
+def _join(prefix: str, path: str) -> str:
+    return f"{prefix}__{path}" if prefix and path else prefix or path
+
+
+def schema_paths(
+    schema: Type[Schema],
+    fields: Optional[Iterable[str]] = None,
+    prefix: str = "",
+) -> List[str]:
+    """
+    Retorna os caminhos do ORM lidos por um Schema de saída.
+
+    Por padrão cada campo do Schema corresponde ao campo homônimo do model.
+    Campos calculados por ``resolve_*`` declaram em ``orm_paths`` os caminhos
+    que leem; para um Schema aninhado o valor é o prefixo da relação
+    (``""`` quando o resolver devolve o próprio objeto).
+    """
+    orm_paths = getattr(schema, "orm_paths", {})
+    selected = schema.model_fields if fields is None else fields
+    paths: List[str] = []
+
+    for name in selected:
+        field = schema.model_fields[name]
+        nested = _nested_schema(field.annotation)
+        if nested is not None:
+            nested_prefix = orm_paths.get(name, name)
+            paths.extend(schema_paths(nested, prefix=_join(prefix, nested_prefix)))
+            continue
+        for path in orm_paths.get(name, (name,)):
+            paths.append(_join(prefix, path))
+
+    return paths
+
+
+def _relations(model: Type[Model], paths: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+    """
+    Separa os caminhos em relações a seguir (``select_related``) e colunas
+    a carregar (``only``). Chaves estrangeiras percorridas também entram em
+    ``only``, pois o Django não permite adiar um campo usado no join.
+    """
+    related: Set[str] = set()
+    columns: Set[str] = set()
+
+    for path in paths:
+        current = model
+        traversed: List[str] = []
+        previous = None
+        for part in path.split("__"):
+            try:
+                field = current._meta.get_field(part)
+            except FieldDoesNotExist:
+                break
+            if previous is not None and previous.one_to_one and not previous.concrete and part == previous.field.name:
+                # Volta pela relação um-para-um reversa: o Django já preenche
+                # esse cache no select_related, então o join seria redundante.
+                traversed.pop()
+                current, previous = previous.model, None
+                continue
+            if field.is_relation and part == field.name:
+                previous = field
+                traversed.append(part)
+                related.add("__".join(traversed))
+                if field.concrete:
+                    columns.add("__".join(traversed))
+                current = field.related_model
+                continue
+            columns.add("__".join([*traversed, part]))
+            break
+
+    return related, columns
+
+
+def optimized_queryset(
+    queryset: Union[QuerySet, Type[Model]],
+    schema: Type[Schema],
+    fields: Optional[Iterable[str]] = None,
+) -> QuerySet:
+    """
+    Aplica ``select_related``/``only`` ao queryset de acordo com os caminhos
+    que o Schema de saída lê, evitando consultas N+1 nos resolvers.
+    """
+    if not isinstance(queryset, QuerySet):
+        queryset = queryset._default_manager.all()
+
+    related, columns = _relations(queryset.model, schema_paths(schema, fields))
+    if related:
+        queryset = queryset.select_related(*sorted(related))
+    return queryset.only(*sorted(columns))
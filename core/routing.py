@@ -0,0 +1,108 @@
+import random
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+PRIMARY = "default"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Estado da requisição atual. É um dicionário (e não valores soltos) para
+# que a marcação feita pelo router dentro de um ``sync_to_async`` seja
+# vista pelo middleware, que está em outro contexto.
+_request_state: ContextVar[Optional[Dict[str, Any]]] = ContextVar("replica_routing", default=None)
+
+
+class ReplicaRouter:
+    """
+    Envia as leituras de requisições seguras (GET/HEAD/OPTIONS) para uma das
+    réplicas de ``DATABASE_REPLICAS``, sorteada uma vez por requisição para
+    que todas as suas leituras vejam o mesmo atraso de replicação. Depois da primeira escrita a
+    requisição passa a ler do primário (read-your-writes), assim como as
+    requisições que chegam dentro de ``REPLICA_PIN_SECONDS`` após uma
+    escrita do mesmo cliente. Fora de requisições tudo vai para o primário.
+    """
+
+    def db_for_read(self, model, **hints: Any) -> str:
+        if database := self.outside_pool(hints):
+            return database
+
+        state = _request_state.get()
+        if state is None or state["pinned"] or state["replica"] is None:
+            return PRIMARY
+        return state["replica"]
+
+    def db_for_write(self, model, **hints: Any) -> str:
+        if database := self.outside_pool(hints):
+            return database
+
+        state = _request_state.get()
+        if state is not None:
+            state["pinned"] = state["wrote"] = True
+        return PRIMARY
+
+    def outside_pool(self, hints: Dict[str, Any]) -> Optional[str]:
+        """
+        Banco da instância relacionada quando ele não é o primário nem uma
+        réplica (ex.: um alias usado com ``using()`` em um comando).
+        """
+        instance = hints.get("instance")
+        database = instance._state.db if instance is not None else None
+        if database not in (None, PRIMARY, *settings.DATABASE_REPLICAS):
+            return database
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints: Any) -> Optional[bool]:
+        pool = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Abre o estado de roteamento de cada requisição e, se ela escreveu no
+    banco, grava o cookie que mantém o cliente no primário por
+    ``REPLICA_PIN_SECONDS``, tempo para as réplicas alcançarem a escrita.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        state, token = self.open(request)
+        try:
+            return self.close(state, self.get_response(request))
+        finally:
+            _request_state.reset(token)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        state, token = self.open(request)
+        try:
+            return self.close(state, await self.get_response(request))
+        finally:
+            _request_state.reset(token)
+
+    def open(self, request: HttpRequest):
+        pinned = request.method not in SAFE_METHODS or settings.REPLICA_PIN_COOKIE in request.COOKIES
+        replica = random.choice(settings.DATABASE_REPLICAS) if settings.DATABASE_REPLICAS else None
+        state = {"pinned": pinned, "wrote": False, "replica": replica}
+        return state, _request_state.set(state)
+
+    def close(self, state: Dict[str, Any], response: HttpResponse) -> HttpResponse:
+        if state["wrote"] and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, "1", max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite="Lax"
+            )
+        return response
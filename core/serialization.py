@@ -0,0 +1,153 @@
+from functools import lru_cache
+from typing import Any, ClassVar, Dict, Iterable, List, Optional, Tuple, Type
+
+import orjson
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import QuerySet
+from django.db.models.query import ValuesListIterable
+from django.http import HttpRequest
+from ninja import Field, Schema
+from ninja.renderers import JSONRenderer
+from ninja.responses import NinjaJSONEncoder
+from pydantic import field_validator, model_validator
+
+from .metrics import TimedRendererMixin
+from .querysets import full_name
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renderer JSON com orjson. Datas, horas, UUIDs e dicts com chaves não
+    textuais são serializados nativamente; o resto (Decimal, timedelta,
+    Promise...) cai no ``NinjaJSONEncoder``.
+    """
+
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+    encoder = NinjaJSONEncoder()
+
+    def render(self, request: HttpRequest, data: Any, *, response_status: int) -> bytes:
+        return orjson.dumps(data, default=self.encoder.default, option=self.option)
+
+
+class TimedORJSONRenderer(TimedRendererMixin, ORJSONRenderer):
+    pass
+
+
+class TrustedSchema(Schema):
+    """
+    Schema de saída que aceita, sem validar de novo nem rodar os
+    ``resolve_*``, instâncias montadas por ``trusted_queryset``. Qualquer
+    outro valor (objetos do ORM, dicts) é validado normalmente.
+    """
+
+    # Um validator "wrap" próprio, declarado depois do herdado do ``Schema``
+    # do ninja, envolve aquele: a instância pronta volta antes de virar
+    # ``DjangoGetter``, sem depender do nome do validator interno do ninja.
+    @model_validator(mode="wrap")
+    @classmethod
+    def skip_trusted_instances(cls, values, handler):
+        if values.__class__ is cls:
+            return values
+        return handler(values)
+
+
+class FieldsQuery(Schema):
+    """
+    Parâmetro ``?fields=id,date,status`` das rotas com colunas esparsas.
+    Cada subclasse aponta o Schema de saída em ``output_schema``; o ``id`` vem
+    sempre, pois a paginação por cursor depende dele.
+    """
+
+    output_schema: ClassVar[Type[Schema]]
+
+    fields: Optional[str] = Field(None, description="Campos separados por vírgula, ex.: id,date,status.")
+
+    @field_validator("fields")
+    @classmethod
+    def check_fields(cls, value):
+        if value is not None:
+            unknown = set(cls.split(value)) - set(cls.output_schema.model_fields)
+            if unknown:
+                raise ValueError(f"Campos desconhecidos: {', '.join(sorted(unknown))}.")
+        return value
+
+    @staticmethod
+    def split(value: str) -> List[str]:
+        return [name.strip() for name in value.split(",") if name.strip()]
+
+    def selected(self) -> Tuple[str, ...]:
+        """
+        Campos pedidos, na ordem do Schema; todos quando ``fields`` falta.
+        """
+        if self.fields is None:
+            return tuple(self.output_schema.model_fields)
+        requested = {"id", *self.split(self.fields)}
+        return tuple(name for name in self.output_schema.model_fields if name in requested)
+
+
+class TrustedIterable(ValuesListIterable):
+    schema: Type[TrustedSchema]
+    names: Tuple[str, ...]
+
+    def __iter__(self):
+        names = self.names
+        fields_set = set(names)
+        construct = self.schema.model_construct
+        for row in super().__iter__():
+            yield construct(fields_set, **dict(zip(names, row)))
+
+
+@lru_cache(maxsize=None)
+def _trusted_iterable(schema: Type[TrustedSchema], names: Tuple[str, ...]) -> Type[TrustedIterable]:
+    return type(f"{schema.__name__}Iterable", (TrustedIterable,), {"schema": schema, "names": names})
+
+
+def _column(name: str, paths: Tuple[str, ...]) -> Any:
+    """
+    Expressão que devolve no banco o valor do campo calculado a partir dos
+    caminhos de ``orm_paths``: o próprio caminho, quando é um só, ou
+    ``full_name`` para o par ``<relação>__first_name``/``<relação>__last_name``.
+    """
+    if len(paths) == 1:
+        return paths[0]
+    prefix, _, _ = paths[0].rpartition("__")
+    if tuple(paths) == (f"{prefix}__first_name", f"{prefix}__last_name"):
+        return full_name(prefix)
+    raise ImproperlyConfigured(f"O campo {name} não tem coluna equivalente no banco para {paths}.")
+
+
+@lru_cache(maxsize=None)
+def schema_columns(schema: Type[TrustedSchema]) -> Dict[str, Any]:
+    """
+    Colunas dos campos calculados do Schema, derivadas do seu ``orm_paths``.
+    """
+    return {name: _column(name, paths) for name, paths in getattr(schema, "orm_paths", {}).items()}
+
+
+def trusted_queryset(
+    queryset: QuerySet,
+    schema: Type[TrustedSchema],
+    fields: Optional[Iterable[str]] = None,
+    **columns: Any,
+) -> QuerySet:
+    """
+    Queryset que lê só as colunas de ``fields`` (todos os campos de
+    ``schema`` por padrão) com ``values_list`` e devolve cada linha já como
+    instância do Schema, com ``model_construct``: sem validação, sem
+    resolvers e sem instâncias de model. Continua preguiçoso, então pode ser
+    filtrado e paginado como qualquer queryset.
+
+    A coluna de cada campo é o campo homônimo do model, a derivada do
+    ``orm_paths`` do Schema (veja ``schema_columns``) ou o caminho ou
+    expressão passado em ``columns``, que precisa devolver o valor final do
+    campo. Campos fora de ``fields`` não
+    são lidos nem marcados como definidos, e somem da resposta das rotas
+    com ``exclude_unset=True``.
+
+        trusted_queryset(doctors, DoctorOut, ["id", "full_name"])
+    """
+    names = tuple(schema.model_fields if fields is None else fields)
+    columns = {**schema_columns(schema), **columns}
+    queryset = queryset.values_list(*(columns.get(name, name) for name in names))
+    queryset._iterable_class = _trusted_iterable(schema, names)
+    return queryset
@@ -40,14 +40,19 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'ninja_extra',
     'ninja_jwt',
+    'core',
     'users',
     'consultations',
+    'benchmarks',
 ]
 
 AUTH_USER_MODEL = 'users.User'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.metrics.MetricsMiddleware',
+    'core.querybudget.RepeatedQueryMiddleware',
+    'core.routing.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,6 +63,13 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'core.urls'
 
+# Detector de N+1 do servidor de desenvolvimento: avisa no log "core.querybudget"
+# quando a mesma forma de consulta se repete QUERY_DETECTOR_THRESHOLD vezes
+# em uma requisição.
+QUERY_DETECTOR_ENABLED = DEBUG
+
+QUERY_DETECTOR_THRESHOLD = 3
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -80,13 +92,69 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Perfil de produção do SQLite, ligado quando DEBUG está desligado: WAL,
+# conexões persistentes e transações IMMEDIATE, que pegam a trava de
+# escrita no BEGIN em vez de falhar com "database is locked" ao promovê-la.
+SQLITE_PRODUCTION = not DEBUG
+
+# Aplicados em cada nova conexão SQLite por core.sqlite.apply_sqlite_pragmas.
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    # Negativo: tamanho em KiB em vez de páginas.
+    'cache_size': -32 * 1024,
+}
+
+SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS if SQLITE_PRODUCTION else {}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600 if SQLITE_PRODUCTION else 0,
+        'CONN_HEALTH_CHECKS': SQLITE_PRODUCTION,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE' if SQLITE_PRODUCTION else None,
+        },
+        # Banco de testes em arquivo: o SQLite em memória compartilhada não
+        # aceita escritas concorrentes entre threads (testes de concorrência).
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    }
+}
+
+# Réplicas de leitura: aliases de DATABASES que recebem as leituras das
+# requisições GET/HEAD/OPTIONS (core.routing.ReplicaRouter). Cada réplica
+# deve declarar 'TEST': {'MIRROR': 'default'}.
+DATABASE_REPLICAS = []
+
+DATABASE_ROUTERS = ['core.routing.ReplicaRouter']
+
+# Depois de uma escrita o cliente lê do primário por esse tempo, cobrindo o
+# atraso de replicação (read-your-writes entre requisições).
+REPLICA_PIN_COOKIE = 'use_primary'
+
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# O locmem é por processo; com vários workers use um backend compartilhado
+# (Redis/Memcached) para que a invalidação por versão valha para todos.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+RESPONSE_CACHE_ALIAS = 'default'
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -107,12 +175,72 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# O primeiro hasher gera as senhas novas (create_user/set_password); os demais
+# só verificam hashes antigos, que o Django refaz no próximo login bem-sucedido.
+PASSWORD_HASHERS = [
+    'users.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Processos usados para o hash das senhas na importação de médicos;
+# None usa um por núcleo.
+IMPORT_WORKERS = None
+
+# Scrypt: N=2**14, r=8, p=5 são os valores padrão do Django e o mínimo
+# recomendado pela OWASP. Cada hash usa 16 MiB (as p passadas são
+# sequenciais e reaproveitam a mesma memória) e leva ~0,26 s de CPU, perto
+# dos ~0,35 s do PBKDF2 anterior; p=1 seria ~60 ms, cinco vezes mais barato
+# também para quem ataca. A alternativa equivalente da OWASP, N=2**17 com
+# p=1, leva ~0,7 s e 128 MiB por login.
+PASSWORD_HASHING = {
+    'SCRYPT': {
+        'work_factor': 2**14,
+        'block_size': 8,
+        'parallelism': 5,
+    },
+}
+
+
 NINJA_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=18),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "TOKEN_OBTAIN_PAIR_INPUT_SCHEMA": "ninja_jwt.schema.TokenObtainPairInputSchema",
 }
 
+# Cache de tokens JWT já verificados (auth.authentication.CachedJWTAuth).
+TOKEN_CACHE_MAX_SIZE = 10_000
+
+TOKEN_CACHE_TTL = timedelta(minutes=5)
+
+# A listagem de consultas lê da projeção desnormalizada ConsultationListing
+# (consultations.listings); desligado, volta a juntar pacientes e médicos.
+CONSULTATION_READ_MODEL = True
+
+# Backend da busca de médicos e pacientes (users.search). Em bancos sem
+# FTS5, use 'users.search.DatabaseSearchBackend'.
+SEARCH_BACKEND = 'users.search.FTS5SearchBackend'
+
+# Consultas finalizadas ou canceladas há mais de ARCHIVE_AFTER_DAYS dias vão
+# para as tabelas de arquivo (consultations.archive), em lotes de
+# ARCHIVE_BATCH_SIZE por transação.
+ARCHIVE_AFTER_DAYS = 365
+
+ARCHIVE_BATCH_SIZE = 1000
+
+# Onde ``manage.py build_openapi`` grava o openapi.json (e as versões gzip e
+# brotli). O nome do arquivo leva a impressão digital do código da API, então
+# um artefato de outra versão do código nunca é servido.
+OPENAPI_ARTIFACT_DIR = BASE_DIR / 'build'
+
+# Servir o artefato (ligue no build de produção). Desligado, ou com DEBUG, o
+# schema é gerado no primeiro pedido de cada processo.
+OPENAPI_SERVE_ARTIFACT = False
+
+NINJA_PAGINATION_PER_PAGE = 50
+
+NINJA_PAGINATION_MAX_LIMIT = 200
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -0,0 +1,92 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+from django.conf import settings
+from django.urls import get_resolver
+
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+# Executado num interpretador novo com ``-X importtime``: os tempos de
+# import vão para o stderr e as fases, em JSON, para o stdout.
+_PROFILE_SCRIPT = """
+import json
+import time
+
+import django
+
+start = time.perf_counter()
+django.setup()
+setup = time.perf_counter() - start
+
+from core.startup import warm_up
+
+start = time.perf_counter()
+warm_up()
+print(json.dumps({"django.setup": setup, "urlconf": time.perf_counter() - start}))
+"""
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+class ImportProfile(NamedTuple):
+    phases: Dict[str, float]
+    imports: List[ImportTime]
+
+    def by_package(self) -> Dict[str, int]:
+        """
+        Tempo próprio (µs) somado por pacote de primeiro nível.
+        """
+        totals: Dict[str, int] = defaultdict(int)
+        for entry in self.imports:
+            totals[entry.module.split(".")[0]] += entry.self_us
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+    def slowest(self, top: int) -> List[ImportTime]:
+        return sorted(self.imports, key=lambda entry: entry.self_us, reverse=True)[:top]
+
+
+def warm_up() -> None:
+    """
+    Importa o URLconf e, com ele, todos os controllers e os models do
+    pydantic das rotas. Chamado ao carregar a aplicação WSGI/ASGI: com o
+    ``--preload`` do gunicorn esse custo fica no processo mestre e os
+    workers já nascem prontos, em vez de pagá-lo na primeira requisição.
+    """
+    get_resolver().url_patterns
+
+
+def parse_importtime(output: str) -> List[ImportTime]:
+    imports = []
+    for line in output.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append(ImportTime(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return imports
+
+
+def profile_imports() -> ImportProfile:
+    """
+    Mede um processo frio: ``django.setup()`` e o carregamento do URLconf,
+    com os tempos de cada import.
+    """
+    environment = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "core.settings")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROFILE_SCRIPT],
+        cwd=settings.BASE_DIR,
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return ImportProfile(json.loads(result.stdout.splitlines()[-1]), parse_importtime(result.stderr))
@@ -0,0 +1,69 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from ninja_jwt.tokens import AccessToken
+
+from consultations.listings import refresh_listings
+from consultations.models import Consultation
+from consultations.stats import count_created
+from users.models import Doctor, Patient, Specialty, User
+
+
+class ClinicFixtures:
+    @classmethod
+    def create_patient(cls, username):
+        user = User.objects.create_user(
+            username=username, first_name=username, last_name="Silva", role="P"
+        )
+        return Patient.objects.create(
+            birth_date=datetime.date(1990, 1, 1), gender="F", phone="86999999999", address="Rua A", user=user
+        )
+
+    @classmethod
+    def create_doctor(cls, username, specialty=None):
+        user = User.objects.create_user(
+            username=username, first_name=username, last_name="Souza", role="D"
+        )
+        return Doctor.objects.create(code="CRM1", phone="86988888888", specialty=specialty or cls.specialty, user=user)
+
+    def auth(self, user):
+        return {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(user)}"}
+
+
+class ConsultationTestCase(ClinicFixtures, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.specialty = Specialty.objects.create(description="Cardiologia")
+        cls.patient = cls.create_patient("paciente")
+        cls.doctor = cls.create_doctor("medico")
+
+    def create_consultations(self, amount, **kwargs):
+        kwargs.setdefault("patient", self.patient)
+        kwargs.setdefault("doctor", self.doctor)
+        offset = Consultation.objects.count()
+        consultations = Consultation.objects.bulk_create(
+            Consultation(date=datetime.date(2025, 1, 1) + datetime.timedelta(days=offset + index), time=datetime.time(8, 0), **kwargs)
+            for index in range(amount)
+        )
+        refresh_listings(Consultation.objects.filter(id__in=[consultation.id for consultation in consultations]))
+        count_created(consultations)
+
+    def count_queries(self, path, user, **query):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path, query, **self.auth(user))
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def query_plans(self, path, user, **query):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path, query, **self.auth(user))
+        self.assertEqual(response.status_code, 200)
+
+        plans = []
+        with connection.cursor() as cursor:
+            for captured in context.captured_queries:
+                cursor.execute(f"EXPLAIN QUERY PLAN {captured['sql']}")
+                plans.append(" ".join(row[-1] for row in cursor.fetchall()))
+        return "\n".join(plans)
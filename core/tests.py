@@ -0,0 +1,577 @@
+import datetime
+import gzip
+import io
+import json
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from typing import ClassVar
+from unittest import mock
+
+import brotli
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command, get_commands, load_command_class
+from django.conf import settings
+from django.db import connection, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from ninja.renderers import JSONRenderer
+from ninja_jwt.tokens import AccessToken
+
+from benchmarks.driver import SCENARIOS, Driver
+from benchmarks.seed import seed
+from core.api_registers import api
+from core.cache import get_cache
+from core.metrics import Histogram, registry
+from core.openapi import CachedSchemaAPI, OpenAPIDocument, source_fingerprint
+from core.querysets import optimized_queryset
+from core.querybudget import QueryBudgetExceeded, query_budget, query_shape
+from core.serialization import ORJSONRenderer, TrustedSchema, schema_columns, trusted_queryset
+from core.startup import ImportTime, parse_importtime
+from core.routing import PRIMARY, ReplicaRouter, ReplicaRoutingMiddleware
+from auth.authentication import token_cache
+from users.models import Doctor, Specialty, User
+from users.schemas import DoctorOut
+from consultations.listings import LISTING_COLUMNS
+from consultations.schemas import ConsultationShow
+from consultations.models import Attendance, Consultation, ConsultationListing
+from .testing import ClinicFixtures, ConsultationTestCase
+
+
+class MetricsTest(ConsultationTestCase):
+    def setUp(self):
+        registry.clear()
+
+    def test_server_timing_reports_queries_and_serialization(self):
+        self.create_consultations(3)
+
+        queries, response = self.count_queries("/api/v1/consultations/", self.patient.user)
+
+        timing = response["Server-Timing"]
+        self.assertIn(f'desc="{queries} queries"', timing)
+        self.assertRegex(timing, r"ser;dur=\d+\.\d+")
+        self.assertRegex(timing, r"total;dur=\d+\.\d+")
+
+    def test_metrics_endpoint_exports_route_histograms(self):
+        for _ in range(2):
+            self.client.get("/api/v1/consultations/0/", **self.auth(self.patient.user))
+        staff = User.objects.create_user(username="admin", role="A", is_staff=True)
+
+        self.assertEqual(self.client.get("/api/v1/metrics/", **self.auth(self.patient.user)).status_code, 403)
+        response = self.client.get("/api/v1/metrics/", **self.auth(staff))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        content = response.content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", content)
+        self.assertIn('http_request_duration_seconds_count{route="GET api/v1/consultations/<int:id>/"} 2', content)
+        self.assertIn('db_queries_per_request_bucket{route="GET api/v1/consultations/<int:id>/",le="+Inf"} 2', content)
+
+    # Com DEBUG o handler registra cada middleware adaptado para sync.
+    @override_settings(DEBUG=True, QUERY_DETECTOR_ENABLED=True)
+    async def test_async_stack_is_measured_without_sync_adaptation(self):
+        token = await sync_to_async(AccessToken.for_user)(self.patient.user)
+
+        with mock.patch("django.core.handlers.base.logger.debug") as debug:
+            response = await AsyncClient().get("/api/v1/consultations/", headers={"Authorization": f"Bearer {token}"})
+
+        adapted = [call.args[1] for call in debug.call_args_list if "adapted" in call.args[0]]
+        self.assertEqual(adapted, [])
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9]\d* queries"')
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.samples(), [("0.1", 2), ("1.0", 3), ("+Inf", 4)])
+        self.assertEqual(histogram.counts, [2, 1, 1])
+
+
+class QueryBudgetTest(ConsultationTestCase):
+    def test_budget_fails_with_the_executed_queries(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, "2 consultas executadas, o limite é 1"):
+            with query_budget(1):
+                list(Consultation.objects.all())
+                list(Attendance.objects.all())
+
+    def test_budget_as_decorator(self):
+        @query_budget(1)
+        def within_budget():
+            return Consultation.objects.count()
+
+        self.assertEqual(within_budget(), 0)
+
+    async def test_budget_covers_async_routes(self):
+        await sync_to_async(self.create_consultations)(3)
+        token = await sync_to_async(AccessToken.for_user)(self.patient.user)
+
+        with query_budget(RouteQueryBudgetTest.BUDGETS["GET /api/v1/consultations/"]) as budget:
+            response = await AsyncClient().get("/api/v1/consultations/", headers={"Authorization": f"Bearer {token}"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any("consultation" in sql for sql in budget.queries))
+
+    async def test_budget_counts_queries_in_worker_threads(self):
+        def count():
+            # Fora da thread principal o ORM abre outra conexão.
+            try:
+                return Consultation.objects.count()
+            finally:
+                connection.close()
+
+        with self.assertRaisesMessage(QueryBudgetExceeded, "1 consultas executadas, o limite é 0"):
+            with query_budget(0):
+                await sync_to_async(count, thread_sensitive=False)()
+
+    def test_query_shape_ignores_values(self):
+        self.assertEqual(
+            query_shape("SELECT * FROM users WHERE id = 10 AND name = 'Ana' AND role IN (%s, %s)"),
+            query_shape("SELECT *  FROM users WHERE id = 7 AND name = 'Bia' AND role IN (%s, %s, %s)"),
+        )
+
+    @override_settings(QUERY_DETECTOR_ENABLED=True, QUERY_DETECTOR_THRESHOLD=3)
+    def test_detector_logs_repeated_queries_with_stack(self):
+        from core.querybudget import RepeatedQueryMiddleware
+
+        self.create_consultations(3)
+
+        def view(request):
+            for consultation in Consultation.objects.all():
+                consultation.patient.user.get_full_name()
+            return HttpResponse()
+
+        with self.assertLogs("core.querybudget", "WARNING") as logs:
+            RepeatedQueryMiddleware(view)(RequestFactory().get("/api/v1/consultations/"))
+
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn("Possível N+1 em GET /api/v1/consultations/", logs.output[0])
+        self.assertIn("core/tests.py", logs.output[0])
+
+    @override_settings(QUERY_DETECTOR_ENABLED=True, QUERY_DETECTOR_THRESHOLD=3)
+    async def test_detector_follows_async_views_into_sync_to_async(self):
+        from core.querybudget import RepeatedQueryMiddleware
+
+        await sync_to_async(self.create_consultations)(3)
+
+        def names():
+            return [consultation.patient.user.get_full_name() for consultation in Consultation.objects.all()]
+
+        async def view(request):
+            await sync_to_async(names)()
+            return HttpResponse()
+
+        middleware = RepeatedQueryMiddleware(view)
+        with self.assertLogs("core.querybudget", "WARNING") as logs:
+            await middleware(RequestFactory().get("/api/v1/consultations/"))
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertEqual(len(logs.output), 2)
+
+
+class RouteQueryBudgetTest(ConsultationTestCase):
+    """
+    Orçamento de consultas SQL de cada rota da API, medido com os cenários
+    do benchmark sobre vários registros, para que um N+1 estoure o limite.
+    Rotas novas precisam entrar em ``BUDGETS`` e em ``benchmarks.driver``.
+    """
+
+    BUDGETS = {
+        "POST /api/v1/auth/token/": 1,
+        "GET /api/v1/users/": 2,
+        "GET /api/v1/users/doctors/": 2,
+        "GET /api/v1/users/specialties/": 2,
+        "GET /api/v1/users/doctors/search/": 2,
+        "GET /api/v1/users/patients/search/": 3,
+        "GET /api/v1/users/{id}/": 2,
+        "GET /api/v1/users/doctor/{id}/": 2,
+        "GET /api/v1/users/patient/{id}/": 2,
+        "POST /api/v1/users/patient/register/": 6,
+        "PUT /api/v1/users/patient/edit/": 12,
+        "PUT /api/v1/users/doctor/edit/": 14,
+        "DELETE /api/v1/users/delete-account/": 15,
+        "GET /api/v1/consultations/": 2,
+        "POST /api/v1/consultations/": 7,
+        "GET /api/v1/consultations/export/": 2,
+        "GET /api/v1/consultations/availability/": 4,
+        "GET /api/v1/consultations/stats/": 2,
+        "GET /api/v1/consultations/{id}/": 2,
+        "PUT /api/v1/consultations/{id}/cancel/": 6,
+        "GET /api/v1/attendances/": 2,
+        "POST /api/v1/attendances/": 7,
+        "GET /api/v1/attendances/export/": 2,
+        "GET /api/v1/attendances/{id}/": 2,
+        "POST /api/v1/attendances/bulk/": 7,
+        "GET /api/v1/metrics/": 1,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed(specialties=2, doctors=3, patients=5, consultations=30)
+
+    def setUp(self):
+        token_cache.clear()
+        get_cache().clear()
+
+    def test_every_route_has_a_budget_and_a_scenario(self):
+        routes = {
+            f"{method.upper()} {path}"
+            for path, methods in api.get_openapi_schema()["paths"].items()
+            for method in methods
+        }
+
+        self.assertEqual(routes, set(self.BUDGETS))
+        self.assertEqual(routes, set(SCENARIOS))
+
+    def test_routes_stay_within_budget(self):
+        driver = Driver(self.data, self.client)
+        for route, budget in self.BUDGETS.items():
+            call = SCENARIOS[route](self.data)
+            with self.subTest(route=route), query_budget(budget):
+                driver.request(call)
+
+    def test_driver_counts_queries_of_async_routes(self):
+        driver = Driver(self.data, self.client)
+        call = SCENARIOS["GET /api/v1/consultations/"](self.data)
+        driver.request(call)
+        with query_budget(10) as budget:
+            driver.request(call)
+
+        result = driver.measure("GET /api/v1/consultations/", iterations=2)
+
+        self.assertGreater(result["queries"], 0)
+        self.assertEqual(result["queries"], len(budget.queries))
+
+
+class SerializationTest(ConsultationTestCase):
+    def setUp(self):
+        get_cache().clear()
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        data = {"date": datetime.date(2030, 1, 7), "time": datetime.time(8, 30), "price": Decimal("10.50"), 1: "um"}
+
+        content = ORJSONRenderer().render(None, data, response_status=200)
+
+        self.assertIsInstance(content, bytes)
+        self.assertEqual(json.loads(content), json.loads(JSONRenderer().render(None, data, response_status=200)))
+
+    def test_trusted_rows_skip_validation_and_resolvers(self):
+        self.create_consultations(3)
+        consultations = trusted_queryset(ConsultationListing.objects.all(), ConsultationShow, **LISTING_COLUMNS)
+
+        rows = list(consultations.filter(status="S").order_by("-id")[:2])
+
+        self.assertEqual([type(row) for row in rows], [ConsultationShow] * 2)
+        self.assertIs(ConsultationShow.model_validate(rows[0]), rows[0])
+        self.assertEqual(rows[0].patient_full_name, "paciente Silva")
+
+    def test_trusted_doctor_list_matches_validated_objects(self):
+        self.create_doctor("outro", Specialty.objects.create(description="Pediatria"))
+
+        response = self.client.get("/api/v1/users/doctors/", **self.auth(self.patient.user))
+        validated = [DoctorOut.model_validate(doctor).model_dump() for doctor in optimized_queryset(Doctor, DoctorOut)]
+
+        self.assertTrue(response["Content-Type"].startswith("application/json"))
+        self.assertEqual(len(validated), 2)
+        self.assertEqual(response.json()["items"], validated)
+
+    def test_trusted_columns_come_from_orm_paths(self):
+        class Unsupported(TrustedSchema):
+            id: int
+            label: str
+
+            orm_paths: ClassVar[dict] = {"label": ("code", "phone")}
+
+        self.create_consultations(1)
+
+        consultation = trusted_queryset(Consultation.objects.all(), ConsultationShow, ["id", "doctor_full_name"]).get()
+
+        self.assertEqual(consultation.doctor_full_name, "medico Souza")
+        self.assertEqual(schema_columns(DoctorOut)["specialty"], "specialty__description")
+        with self.assertRaises(ImproperlyConfigured):
+            schema_columns(Unsupported)
+
+
+class StartupTest(ConsultationTestCase):
+    def test_openapi_schema_is_generated_once(self):
+        schema = api.get_openapi_schema()
+
+        with mock.patch("ninja.main.get_schema") as get_schema:
+            self.assertIs(api.get_openapi_schema(), schema)
+
+        get_schema.assert_not_called()
+
+    def test_parse_importtime(self):
+        imports = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     ninja.params\n"
+            "import time:      8400 |      8520 |   users.controllers\n"
+            "import time:       300 |      8820 | core.urls\n"
+        )
+
+        self.assertEqual(imports[1], ImportTime("users.controllers", 8400, 8520, 1))
+        self.assertEqual([entry.depth for entry in imports], [2, 1, 0])
+
+    def test_profile_startup_reports_a_cold_start_profile(self):
+        output = io.StringIO()
+
+        call_command("profile_startup", top=3, stdout=output)
+
+        report = output.getvalue()
+        self.assertIn("django.setup", report)
+        self.assertIn("urlconf", report)
+        self.assertEqual(report.count(" ms\n"), 3 + 3 + 3)
+
+    def test_maintenance_commands_skip_url_checks(self):
+        for app, name in (
+            ("consultations", "archive_consultations"),
+            ("consultations", "reconcile_consultation_stats"),
+            ("consultations", "rebuild_consultation_listings"),
+            ("users", "rebuild_search_index"),
+            ("users", "import_doctors"),
+            ("core", "profile_startup"),
+        ):
+            self.assertEqual(load_command_class(app, name).requires_system_checks, [])
+
+    def test_builtin_check_command_is_not_replaced(self):
+        self.assertEqual(get_commands()["check"], "django.core")
+
+
+class OpenAPIArtifactTest(ConsultationTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = self.settings(OPENAPI_ARTIFACT_DIR=Path(directory.name), OPENAPI_SERVE_ARTIFACT=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # O documento fica em memória no objeto ``api``, global.
+        document = mock.patch.object(api, "_openapi_document", None)
+        document.start()
+        self.addCleanup(document.stop)
+
+    def test_build_writes_a_versioned_artifact_with_compressed_variants(self):
+        call_command("build_openapi", stdout=io.StringIO())
+
+        artifact = api.openapi_artifact
+        content = artifact.read_bytes()
+        self.assertEqual(artifact.name, f"openapi-{api.version}-{source_fingerprint()}.json")
+        self.assertIn("/api/v1/consultations/", json.loads(content)["paths"])
+        self.assertEqual(gzip.decompress(artifact.with_name(artifact.name + ".gz").read_bytes()), content)
+        self.assertEqual(brotli.decompress(artifact.with_name(artifact.name + ".br").read_bytes()), content)
+
+    def test_artifact_is_served_from_memory_by_encoding(self):
+        call_command("build_openapi", stdout=io.StringIO())
+        content = api.openapi_artifact.read_bytes()
+
+        with mock.patch.object(CachedSchemaAPI, "render_openapi_document") as render:
+            br = self.client.get("/api/v1/openapi.json", HTTP_ACCEPT_ENCODING="gzip, deflate, br")
+            gzipped = self.client.get("/api/v1/openapi.json", HTTP_ACCEPT_ENCODING="gzip")
+            plain = self.client.get("/api/v1/openapi.json")
+            cached = self.client.get("/api/v1/openapi.json", HTTP_IF_NONE_MATCH=plain["ETag"])
+            cached_br = self.client.get("/api/v1/openapi.json", HTTP_ACCEPT_ENCODING="br", HTTP_IF_NONE_MATCH=br["ETag"])
+
+        render.assert_not_called()
+        self.assertEqual(br["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(br.content), content)
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(gzipped.content), content)
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertEqual(plain.content, content)
+        self.assertEqual(plain["Vary"], "Accept-Encoding")
+        self.assertEqual(len({br["ETag"], gzipped["ETag"], plain["ETag"]}), 3)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached_br.status_code, 304)
+        self.assertEqual(cached_br["ETag"], br["ETag"])
+
+    def test_encoding_follows_the_accept_encoding_weights(self):
+        cases = {
+            "br;q=0, gzip": "gzip",
+            "gzip;q=0.5, br;q=0.8": "br",
+            "gzip;q=1, br;q=0.5": "gzip",
+            "*": "br",
+            "*, br;q=0": "gzip",
+            "x-gzip, brotli": None,
+            "gzip;q=0, br;q=0": None,
+        }
+        for header, encoding in cases.items():
+            with self.subTest(header=header):
+                response = self.client.get("/api/v1/openapi.json", HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(response.get("Content-Encoding"), encoding)
+
+    def test_if_none_match_compares_whole_tags(self):
+        etag = self.client.get("/api/v1/openapi.json")["ETag"]
+        cases = {
+            f'"outra", {etag}': 304,
+            f"W/{etag}": 304,
+            "*": 304,
+            etag[:-2] + '"': 200,
+            f'"x{etag[1:]}': 200,
+        }
+        for header, status in cases.items():
+            with self.subTest(header=header):
+                response = self.client.get("/api/v1/openapi.json", HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, status)
+
+    def test_artifact_built_from_other_code_is_not_served(self):
+        stale = OpenAPIDocument.from_content(b'{"openapi": "3.1.0", "paths": {}}')
+        stale.write(Path(settings.OPENAPI_ARTIFACT_DIR) / f"openapi-{api.version}.json")
+        with mock.patch("core.openapi.source_fingerprint", return_value="codigo-antigo"):
+            stale.write(api.openapi_artifact)
+
+        response = self.client.get("/api/v1/openapi.json")
+
+        self.assertNotEqual(response["ETag"], stale.etag)
+        self.assertIn("/api/v1/consultations/", response.json()["paths"])
+
+    def test_artifact_is_ignored_when_disabled_or_in_debug(self):
+        stale = OpenAPIDocument.from_content(b'{"openapi": "3.1.0", "paths": {}}')
+        stale.write(api.openapi_artifact)
+
+        for overrides in ({"OPENAPI_SERVE_ARTIFACT": False}, {"DEBUG": True}):
+            with self.settings(**overrides), mock.patch.object(api, "_openapi_document", None):
+                response = self.client.get("/api/v1/openapi.json")
+            self.assertNotEqual(response["ETag"], stale.etag)
+
+    def test_without_artifact_the_document_is_rendered_once(self):
+        first = self.client.get("/api/v1/openapi.json")
+        with mock.patch.object(CachedSchemaAPI, "render_openapi_document") as render:
+            second = self.client.get("/api/v1/openapi.json")
+
+        render.assert_not_called()
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first.json()["info"]["title"], "API")
+
+
+class SqliteProfileTest(TestCase):
+    def open_connection(self, directory, **options):
+        wrapper = DatabaseWrapper(
+            {**connections.settings["default"], "NAME": Path(directory) / "perfil.sqlite3", "OPTIONS": options},
+            alias="perfil",
+        )
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_production_pragmas_are_applied_on_connect(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.settings(SQLITE_PRAGMAS=settings.SQLITE_PRODUCTION_PRAGMAS):
+                wrapper = self.open_connection(directory, transaction_mode="IMMEDIATE")
+
+            self.assertEqual(self.pragma(wrapper, "journal_mode"), "wal")
+            # 1 = NORMAL
+            self.assertEqual(self.pragma(wrapper, "synchronous"), 1)
+            self.assertEqual(self.pragma(wrapper, "busy_timeout"), 5000)
+            self.assertEqual(self.pragma(wrapper, "cache_size"), -32 * 1024)
+            self.assertEqual(wrapper.transaction_mode, "IMMEDIATE")
+
+    def test_default_profile_leaves_connection_untouched(self):
+        with tempfile.TemporaryDirectory() as directory, self.settings(SQLITE_PRAGMAS={}):
+            wrapper = self.open_connection(directory)
+
+            self.assertEqual(self.pragma(wrapper, "journal_mode"), "delete")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTest(ClinicFixtures, TransactionTestCase):
+    """
+    Usa um segundo arquivo SQLite como réplica. Os dados são copiados à mão,
+    com um valor diferente, para saber de qual banco cada leitura veio.
+    """
+
+    # "__all__" porque o alias "replica" só passa a existir no setUpClass.
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        connections.settings["replica"] = {
+            **connections.settings["default"],
+            "NAME": Path(cls.replica_dir.name) / "replica.sqlite3",
+        }
+        call_command("migrate", database="replica", verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        cls.replica_dir.cleanup()
+
+    def setUp(self):
+        self.specialty = Specialty.objects.create(description="Cardiologia")
+        self.patient = self.create_patient("paciente")
+        self.doctor = self.create_doctor("medico", self.specialty)
+        self.consultation = Consultation.objects.create(
+            date=datetime.date(2030, 1, 7), time=datetime.time(8, 0), observations="primário",
+            patient=self.patient, doctor=self.doctor,
+        )
+        for obj in (self.specialty, self.patient.user, self.patient, self.doctor.user, self.doctor):
+            obj.save(using="replica", force_insert=True)
+        Consultation.objects.using("replica").create(
+            id=self.consultation.id, date=self.consultation.date, time=self.consultation.time,
+            observations="réplica", patient_id=self.patient.id, doctor_id=self.doctor.id,
+        )
+
+    def read_observations(self):
+        response = self.client.get("/api/v1/consultations/", **self.auth(self.patient.user))
+        self.assertEqual(response.status_code, 200)
+        return response.json()["items"][0]["observations"]
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.read_observations(), "réplica")
+
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.read_observations(), "primário")
+
+    def test_client_sticks_to_primary_after_writing(self):
+        response = self.client.put(
+            f"/api/v1/consultations/{self.consultation.id}/cancel/", **self.auth(self.patient.user)
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("use_primary", response.cookies)
+        self.assertEqual(self.read_observations(), "primário")
+
+        self.client.cookies.clear()
+        self.assertEqual(self.read_observations(), "réplica")
+
+    def test_request_reads_primary_after_its_first_write(self):
+        router = ReplicaRouter()
+        reads = []
+
+        def view(request):
+            reads.append(router.db_for_read(Consultation))
+            Consultation.objects.filter(id=self.consultation.id).update(observations="atualizada")
+            reads.append(router.db_for_read(Consultation))
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(view)(RequestFactory().get("/"))
+
+        self.assertEqual(reads, ["replica", PRIMARY])
+        self.assertEqual(router.db_for_read(Consultation), PRIMARY)
+
+    @override_settings(DATABASE_REPLICAS=["replica", "outra_replica"])
+    def test_request_reads_from_a_single_replica(self):
+        router = ReplicaRouter()
+        reads = []
+
+        def view(request):
+            reads.extend(router.db_for_read(Consultation) for _ in range(20))
+            return HttpResponse()
+
+        with mock.patch("core.routing.random.choice", side_effect=["outra_replica", "replica"]) as choice:
+            ReplicaRoutingMiddleware(view)(RequestFactory().get("/"))
+            ReplicaRoutingMiddleware(view)(RequestFactory().get("/"))
+
+        self.assertEqual(choice.call_count, 2)
+        self.assertEqual(reads, ["outra_replica"] * 20 + ["replica"] * 20)
@@ -1,11 +1,19 @@
-from django.contrib import admin
+import io
+
+from django.contrib import admin, messages
 from django import forms
-from .models import User, Doctor, Specialty, Patient
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from .imports import import_doctors
+from .models import User, Doctor, Specialty, Patient, WorkingHours
 from django.contrib.auth.models import Group
 
 
 admin.site.unregister(Group)
 admin.site.register(Specialty)
+admin.site.register(WorkingHours)
 
 
 class DoctorInline(admin.StackedInline):
@@ -34,9 +42,14 @@ class UserForm(forms.ModelForm):
         fields = ["username", "email", "password", "first_name", "last_name"]
 
 
+class DoctorImportForm(forms.Form):
+    file = forms.FileField(label="CSV")
+
+
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     form = UserForm
+    change_list_template = "admin/users/user/change_list.html"
     
     def get_inlines(self, request, obj):
         if not obj:
@@ -61,3 +74,38 @@ class UserAdmin(admin.ModelAdmin):
         obj.role = "D"
         obj.set_password(obj.password)
         obj.save()
+
+    def get_urls(self):
+        return [
+            path("import-doctors/", self.admin_site.admin_view(self.import_doctors_view), name="users_user_import_doctors"),
+        ] + super().get_urls()
+
+    def import_doctors_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        form = DoctorImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            file = io.TextIOWrapper(form.cleaned_data["file"].file, encoding="utf-8-sig", newline="")
+            try:
+                # Dentro de uma requisição as senhas são calculadas no próprio
+                # processo: um pool do tamanho da máquina por upload esgotaria
+                # o servidor. Arquivos grandes vão pelo comando import_doctors.
+                result = import_doctors(file, workers=1)
+            except (UnicodeDecodeError, ValueError) as error:
+                self.message_user(request, str(error), messages.ERROR)
+            else:
+                self.message_user(
+                    request, f"{result['created']} médicos importados em {result['elapsed']:.1f}s.", messages.SUCCESS
+                )
+                for line, message in result["errors"]:
+                    self.message_user(request, f"Linha {line}: {message}", messages.WARNING)
+                return redirect("admin:users_user_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Importar médicos",
+            "form": form,
+        }
+        return TemplateResponse(request, "admin/users/user/import_doctors.html", context)
@@ -1,55 +1,93 @@
 from typing import List, Dict, Any, Optional
 
+from asgiref.sync import sync_to_async
 from django.http import Http404
 from ninja import Query
 from ninja.types import DictStrAny
-from ninja.pagination import paginate
-from ninja_extra.ordering import Ordering, ordering
 from ninja_extra import api_controller, route, status
 from django.db.models import Q
-from ninja_jwt.authentication import JWTAuth
-from django.shortcuts import get_object_or_404
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.db import IntegrityError, transaction
 
+from auth.authentication import AsyncCachedJWTAuth, CachedJWTAuth
+from core.cache import cached_response
+from core.pagination import CursorPage, CursorPagination, paginate
+from core.querysets import optimized_queryset
+from core.serialization import trusted_queryset
 from .schemas import (
     UserFilter,
     UserDoctorIn,
     UserPatientIn,
     UserRoleOut,
+    DoctorFields,
     DoctorFilter,
     DoctorOut,
     PatientOut,
+    SearchPage,
+    SearchQuery,
+    SpecialtyOut,
 )
-from .models import Patient, User, Doctor
+from .models import Patient, User, Doctor, Specialty
+from .search import get_backend
+
+
+async def search_page(model, schema, search, query: SearchQuery) -> Dict[str, Any]:
+    """
+    Busca uma página de ids já ordenados por relevância e carrega os
+    registros em uma consulta, mantendo a ordem da busca.
+    """
+    offset = (query.page - 1) * query.page_size
+    ids = await sync_to_async(search)(query.q, query.page_size + 1, offset)
+    next_page = query.page + 1 if len(ids) > query.page_size else None
+    ids = ids[: query.page_size]
+
+    found = {obj.id: obj async for obj in optimized_queryset(model, schema).filter(id__in=ids).order_by()}
+    return {"items": [found[id] for id in ids if id in found], "next_page": next_page}
 
 
 @api_controller(
     "users/",
-    auth=JWTAuth(),
+    auth=CachedJWTAuth(),
     tags=["USERS"],
 )
 class UserController:
     @route.get(
         "/",
-        response=List[UserRoleOut],
+        response=CursorPage[UserRoleOut],
+        auth=AsyncCachedJWTAuth(),
         permissions=[],
     )
-    def list(self, filters: UserFilter = Query(...)):
-        users = User.objects.all()
+    @paginate(CursorPagination)
+    async def list(self, filters: UserFilter = Query(...)):
+        users = optimized_queryset(User, UserRoleOut)
         users = filters.filter(users)
         return users
     
     @route.get(
         "/doctors/",
         response={
-            status.HTTP_200_OK: List[DoctorOut],
+            status.HTTP_200_OK: CursorPage[DoctorOut],
             status.HTTP_403_FORBIDDEN: DictStrAny,
         },
+        auth=AsyncCachedJWTAuth(),
         permissions=[],
+        exclude_unset=True,
     )
-    def list_doctors(self, request, filters: DoctorFilter = Query(...), has_pending_consultation: Optional[bool] = Query(None)):
-        doctors = Doctor.objects.all()
-        doctors = filters.filter(doctors)
+    @cached_response(
+        "doctors",
+        CursorPage[DoctorOut],
+        skip=lambda request: "has_pending_consultation" in request.GET,
+        exclude_unset=True,
+    )
+    @paginate(CursorPagination)
+    async def list_doctors(
+        self,
+        request,
+        filters: DoctorFilter = Query(...),
+        fields: DoctorFields = Query(...),
+        has_pending_consultation: Optional[bool] = Query(None),
+    ):
+        doctors = filters.filter(Doctor.objects.all())
         
         if has_pending_consultation is not None:
             if request.user.role != "P":
@@ -62,7 +100,41 @@ class UserController:
             else:
                 doctors = doctors.exclude(id__in=patient_pending_consultations)
         
-        return doctors
+        return trusted_queryset(doctors, DoctorOut, fields.selected())
+
+    @route.get(
+        "/doctors/search/",
+        response=SearchPage[DoctorOut],
+        auth=AsyncCachedJWTAuth(),
+        permissions=[],
+    )
+    async def search_doctors(self, query: SearchQuery = Query(...)):
+        return await search_page(Doctor, DoctorOut, get_backend().search_doctors, query)
+
+    @route.get(
+        "/patients/search/",
+        response={
+            status.HTTP_200_OK: SearchPage[PatientOut],
+            status.HTTP_403_FORBIDDEN: DictStrAny,
+        },
+        auth=AsyncCachedJWTAuth(),
+        permissions=[],
+    )
+    async def search_patients(self, request, query: SearchQuery = Query(...)):
+        if not request.user.is_staff:
+            return status.HTTP_403_FORBIDDEN, {"message": "Forbidden"}
+
+        return status.HTTP_200_OK, await search_page(Patient, PatientOut, get_backend().search_patients, query)
+
+    @route.get(
+        "/specialties/",
+        response=List[SpecialtyOut],
+        auth=AsyncCachedJWTAuth(),
+        permissions=[],
+    )
+    @cached_response("specialties", List[SpecialtyOut])
+    async def list_specialties(self):
+        return [specialty async for specialty in Specialty.objects.order_by("description")]
 
     @route.get(
         "/{int:id}/",
@@ -70,11 +142,13 @@ class UserController:
             status.HTTP_200_OK: UserRoleOut,
             status.HTTP_404_NOT_FOUND: DictStrAny,
         },
+        auth=AsyncCachedJWTAuth(),
         permissions=[],
     )
-    def get(self, id: int):
+    async def get(self, id: int):
         try:
-            return status.HTTP_200_OK, get_object_or_404(User, id=id)
+            users = optimized_queryset(User, UserRoleOut)
+            return status.HTTP_200_OK, await aget_object_or_404(users, id=id)
         except Http404:
             return status.HTTP_404_NOT_FOUND, {
                 "message": f"{User._meta.verbose_name.capitalize()} não existe."
@@ -86,11 +160,15 @@ class UserController:
             status.HTTP_200_OK: DoctorOut,
             status.HTTP_404_NOT_FOUND: DictStrAny,
         },
+        auth=AsyncCachedJWTAuth(),
         permissions=[],
+        exclude_unset=True,
     )
-    def get_doctor(self, id: int):
+    @cached_response("doctors", DoctorOut, exclude_unset=True)
+    async def get_doctor(self, id: int, fields: DoctorFields = Query(...)):
         try:
-            return status.HTTP_200_OK, get_object_or_404(Doctor, id=id)
+            doctors = trusted_queryset(Doctor.objects.all(), DoctorOut, fields.selected())
+            return status.HTTP_200_OK, await aget_object_or_404(doctors, id=id)
         except Http404:
             return status.HTTP_404_NOT_FOUND, {
                 "message": f"{Doctor._meta.verbose_name.capitalize()} não existe."
@@ -102,11 +180,13 @@ class UserController:
             status.HTTP_200_OK: PatientOut,
             status.HTTP_404_NOT_FOUND: DictStrAny,
         },
+        auth=AsyncCachedJWTAuth(),
         permissions=[],
     )
-    def get_patient(self, id: int):
+    async def get_patient(self, id: int):
         try:
-            return status.HTTP_200_OK, get_object_or_404(Patient, id=id)
+            patients = optimized_queryset(Patient, PatientOut)
+            return status.HTTP_200_OK, await aget_object_or_404(patients, id=id)
         except Http404:
             return status.HTTP_404_NOT_FOUND, {
                 "message": f"{Patient._meta.verbose_name.capitalize()} não existe."
@@ -175,7 +255,7 @@ class UserController:
                 patient = user.patient
                 
                 for k, v in patient_data.items():
-                    setattr(user, k, v)    
+                    setattr(patient, k, v)
                 
                 user.save()
                 patient.save()
@@ -221,7 +301,7 @@ class UserController:
                 doctor = user.doctor
                 
                 for k, v in doctor_data.items():
-                    setattr(user, k, v)    
+                    setattr(doctor, k, v)
                 
                 user.save()
                 doctor.save()
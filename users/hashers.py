@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+SCRYPT = settings.PASSWORD_HASHING["SCRYPT"]
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """
+    Scrypt com os parâmetros de ``PASSWORD_HASHING["SCRYPT"]``. Hashes com
+    parâmetros diferentes são refeitos no próximo login (``must_update``).
+    """
+
+    work_factor = SCRYPT["work_factor"]
+    block_size = SCRYPT["block_size"]
+    parallelism = SCRYPT["parallelism"]
+    # O scrypt usa 128 * N * r bytes, reaproveitados pelas ``parallelism``
+    # passadas, que são sequenciais. O limite padrão do OpenSSL (32 MiB)
+    # barraria work_factor acima de 2**14; o dobro do necessário deixa folga
+    # para os buffers menores.
+    maxmem = 2 * 128 * work_factor * block_size
+
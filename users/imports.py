@@ -0,0 +1,143 @@
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from core.cache import invalidate_on_commit
+from . import search
+from .models import Doctor, Specialty, User
+
+DOCTOR_CSV_FIELDS = ("username", "email", "password", "first_name", "last_name", "code", "phone", "specialty")
+
+# O e-mail pode ficar em branco; as demais colunas são obrigatórias.
+DOCTOR_CSV_REQUIRED = tuple(field for field in DOCTOR_CSV_FIELDS if field != "email")
+
+IMPORT_CHUNK_SIZE = 500
+
+
+def _setup_worker() -> None:
+    # Com o método "spawn" os processos filhos não herdam o Django configurado.
+    django.setup()
+
+
+def _chunks(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _validate(row: dict) -> Optional[str]:
+    # DictReader completa linhas curtas com None e guarda as sobras na chave None.
+    if None in row or None in row.values():
+        return f"A linha deve ter {len(DOCTOR_CSV_FIELDS)} colunas."
+    if blank := [field for field in DOCTOR_CSV_REQUIRED if not row[field].strip()]:
+        return f"Campos obrigatórios em branco: {', '.join(blank)}."
+    return None
+
+
+def _save(rows: List[tuple], hashes: List[str]) -> None:
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            User(
+                username=row["username"],
+                email=row["email"],
+                password=password,
+                first_name=row["first_name"],
+                last_name=row["last_name"],
+                role="D",
+            )
+            for (_, row, _), password in zip(rows, hashes)
+        )
+        doctors = Doctor.objects.bulk_create(
+            Doctor(code=row["code"], phone=row["phone"], specialty_id=specialty_id, user_id=user.id)
+            for (_, row, specialty_id), user in zip(rows, users)
+        )
+        # bulk_create não dispara post_save: o bloco é indexado de uma vez.
+        search.get_backend().index_doctors([doctor.id for doctor in doctors])
+
+
+def import_doctors(
+    file: TextIO,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int, float], None]] = None,
+) -> Dict:
+    """
+    Importa médicos de um CSV com as colunas de ``DOCTOR_CSV_FIELDS``.
+
+    O arquivo é lido em blocos de ``chunk_size`` linhas; as senhas de cada
+    bloco são calculadas em paralelo em ``workers`` processos e os usuários e
+    médicos são gravados com ``bulk_create``, um bloco por transação. As
+    especialidades são resolvidas pela descrição a partir de um único mapa
+    carregado no início. Linhas inválidas, ou recusadas pelo banco na
+    gravação, são puladas e devolvidas em ``errors`` junto com o número da
+    linha.
+    """
+    reader = csv.DictReader(file)
+    missing = set(DOCTOR_CSV_FIELDS) - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"Colunas ausentes no CSV: {', '.join(sorted(missing))}.")
+
+    specialties = {description.strip().lower(): id for id, description in Specialty.objects.values_list("id", "description")}
+    workers = workers or settings.IMPORT_WORKERS or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(workers, initializer=_setup_worker) if workers > 1 else None
+
+    created, processed, errors = 0, 0, []
+    started = time.perf_counter()
+    try:
+        # A linha 1 é o cabeçalho.
+        for chunk in _chunks(enumerate(reader, start=2), chunk_size):
+            rows = []
+            usernames = {row["username"] for _, row in chunk if row["username"]}
+            taken = set(User.objects.filter(username__in=usernames).values_list("username", flat=True))
+
+            for line, row in chunk:
+                if error := _validate(row):
+                    errors.append((line, error))
+                elif row["username"] in taken:
+                    errors.append((line, f"O usuário {row['username']} já existe."))
+                elif (specialty_id := specialties.get(row["specialty"].strip().lower())) is None:
+                    errors.append((line, f"Especialidade {row['specialty']} não encontrada."))
+                else:
+                    taken.add(row["username"])
+                    rows.append((line, row, specialty_id))
+
+            passwords = [row["password"] for _, row, _ in rows]
+            if pool is None:
+                hashes = list(map(make_password, passwords))
+            else:
+                hashes = list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // workers)))
+
+            try:
+                _save(rows, hashes)
+                created += len(rows)
+            except IntegrityError:
+                # Um usuário pode ter sido criado depois da consulta a
+                # ``taken``: o bloco é regravado linha a linha para apontar
+                # quais falharam.
+                for item, password in zip(rows, hashes):
+                    try:
+                        _save([item], [password])
+                        created += 1
+                    except IntegrityError as error:
+                        errors.append((item[0], f"Não foi possível gravar o médico: {error}."))
+
+            processed += len(chunk)
+            if progress:
+                progress(processed, created, time.perf_counter() - started)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        # bulk_create não dispara post_save, então o cache de médicos é
+        # invalidado aqui.
+        if created:
+            invalidate_on_commit("doctors")
+
+    return {"created": created, "errors": sorted(errors), "elapsed": time.perf_counter() - started}
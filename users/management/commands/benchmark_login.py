@@ -0,0 +1,64 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils.module_loading import import_string
+
+from users.models import Patient, User
+
+USERNAME = "benchmark-login"
+PASSWORD = "benchmark-password"
+
+
+class Command(BaseCommand):
+    help = "Mede logins por segundo, por núcleo, na rota de token para cada hasher de senha."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--hashers", nargs="+", default=settings.PASSWORD_HASHERS)
+
+    def handle(self, *args, **options):
+        client = Client()
+
+        with transaction.atomic():
+            user = User.objects.create_user(username=USERNAME, role="P")
+            Patient.objects.create(
+                birth_date=datetime.date(1990, 1, 1), gender="F", phone="00000000000", address="-", user=user
+            )
+
+            for path in options["hashers"]:
+                hasher = import_string(path)()
+                try:
+                    encoded = make_password(PASSWORD, hasher=hasher)
+                except ValueError as error:
+                    self.stderr.write(f"{path}: ignorado ({error})")
+                    continue
+
+                # Com um único hasher configurado o login não refaz o hash,
+                # então todas as iterações medem o mesmo algoritmo.
+                with override_settings(PASSWORD_HASHERS=[path]):
+                    User.objects.filter(id=user.id).update(password=encoded)
+                    wall, cpu = self.measure(client, options["iterations"])
+
+                self.stdout.write(
+                    f"{path}: {options['iterations'] / cpu:.1f} logins/s por núcleo "
+                    f"({1000 * wall / options['iterations']:.1f} ms/login)"
+                )
+
+            transaction.set_rollback(True)
+
+    def measure(self, client, iterations):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        for _ in range(iterations):
+            response = client.post(
+                "/api/v1/auth/token/",
+                {"username": USERNAME, "password": PASSWORD},
+                content_type="application/json",
+            )
+            assert response.status_code == 200, response.content
+        return time.perf_counter() - wall_start, time.process_time() - cpu_start
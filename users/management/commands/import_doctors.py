@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.imports import IMPORT_CHUNK_SIZE, import_doctors
+
+
+class Command(BaseCommand):
+    help = "Importa médicos em massa a partir de um arquivo CSV."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument("--workers", type=int, default=None, help="Processos para o hash das senhas.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as file:
+                result = import_doctors(
+                    file,
+                    chunk_size=options["chunk_size"],
+                    workers=options["workers"],
+                    progress=self.progress,
+                )
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+
+        for line, message in result["errors"]:
+            self.stderr.write(f"Linha {line}: {message}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result['created']} médicos importados em {result['elapsed']:.1f}s "
+                f"({len(result['errors'])} linhas com erro)."
+            )
+        )
+
+    def progress(self, processed, created, elapsed):
+        self.stdout.write(f"{processed} linhas lidas, {created} médicos criados ({created / elapsed:.0f}/s)")
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o índice de busca de médicos e pacientes."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        get_backend().rebuild(using=options["database"])
+        self.stdout.write(self.style.SUCCESS(f"Índice de busca reconstruído em {time.perf_counter() - start:.1f}s."))
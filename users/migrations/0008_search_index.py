@@ -0,0 +1,62 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:10
+
+from django.db import migrations
+
+# Tabelas FTS5 da busca e suas colunas indexadas; o rowid é o id do médico
+# ou paciente. O SQL fica aqui, e não em ``users.search``, para que a
+# migração não mude junto com o código atual.
+SEARCH_TABLES = {
+    'search_doctors': ('name', 'specialty', 'code'),
+    'search_patients': ('name', 'phone'),
+}
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Doctor = apps.get_model('users', 'Doctor')
+    Patient = apps.get_model('users', 'Patient')
+    using = schema_editor.connection.alias
+    rows = {
+        'search_doctors': [
+            (id, f'{first_name} {last_name}', specialty, code)
+            for id, first_name, last_name, specialty, code in Doctor.objects.using(using).values_list(
+                'id', 'user__first_name', 'user__last_name', 'specialty__description', 'code'
+            )
+        ],
+        'search_patients': [
+            (id, f'{first_name} {last_name}', phone)
+            for id, first_name, last_name, phone in Patient.objects.using(using).values_list(
+                'id', 'user__first_name', 'user__last_name', 'phone'
+            )
+        ],
+    }
+    with schema_editor.connection.cursor() as cursor:
+        for table, columns in SEARCH_TABLES.items():
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {table} USING fts5("
+                f"{', '.join(columns)}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+            placeholders = ', '.join(['%s'] * (len(columns) + 1))
+            cursor.executemany(
+                f"INSERT INTO {table}(rowid, {', '.join(columns)}) VALUES ({placeholders})", rows[table]
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in SEARCH_TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_user_role_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
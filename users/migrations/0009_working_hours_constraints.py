@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='workinghours',
+            constraint=models.CheckConstraint(condition=models.Q(('slot_duration__gte', 5)), name='working_hours_slot_duration_gte_5'),
+        ),
+        migrations.AddConstraint(
+            model_name='workinghours',
+            constraint=models.CheckConstraint(condition=models.Q(('end_time__gt', models.F('start_time'))), name='working_hours_end_after_start'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext as _
@@ -15,6 +16,9 @@ class User(AbstractUser):
     class Meta:
         db_table = "users"
         ordering = ["-id"]
+        indexes = [
+            models.Index(fields=["role"], name="users_role_idx"),
+        ]
         verbose_name = _("User")
         verbose_name_plural = _("Users")
 
@@ -68,3 +72,37 @@ class Doctor(models.Model):
         ordering = ["-id"]
         verbose_name = _("Doctor")
         verbose_name_plural = _("Doctors")
+
+
+class WorkingHours(models.Model):
+    WEEKDAY_CHOICES = (
+        (0, _("Monday")),
+        (1, _("Tuesday")),
+        (2, _("Wednesday")),
+        (3, _("Thursday")),
+        (4, _("Friday")),
+        (5, _("Saturday")),
+        (6, _("Sunday")),
+    )
+
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    slot_duration = models.PositiveSmallIntegerField(default=30, validators=[MinValueValidator(5)])
+    doctor = models.ForeignKey("users.Doctor", on_delete=models.CASCADE, related_name="working_hours")
+
+    def __str__(self):
+        return f"{self.doctor} - {self.get_weekday_display()} - {self.start_time} - {self.end_time}"
+
+    class Meta:
+        db_table = "working_hours"
+        ordering = ["-id"]
+        constraints = [
+            # Uma duração nula faria a geração de horários da agenda nunca terminar.
+            models.CheckConstraint(condition=models.Q(slot_duration__gte=5), name="working_hours_slot_duration_gte_5"),
+            models.CheckConstraint(
+                condition=models.Q(end_time__gt=models.F("start_time")), name="working_hours_end_after_start"
+            ),
+        ]
+        verbose_name = _("Working hours")
+        verbose_name_plural = _("Working hours")
@@ -1,19 +1,40 @@
 from ninja import Schema, Field, FilterSchema
-from typing import Optional
+from pydantic import field_validator
+from typing import ClassVar, Generic, List, Optional, TypeVar
 from ninja.types import DictStrAny
+
+from core.serialization import FieldsQuery, TrustedSchema
 from .models import Patient
 import datetime
 
+T = TypeVar("T")
+
 
 class UserFilter(FilterSchema):
     id: Optional[int] = Field(None, q="id__exact")
-    role: Optional[str] = Field(None, q="role__iexact",)
+    role: Optional[str] = Field(None, q="role__exact",)
+
+    @field_validator("role")
+    @classmethod
+    def normalize_role(cls, value):
+        return value.strip().upper() if value else value
 
 
 class DoctorFilter(FilterSchema):
     id: Optional[int] = Field(None, q="id__exact")
 
 
+class SearchQuery(Schema):
+    q: str = Field(..., min_length=1, max_length=100)
+    page: int = Field(1, ge=1)
+    page_size: int = Field(20, ge=1, le=100)
+
+
+class SearchPage(Schema, Generic[T]):
+    items: List[T]
+    next_page: Optional[int]
+
+
 class PatientOut(Schema):
     id: int
     full_name: str
@@ -21,18 +42,32 @@ class PatientOut(Schema):
     gender: str
     phone: str
     address: str
+
+    orm_paths: ClassVar[dict] = {
+        "full_name": ("user__first_name", "user__last_name"),
+    }
     
     @staticmethod
     def resolve_full_name(obj):
         return obj.user.get_full_name()
     
 
-class DoctorOut(Schema):
+class SpecialtyOut(Schema):
+    id: int
+    description: str
+
+
+class DoctorOut(TrustedSchema):
     id: int
     full_name: str
     code: str
     phone: str
     specialty: str
+
+    orm_paths: ClassVar[dict] = {
+        "full_name": ("user__first_name", "user__last_name"),
+        "specialty": ("specialty__description",),
+    }
     
     @staticmethod
     def resolve_full_name(obj):
@@ -43,6 +78,10 @@ class DoctorOut(Schema):
         return obj.specialty.description
 
 
+class DoctorFields(FieldsQuery):
+    output_schema = DoctorOut
+
+
 class UserOut(Schema):
     id: int
     first_name: str
@@ -56,6 +95,10 @@ class UserRoleOut(Schema):
     user: UserOut
     patient: PatientOut | None
     doctor: DoctorOut | None
+
+    orm_paths: ClassVar[dict] = {
+        "user": "",
+    }
     
     @staticmethod
     def resolve_user(obj):
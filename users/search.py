@@ -0,0 +1,168 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q, Value
+from django.db.models.functions import Concat
+from django.utils.module_loading import import_string
+
+from .models import Doctor, Patient
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+DOCTOR_SEARCH_SQL = """
+    SELECT doctors.id, users.first_name || ' ' || users.last_name, specialties.description, doctors.code
+    FROM doctors
+    JOIN users ON users.id = doctors.user_id
+    JOIN specialties ON specialties.id = doctors.specialty_id
+"""
+
+PATIENT_SEARCH_SQL = """
+    SELECT patients.id, users.first_name || ' ' || users.last_name, patients.phone
+    FROM patients
+    JOIN users ON users.id = patients.user_id
+"""
+
+# Tabela FTS5: (colunas indexadas, SELECT que as preenche, chave do SELECT).
+SEARCH_TABLES = {
+    "search_doctors": ("name, specialty, code", DOCTOR_SEARCH_SQL, "doctors.id"),
+    "search_patients": ("name, phone", PATIENT_SEARCH_SQL, "patients.id"),
+}
+
+
+def tokens(query: str) -> List[str]:
+    return _TOKEN.findall(query)
+
+
+class SearchBackend:
+    """
+    Interface dos backends de busca. Os índices são mantidos pelos sinais
+    de ``users.signals``; ``search_*`` devem devolver ids ordenados por
+    relevância.
+    """
+
+    def index_doctors(self, ids: Iterable[int], using: str = "default") -> None:
+        pass
+
+    def index_patients(self, ids: Iterable[int], using: str = "default") -> None:
+        pass
+
+    def remove_doctors(self, ids: Iterable[int], using: str = "default") -> None:
+        pass
+
+    def remove_patients(self, ids: Iterable[int], using: str = "default") -> None:
+        pass
+
+    def rebuild(self, using: str = "default") -> None:
+        pass
+
+    def search_doctors(self, query: str, limit: int, offset: int = 0) -> List[int]:
+        raise NotImplementedError
+
+    def search_patients(self, query: str, limit: int, offset: int = 0) -> List[int]:
+        raise NotImplementedError
+
+
+class FTS5SearchBackend(SearchBackend):
+    """
+    Busca com as tabelas FTS5 ``search_doctors`` e ``search_patients`` do
+    SQLite (criadas pela migração ``users.0008``), cujo rowid é o id do
+    médico ou paciente. Cada termo casa por prefixo, sem acentos, e o
+    resultado vem ordenado por bm25 com peso maior para o nome.
+    """
+
+    doctor_weights = (10.0, 4.0, 2.0)
+    patient_weights = (10.0, 2.0)
+
+    def _delete(self, table: str, ids: List[int], using: str) -> None:
+        placeholders = ", ".join(["%s"] * len(ids))
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid IN ({placeholders})", ids)
+
+    def _index(self, table: str, ids: List[int], using: str) -> None:
+        """
+        Reescreve as linhas de ``ids`` a partir do banco: um DELETE e um
+        INSERT ... SELECT, qualquer que seja a quantidade.
+        """
+        if not ids:
+            return
+        columns, source, key = SEARCH_TABLES[table]
+        self._delete(table, ids, using)
+        placeholders = ", ".join(["%s"] * len(ids))
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table}(rowid, {columns}) {source} WHERE {key} IN ({placeholders})", ids
+            )
+
+    def index_doctors(self, ids, using="default"):
+        self._index("search_doctors", list(ids), using)
+
+    def index_patients(self, ids, using="default"):
+        self._index("search_patients", list(ids), using)
+
+    def remove_doctors(self, ids, using="default"):
+        if ids := list(ids):
+            self._delete("search_doctors", ids, using)
+
+    def remove_patients(self, ids, using="default"):
+        if ids := list(ids):
+            self._delete("search_patients", ids, using)
+
+    def rebuild(self, using="default"):
+        with connections[using].cursor() as cursor:
+            for table, (columns, source, _) in SEARCH_TABLES.items():
+                cursor.execute(f"DELETE FROM {table}")
+                cursor.execute(f"INSERT INTO {table}(rowid, {columns}) {source}")
+
+    def _match(self, table: str, weights, model, query: str, limit: int, offset: int) -> List[int]:
+        terms = tokens(query)
+        if not terms:
+            return []
+        match = " ".join(f'"{term}"*' for term in terms)
+        using = router.db_for_read(model)
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {table} WHERE {table} MATCH %s "
+                f"ORDER BY bm25({table}, {', '.join(map(str, weights))}) LIMIT %s OFFSET %s",
+                [match, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def search_doctors(self, query, limit, offset=0):
+        return self._match("search_doctors", self.doctor_weights, Doctor, query, limit, offset)
+
+    def search_patients(self, query, limit, offset=0):
+        return self._match("search_patients", self.patient_weights, Patient, query, limit, offset)
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """
+    Alternativa para bancos sem FTS5: todos os termos precisam aparecer
+    (``icontains``) e o resultado vem em ordem alfabética, sem índice
+    próprio para manter.
+    """
+
+    def _search(self, queryset, fields, query: str, limit: int, offset: int) -> List[int]:
+        terms = tokens(query)
+        if not terms:
+            return []
+        queryset = queryset.annotate(name=Concat("user__first_name", Value(" "), "user__last_name"))
+        for term in terms:
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f"{field}__icontains": term})
+            queryset = queryset.filter(condition)
+        return list(queryset.order_by("name", "id").values_list("id", flat=True)[offset : offset + limit])
+
+    def search_doctors(self, query, limit, offset=0):
+        return self._search(Doctor.objects.all(), ("name", "specialty__description", "code"), query, limit, offset)
+
+    def search_patients(self, query, limit, offset=0):
+        return self._search(Patient.objects.all(), ("name", "phone"), query, limit, offset)
+
+
+@lru_cache(maxsize=None)
+def get_backend() -> SearchBackend:
+    return import_string(settings.SEARCH_BACKEND)()
@@ -0,0 +1,81 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from auth.authentication import token_cache
+from core import cache
+from . import search
+from .models import Doctor, Patient, Specialty, User
+
+
+# Depois do commit: antes dele, uma requisição concorrente guardaria de novo
+# o usuário antigo, que seguiria autenticando até TOKEN_CACHE_TTL.
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_tokens(sender, instance, using, **kwargs):
+    transaction.on_commit(partial(token_cache.invalidate_user, instance.id), using=using)
+
+
+@receiver([post_save, post_delete], sender=Patient)
+@receiver([post_save, post_delete], sender=Doctor)
+def invalidate_profile_tokens(sender, instance, using, **kwargs):
+    transaction.on_commit(partial(token_cache.invalidate_user, instance.user_id), using=using)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_doctor_user_responses(sender, instance, using, **kwargs):
+    if instance.role == "D":
+        cache.invalidate_on_commit("doctors", using=using)
+
+
+@receiver([post_save, post_delete], sender=Doctor)
+def invalidate_doctor_responses(sender, instance, using, **kwargs):
+    cache.invalidate_on_commit("doctors", using=using)
+
+
+@receiver([post_save, post_delete], sender=Specialty)
+def invalidate_specialty_responses(sender, instance, using, **kwargs):
+    cache.invalidate_on_commit("doctors", using=using)
+    cache.invalidate_on_commit("specialties", using=using)
+
+
+@receiver(post_save, sender=Doctor)
+def index_doctor(sender, instance, using, **kwargs):
+    search.get_backend().index_doctors([instance.id], using=using)
+
+
+@receiver(post_delete, sender=Doctor)
+def remove_doctor_from_index(sender, instance, using, **kwargs):
+    search.get_backend().remove_doctors([instance.id], using=using)
+
+
+@receiver(post_save, sender=Patient)
+def index_patient(sender, instance, using, **kwargs):
+    search.get_backend().index_patients([instance.id], using=using)
+
+
+@receiver(post_delete, sender=Patient)
+def remove_patient_from_index(sender, instance, using, **kwargs):
+    search.get_backend().remove_patients([instance.id], using=using)
+
+
+@receiver(post_save, sender=User)
+def index_user_profile(sender, instance, using, created, **kwargs):
+    # Um usuário recém-criado ainda não tem perfil; o save do perfil o indexa.
+    if created:
+        return
+    if instance.role == "D":
+        ids = Doctor.objects.using(using).filter(user_id=instance.id).values_list("id", flat=True)
+        search.get_backend().index_doctors(ids, using=using)
+    elif instance.role == "P":
+        ids = Patient.objects.using(using).filter(user_id=instance.id).values_list("id", flat=True)
+        search.get_backend().index_patients(ids, using=using)
+
+
+@receiver(post_save, sender=Specialty)
+def index_specialty_doctors(sender, instance, using, created, **kwargs):
+    if created:
+        return
+    ids = Doctor.objects.using(using).filter(specialty_id=instance.id).values_list("id", flat=True)
+    search.get_backend().index_doctors(ids, using=using)
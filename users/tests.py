@@ -1,3 +1,423 @@
-from django.test import TestCase
+import io
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from auth.authentication import token_cache
+from core.cache import get_cache
+from core.testing import ConsultationTestCase
+from .imports import import_doctors
+from .models import Doctor, Patient, Specialty, User
+from .search import DatabaseSearchBackend
+
+
+class UserQueryCountTest(ConsultationTestCase):
+    def setUp(self):
+        get_cache().clear()
+
+    def test_list_users_query_count_does_not_grow_with_rows(self):
+        few, _ = self.count_queries("/api/v1/users/", self.patient.user)
+
+        for index in range(10):
+            self.create_patient(f"paciente{index}")
+            self.create_doctor(f"medico{index}")
+        many, response = self.count_queries("/api/v1/users/", self.patient.user)
+
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.json()["items"]), 22)
+
+    def test_list_doctors_query_count_does_not_grow_with_rows(self):
+        few, _ = self.count_queries("/api/v1/users/doctors/", self.patient.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(10):
+                self.create_doctor(f"medico{index}")
+        many, response = self.count_queries("/api/v1/users/doctors/", self.patient.user)
+
+        self.assertEqual(few, many)
+        self.assertEqual(response.json()["items"][0]["specialty"], "Cardiologia")
+
+    def test_list_doctors_pending_filter_is_forbidden_for_doctors(self):
+        response = self.client.get(
+            "/api/v1/users/doctors/", {"has_pending_consultation": True}, **self.auth(self.doctor.user)
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class TokenCacheTest(ConsultationTestCase):
+    def setUp(self):
+        token_cache.clear()
+
+    def get_me(self, headers):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f"/api/v1/users/{self.patient.user.id}/", **headers)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.json()
+
+    def test_repeated_token_skips_user_lookup(self):
+        headers = self.auth(self.patient.user)
+
+        first, _ = self.get_me(headers)
+        second, _ = self.get_me(headers)
+
+        self.assertEqual(second, first - 1)
+
+    def test_cached_user_keeps_profile_ids(self):
+        headers = self.auth(self.patient.user)
+        self.get_me(headers)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/v1/users/doctors/", {"has_pending_consultation": False}, **headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('FROM "patients"', " ".join(query["sql"] for query in context.captured_queries))
+
+    def test_edit_invalidates_cached_user(self):
+        headers = self.auth(self.patient.user)
+        self.get_me(headers)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                "/api/v1/users/patient/edit/",
+                {
+                    "user": {
+                        "username": "paciente",
+                        "email": "paciente@clinica.com",
+                        "password": "nova-senha",
+                        "first_name": "Maria",
+                        "last_name": "Silva",
+                    },
+                    "patient": {"birth_date": "1990-01-01", "gender": "F", "phone": "86999999999", "address": "Rua B"},
+                },
+                content_type="application/json",
+                **headers,
+            )
+        self.assertEqual(response.status_code, 200)
+
+        queries, _ = self.get_me(headers)
+        second, _ = self.get_me(headers)
+        self.assertEqual(second, queries - 1)
+
+    def test_invalidation_waits_for_the_commit(self):
+        headers = self.auth(self.patient.user)
+        self.get_me(headers)
+        cached, _ = self.get_me(headers)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.patient.user.first_name = "Maria"
+            self.patient.user.save()
+            before_commit, _ = self.get_me(headers)
+
+        for callback in callbacks:
+            callback()
+        after_commit, _ = self.get_me(headers)
+        self.assertEqual(before_commit, cached)
+        self.assertEqual(after_commit, cached + 1)
+
+    def test_deleted_account_is_rejected(self):
+        headers = self.auth(self.doctor.user)
+        self.get_me(headers)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete("/api/v1/users/delete-account/", **headers).status_code, 204)
+
+        self.assertEqual(self.client.get("/api/v1/users/", **headers).status_code, 401)
+
+
+class PasswordHashingTest(ConsultationTestCase):
+    def test_legacy_hash_is_upgraded_on_login(self):
+        user = self.patient.user
+        user.password = make_password("senha-antiga", hasher="pbkdf2_sha256")
+        user.save()
+
+        response = self.client.post(
+            "/api/v1/auth/token/", {"username": user.username, "password": "senha-antiga"}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertRegex(user.password, r"^scrypt\$16384\$[^$]+\$8\$5\$")
+        self.assertTrue(user.check_password("senha-antiga"))
+
+    def test_registration_uses_configured_hasher(self):
+        response = self.client.post(
+            "/api/v1/users/patient/register/",
+            {
+                "user": {
+                    "username": "novo",
+                    "email": "novo@clinica.com",
+                    "password": "senha-nova",
+                    "first_name": "Novo",
+                    "last_name": "Paciente",
+                },
+                "patient": {"birth_date": "1990-01-01", "gender": "M", "phone": "86999999999", "address": "Rua C"},
+            },
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(username="novo").password.startswith("scrypt$"))
+
+
+class AsyncReadTest(ConsultationTestCase):
+    def setUp(self):
+        get_cache().clear()
+
+    async def test_read_routes_run_on_the_asgi_handler(self):
+        headers = {"Authorization": self.auth(self.patient.user)["HTTP_AUTHORIZATION"]}
+
+        doctors = await self.async_client.get("/api/v1/users/doctors/", {"page_size": 1}, headers=headers)
+        doctor = await self.async_client.get(f"/api/v1/users/doctor/{self.doctor.id}/", headers=headers)
+        missing = await self.async_client.get("/api/v1/users/patient/0/", headers=headers)
+
+        self.assertEqual(doctors.json()["items"][0]["full_name"], "medico Souza")
+        self.assertEqual(doctor.json()["specialty"], "Cardiologia")
+        self.assertEqual(missing.status_code, 404)
+
+
+class ResponseCacheTest(ConsultationTestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.headers = self.auth(self.patient.user)
+        self.client.get("/api/v1/users/specialties/", **self.headers)
+
+    def test_cached_doctor_is_served_without_queries(self):
+        path = f"/api/v1/users/doctor/{self.doctor.id}/"
+        first = self.client.get(path, **self.headers)
+
+        with CaptureQueriesContext(connection) as context:
+            second = self.client.get(path, **self.headers)
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get("/api/v1/users/doctors/", **self.headers)["ETag"]
+
+        response = self.client.get("/api/v1/users/doctors/", HTTP_IF_NONE_MATCH=etag, **self.headers)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_if_none_match_compares_whole_tags(self):
+        etag = self.client.get("/api/v1/users/doctors/", **self.headers)["ETag"]
+        cases = {
+            f'"outra", {etag}': 304,
+            f"W/{etag}": 304,
+            "*": 304,
+            etag[:-2] + '"': 200,
+            f'"x{etag[1:]}': 200,
+        }
+        for header, status in cases.items():
+            with self.subTest(header=header):
+                response = self.client.get("/api/v1/users/doctors/", HTTP_IF_NONE_MATCH=header, **self.headers)
+                self.assertEqual(response.status_code, status)
+
+    def test_specialty_change_invalidates_doctors_and_specialties(self):
+        doctors = self.client.get("/api/v1/users/doctors/", **self.headers)
+
+        self.specialty.description = "Dermatologia"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.specialty.save()
+
+        changed = self.client.get("/api/v1/users/doctors/", HTTP_IF_NONE_MATCH=doctors["ETag"], **self.headers)
+        specialties = self.client.get("/api/v1/users/specialties/", **self.headers)
+
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()["items"][0]["specialty"], "Dermatologia")
+        self.assertEqual(specialties.json(), [{"id": self.specialty.id, "description": "Dermatologia"}])
+
+    def test_invalidation_waits_for_the_commit(self):
+        etag = self.client.get("/api/v1/users/doctors/", **self.headers)["ETag"]
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.doctor.phone = "86977777777"
+            self.doctor.save()
+            # Antes do commit a versão é a mesma, então o cache continua valendo.
+            before_commit = self.client.get("/api/v1/users/doctors/", HTTP_IF_NONE_MATCH=etag, **self.headers)
+
+        self.assertEqual(before_commit.status_code, 304)
+        for callback in callbacks:
+            callback()
+        after_commit = self.client.get("/api/v1/users/doctors/", HTTP_IF_NONE_MATCH=etag, **self.headers)
+        self.assertEqual(after_commit.status_code, 200)
+
+    def test_personalized_filter_is_not_cached(self):
+        response = self.client.get("/api/v1/users/doctors/", {"has_pending_consultation": True}, **self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
+
+    def test_missing_doctor_is_not_cached(self):
+        response = self.client.get("/api/v1/users/doctor/0/", **self.headers)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class DoctorImportTest(ConsultationTestCase):
+    def csv(self, amount, overrides=None):
+        lines = ["username,email,password,first_name,last_name,code,phone,specialty"]
+        for index in range(amount):
+            row = {
+                "username": f"importado{index}",
+                "email": f"importado{index}@clinica.com",
+                "password": "senha-secreta",
+                "first_name": f"Importado{index}",
+                "last_name": "Lima",
+                "code": f"CRM{index}",
+                "phone": "86977777777",
+                "specialty": " cardiologia ",
+                **(overrides or {}).get(index, {}),
+            }
+            lines.append(",".join(row.values()))
+        return "\n".join(lines) + "\n"
+
+    def test_imports_in_chunks_with_constant_queries_per_chunk(self):
+        chunks = []
+
+        def progress(processed, created, elapsed):
+            chunks.append(processed)
+
+        with CaptureQueriesContext(connection) as context:
+            result = import_doctors(io.StringIO(self.csv(6)), chunk_size=3, workers=1, progress=progress)
+
+        self.assertEqual(result["created"], 6)
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(chunks, [3, 6])
+        # Mapa de especialidades + por bloco: usuários existentes, transação,
+        # os dois INSERTs e a reindexação da busca (DELETE e INSERT).
+        self.assertLessEqual(len(context.captured_queries), 1 + 2 * 7)
+
+        doctor = Doctor.objects.select_related("user").get(user__username="importado5")
+        self.assertEqual(doctor.specialty_id, self.specialty.id)
+        self.assertEqual(doctor.user.role, "D")
+        self.assertTrue(check_password("senha-secreta", doctor.user.password))
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        content = self.csv(4, {1: {"username": "medico"}, 2: {"specialty": "Ortopedia"}, 3: {"username": "importado0"}})
+
+        result = import_doctors(io.StringIO(content), workers=1)
+
+        self.assertEqual(result["created"], 1)
+        self.assertEqual([line for line, _ in result["errors"]], [3, 4, 5])
+
+    def test_incomplete_rows_are_reported_and_skipped(self):
+        content = self.csv(3, {1: {"code": ""}}) + "importado9,importado9@clinica.com,senha-secreta\n"
+
+        result = import_doctors(io.StringIO(content), workers=1)
+
+        self.assertEqual(result["created"], 2)
+        self.assertEqual([line for line, _ in result["errors"]], [3, 5])
+
+    def test_rows_rejected_by_the_database_are_reported(self):
+        def hash_while_another_admin_imports(password):
+            # O usuário aparece depois da checagem de ``taken`` e antes do INSERT.
+            User.objects.get_or_create(username="importado1", defaults={"role": "P"})
+            return make_password(password)
+
+        with mock.patch("users.imports.make_password", side_effect=hash_while_another_admin_imports):
+            result = import_doctors(io.StringIO(self.csv(3)), workers=1)
+
+        self.assertEqual(result["created"], 2)
+        self.assertEqual([line for line, _ in result["errors"]], [3])
+        self.assertFalse(Doctor.objects.filter(user__username="importado1").exists())
+
+    def test_missing_columns_are_rejected(self):
+        with self.assertRaises(ValueError):
+            import_doctors(io.StringIO("username,password\nx,y\n"), workers=1)
+
+    def test_command_hashes_in_a_process_pool(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write(self.csv(4))
+            file.flush()
+            output = io.StringIO()
+            call_command("import_doctors", file.name, workers=2, chunk_size=2, stdout=output)
+
+        self.assertIn("4 médicos importados", output.getvalue())
+        self.assertEqual(User.objects.filter(username__startswith="importado", role="D").count(), 4)
+
+    def test_admin_upload(self):
+        admin = User.objects.create_user(username="admin", role="A", is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        upload = io.BytesIO(self.csv(2).encode())
+        upload.name = "medicos.csv"
+
+        with mock.patch("users.imports.ProcessPoolExecutor") as pool:
+            response = self.client.post("/admin/users/user/import-doctors/", {"file": upload})
+
+        self.assertRedirects(response, "/admin/users/user/", fetch_redirect_response=False)
+        pool.assert_not_called()
+        self.assertEqual(Doctor.objects.filter(user__username__startswith="importado").count(), 2)
+
+
+class SearchTest(ConsultationTestCase):
+    def search(self, path, user, **query):
+        response = self.client.get(path, query, **self.auth(user))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def doctor_names(self, q, **query):
+        page = self.search("/api/v1/users/doctors/search/", self.patient.user, q=q, **query)
+        return [doctor["full_name"] for doctor in page["items"]]
+
+    def test_matches_prefixes_without_accents(self):
+        self.create_doctor("José")
+
+        self.assertEqual(self.doctor_names("jose sou"), ["José Souza"])
+        self.assertEqual(self.doctor_names("JOSÉ"), ["José Souza"])
+
+    def test_name_ranks_above_specialty(self):
+        self.create_doctor("Cardoso")
+
+        self.assertEqual(self.doctor_names("card"), ["Cardoso Souza", "medico Souza"])
+
+    def test_index_follows_saves_and_deletes(self):
+        user = self.doctor.user
+        user.first_name = "Renato"
+        user.save()
+        self.specialty.description = "Dermatologia"
+        self.specialty.save()
+
+        self.assertEqual(self.doctor_names("renato derma"), ["Renato Souza"])
+        self.assertEqual(self.doctor_names("medico"), [])
+
+        self.doctor.delete()
+
+        self.assertEqual(self.doctor_names("renato"), [])
+
+    def test_pages_keep_rank_order(self):
+        for name in ("Ana", "Anabela", "Anastácia"):
+            self.create_doctor(name)
+
+        first = self.search("/api/v1/users/doctors/search/", self.patient.user, q="ana", page_size=2)
+        second = self.search("/api/v1/users/doctors/search/", self.patient.user, q="ana", page_size=2, page=2)
+
+        self.assertEqual(first["next_page"], 2)
+        self.assertIsNone(second["next_page"])
+        names = [doctor["full_name"] for doctor in first["items"] + second["items"]]
+        self.assertCountEqual(names, ["Ana Souza", "Anabela Souza", "Anastácia Souza"])
+
+    def test_patient_search_is_staff_only(self):
+        staff = User.objects.create_user(username="recepcao", role="A", is_staff=True)
+
+        forbidden = self.client.get("/api/v1/users/patients/search/", {"q": "paciente"}, **self.auth(self.doctor.user))
+        page = self.search("/api/v1/users/patients/search/", staff, q="8699999")
+
+        self.assertEqual(forbidden.status_code, 403)
+        self.assertEqual([patient["id"] for patient in page["items"]], [self.patient.id])
+
+    def test_database_backend_matches_every_term(self):
+        self.create_doctor("Cardoso")
+        backend = DatabaseSearchBackend()
+
+        self.assertEqual(backend.search_doctors("cardio medico", 10), [self.doctor.id])
+        self.assertEqual(backend.search_patients("paciente 8699", 10), [self.patient.id])
+        self.assertEqual(backend.search_doctors("  ", 10), [])